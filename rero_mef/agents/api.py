@@ -5,7 +5,14 @@
 import click
 from flask import current_app
 
-from rero_mef.utils import build_ref_string, get_entity_class, progressbar
+from rero_mef.negative_cache import get_cached_misses
+from rero_mef.pidset import PidSet
+from rero_mef.utils import (
+    build_ref_string,
+    get_entity_class,
+    progressbar,
+    scan_index,
+)
 
 from ..api import Action, EntityIndexer, EntityRecord
 
@@ -201,23 +208,24 @@ def get_all_missing_viaf_pids(verbose=False):
         verbose=verbose,
         label="VIAF all",
     )
-    missing_pids = dict.fromkeys(progress, 1)
+    viaf_pids = PidSet(progress)
+    mef_viaf_pids = PidSet()
     if verbose:
         click.echo("Get pids from MEF and calculate missing ...")
     query = AgentMefRecord.search().filter("exists", field="viaf_pid")
     progress = progressbar(
-        items=query.source(["pid", "viaf_pid"]).scan(),
+        items=scan_index(query, fields=["pid", "viaf_pid"]),
         length=query.count(),
         verbose=verbose,
         label="VIAF from MEF",
     )
-    non_existing_pids = {
-        hit.pid: hit.viaf_pid
-        for hit in progress
-        if not missing_pids.pop(hit.viaf_pid, None)
-    }
+    non_existing_pids = {}
+    for hit in progress:
+        if hit.viaf_pid not in viaf_pids or hit.viaf_pid in mef_viaf_pids:
+            non_existing_pids[hit.pid] = hit.viaf_pid
+        mef_viaf_pids.add(hit.viaf_pid)
 
-    return list(missing_pids), non_existing_pids
+    return list(viaf_pids - mef_viaf_pids), non_existing_pids
 
 
 def get_unlinked_agents(relink=False, dbcommit=False, reindex=False, progress=False):
@@ -225,8 +233,9 @@ def get_unlinked_agents(relink=False, dbcommit=False, reindex=False, progress=Fa
 
     Scans Elasticsearch directly to collect the entity source code and pid
     needed for each VIAF lookup, avoiding per-record database reads.
-    Excludes deleted MEF records, deleted linked entities, and entities that
-    are already covered by an existing local VIAF record.
+    Excludes deleted MEF records, deleted linked entities, entities that
+    are already covered by an existing local VIAF record and entities whose
+    last VIAF lookup is a miss of the negative cache not due for a re-check.
 
     :param relink: If True, relink MEF records to already existing local VIAF records when possible.
     :param dbcommit: Commit relinking changes to DB.
@@ -254,14 +263,10 @@ def get_unlinked_agents(relink=False, dbcommit=False, reindex=False, progress=Fa
     entity_names = list(entity_by_name)
     covered_pids = {}
     for name in entity_names:
-        covered_search = (
-            AgentViafSearch()
-            .filter("exists", field=f"{name}_pid")
-            .source(["pid", f"{name}_pid"])
-        )
+        covered_search = AgentViafSearch().filter("exists", field=f"{name}_pid")
         covered_pids[name] = {
             hit_dict[f"{name}_pid"]: hit_dict["pid"]
-            for hit in covered_search.scan()
+            for hit in scan_index(covered_search, fields=["pid", f"{name}_pid"])
             if (hit_dict := hit.to_dict()).get(f"{name}_pid")
         }
     query = (
@@ -274,9 +279,10 @@ def get_unlinked_agents(relink=False, dbcommit=False, reindex=False, progress=Fa
     for name in entity_names:
         query = query.exclude("exists", field=f"{name}.deleted")
 
+    cached_misses = get_cached_misses("viaf")
     length = query.count() if progress else 0
     for hit in progressbar(
-        query.source(["pid", *entity_names]).scan(),
+        scan_index(query, fields=["pid", *(f"{name}.pid" for name in entity_names)]),
         length=length,
         verbose=progress,
         label="MEF without VIAF",
@@ -296,7 +302,10 @@ def get_unlinked_agents(relink=False, dbcommit=False, reindex=False, progress=Fa
                                     dbcommit=dbcommit,
                                     reindex=reindex,
                                 )
-                    else:
+                    elif (
+                        entity_cls.viaf_source_code,
+                        entity_pid,
+                    ) not in cached_misses:
                         yield mef_pid, entity_cls.viaf_source_code, entity_pid
                     break
 
@@ -6,15 +6,13 @@
 import contextlib
 import os
 import tempfile
-import time
 import uuid
 
 import click
-from flask import current_app
 from flask.cli import with_appcontext
 from sqlitedict import SqliteDict
 
-from ..cli import wait_empty_tasks
+from ..cli import run_rebuild_mef, wait_empty_tasks
 from ..cli_logging import ensure_single_stream_handler
 from ..utils import (
     get_entity_classes,
@@ -23,9 +21,11 @@ from ..utils import (
     read_json_record,
 )
 from .api import get_all_missing_viaf_pids, get_unlinked_agents
+from .mef.api import AgentMefRecord
 from .tasks import task_create_mef_and_agents_from_viaf
 from .utils import create_mef_files, create_viaf_files
 from .viaf.api import AgentViafRecord
+from .viaf.responses import get_response, get_stats, prune_responses
 from .viaf.tasks import (
     process_viaf_refresh,
     viaf_get_record,
@@ -39,8 +39,6 @@ def _clean_non_existing_viaf_links(non_existing_pids, verbose=False):
     :param verbose: Verbose output.
     :returns: Number of MEF records cleaned.
     """
-    from .mef.api import AgentMefRecord
-
     cleaned = 0
     for mef_pid, viaf_pid in non_existing_pids.items():
         if not (mef_record := AgentMefRecord.get_record_by_pid(mef_pid)):
@@ -85,6 +83,14 @@ def agents():
 @click.option("-p", "--progress", "progress", is_flag=True, default=False)
 @click.option("-w", "--wait", "wait", is_flag=True, default=False)
 @click.option("-f", "--viaf_file", "viaf_file", type=click.File("r"), default=None)
+@click.option(
+    "-N",
+    "--no_cache",
+    "no_cache",
+    is_flag=True,
+    default=False,
+    help="Ignore the negative cache of the online lookups.",
+)
 @with_appcontext
 def create_from_viaf(
     enqueue,
@@ -94,6 +100,7 @@ def create_from_viaf(
     progress,
     wait,
     viaf_file,
+    no_cache,
 ):
     """Create MEF and agents from viaf."""
     ensure_single_stream_handler()
@@ -130,7 +137,11 @@ def create_from_viaf(
     for pid in progress_bar:
         if enqueue:
             task = task_create_mef_and_agents_from_viaf.delay(
-                pid=pid, dbcommit=True, reindex=True, online=online
+                pid=pid,
+                dbcommit=True,
+                reindex=True,
+                online=online,
+                use_cache=not no_cache,
             )
             click.echo(f"viaf pid: {pid} task:{task}")
         else:
@@ -141,6 +152,7 @@ def create_from_viaf(
                 online=online,
                 verbose=verbose,
                 online_verbose=online_verbose,
+                use_cache=not no_cache,
             )
 
     if non_existing_pids:
@@ -264,11 +276,12 @@ def create_csv_mef(viaf_metadata_file, output_directory, verbose):
     help="Force-sync MEF and agent records even when VIAF data is unchanged (UPTODATE). Useful after a bug fix in agent processing.",
 )
 @click.option(
-    "--delay",
-    "delay",
-    default=1.0,
-    type=float,
-    help="Seconds to wait between VIAF fetch requests (default: 1).",
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Concurrent VIAF requests (default: RERO_MEF_VIAF_WORKERS).",
 )
 @with_appcontext
 def harvest_viaf(
@@ -280,7 +293,7 @@ def harvest_viaf(
     unlinked,
     online_verbose,
     update_agents,
-    delay,
+    workers,
 ):
     """Harvest and refresh VIAF records from the online API.
 
@@ -299,29 +312,8 @@ def harvest_viaf(
             raise click.UsageError("--unlinked cannot be combined with --batch_size")
 
         click.secho("Search VIAF for agents without VIAF link.", fg="green")
-        app = current_app._get_current_object()
         processed = 0
 
-        def _fetch_viaf(mef_pid, viaf_source_code, entity_pid):
-            """Fetch a single VIAF record online and return result tuple.
-
-            :param mef_pid: MEF record PID.
-            :param viaf_source_code: VIAF source code (e.g. DNB, SUDOC).
-            :param entity_pid: Agent PID to look up in VIAF.
-            :returns: Tuple (mef_pid, viaf_source_code, entity_pid, data, msg).
-            """
-            from .viaf.api import RetryableVIAFError
-
-            with app.app_context():
-                try:
-                    data, msg = AgentViafRecord.get_online_record(
-                        viaf_source_code=viaf_source_code,
-                        pid=entity_pid,
-                    )
-                except RetryableVIAFError as e:
-                    return mef_pid, viaf_source_code, entity_pid, None, str(e)
-                return mef_pid, viaf_source_code, entity_pid, data, msg
-
         db_path = os.path.join(
             tempfile.gettempdir(), f"viaf_unlinked_{uuid.uuid4().hex}.sqlite"
         )
@@ -330,22 +322,21 @@ def harvest_viaf(
                 for mef_pid, viaf_source_code, entity_pid in get_unlinked_agents(
                     relink=True, dbcommit=True, reindex=True, progress=progress
                 ):
-                    task_dict[mef_pid] = (viaf_source_code, entity_pid)
+                    task_dict[f"{viaf_source_code}|{entity_pid}"] = mef_pid
 
+                # The lookups run concurrently, the records are written here.
                 progress_bar = progressbar(
-                    items=task_dict,
+                    items=AgentViafRecord.get_online_records(
+                        keys=(key.split("|", 1) for key in task_dict),
+                        workers=workers,
+                    ),
                     length=len(task_dict),
                     verbose=progress,
                     label="VIAF lookup",
                 )
-                for mef_pid in progress_bar:
-                    viaf_source_code, entity_pid = task_dict[mef_pid]
+                for viaf_source_code, entity_pid, data, msg, _ in progress_bar:
+                    mef_pid = task_dict[f"{viaf_source_code}|{entity_pid}"]
                     processed += 1
-                    if delay:
-                        time.sleep(delay)
-                    mef_pid, viaf_source_code, entity_pid, data, msg = _fetch_viaf(
-                        mef_pid, viaf_source_code, entity_pid
-                    )
                     if online_verbose:
                         click.echo(f"  {msg}")
                     if not data:
@@ -406,7 +397,84 @@ def harvest_viaf(
         progress=progress,
         delete_if_not_found=delete_if_not_found,
         update_agents=update_agents,
+        workers=workers,
     )
     click.secho(f"Processed: {count}", fg="green")
     for action, cnt in action_counts.items():
         click.echo(f"  {action}: {cnt}")
+
+
+@agents.command()
+@click.option(
+    "-P", "--pid", "viaf_pid", default=None, help="Show the response of a VIAF PID."
+)
+@click.option(
+    "--prune",
+    "prune_days",
+    default=None,
+    type=click.IntRange(min=0),
+    help="Delete the responses not checked for this number of days.",
+)
+@with_appcontext
+def viaf_responses(viaf_pid, prune_days):
+    """Inspect and prune the VIAF response cache of the VIAF refresh.
+
+    :param viaf_pid: VIAF PID to show.
+    :param prune_days: Age in days of the responses to delete.
+    """
+    if prune_days is not None:
+        count = prune_responses(days=prune_days)
+        click.secho(f"Deleted VIAF responses: {count}", fg="green")
+    if viaf_pid:
+        if response := get_response(viaf_pid):
+            for key, value in response.items():
+                click.echo(f"{key:<15}: {value}")
+        else:
+            click.secho(f"No VIAF response for: {viaf_pid}", fg="yellow")
+        return
+    for key, value in get_stats().items():
+        click.echo(f"{key:<15}: {value}")
+
+
+@agents.command()
+@click.option("--dry-run", "dry_run", is_flag=True, default=False)
+@click.option(
+    "-o",
+    "--output",
+    "report_file",
+    type=click.File("w"),
+    default=None,
+    help="JSON lines file for the planned changes.",
+)
+@click.option(
+    "-r/-R",
+    "--reindex/--no-reindex",
+    "reindex",
+    default=True,
+    help="Reindex the written records, deleted records are always unindexed.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=int,
+    default=None,
+    help="Records written per transaction.",
+)
+@with_appcontext
+def rebuild_mef(dry_run, report_file, reindex, batch_size):
+    """Rebuild the agent MEF clusters from the VIAF and agent records.
+
+    :param dry_run: Only report the planned changes.
+    :param report_file: File receiving the planned changes.
+    :param reindex: Reindex the written records.
+    :param batch_size: Records written per transaction.
+    """
+    run_rebuild_mef(
+        mef_cls=AgentMefRecord,
+        viaf_cls=AgentViafRecord,
+        dry_run=dry_run,
+        report_file=report_file,
+        reindex=reindex,
+        batch_size=batch_size,
+    )
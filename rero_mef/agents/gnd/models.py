@@ -7,6 +7,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class AgentGndIdentifier(RecordIdentifier):
     """Sequence generator for GND Authority identifiers."""
@@ -21,7 +23,7 @@ class AgentGndIdentifier(RecordIdentifier):
     )
 
 
-class AgentGndMetadata(db.Model, RecordMetadataBase):
+class AgentGndMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "agent_gnd_metadata"
@@ -7,6 +7,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class AgentIdrefIdentifier(RecordIdentifier):
     """Sequence generator for IDREF agent identifiers."""
@@ -21,7 +23,7 @@ class AgentIdrefIdentifier(RecordIdentifier):
     )
 
 
-class AgentIdrefMetadata(db.Model, RecordMetadataBase):
+class AgentIdrefMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "agent_idref_metadata"
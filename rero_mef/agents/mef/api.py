@@ -3,9 +3,6 @@
 
 """API for manipulating MEF records."""
 
-from copy import deepcopy
-
-from flask import current_app
 from invenio_search.api import RecordsSearch
 
 from rero_mef.api import EntityIndexer
@@ -80,45 +77,6 @@ class AgentMefRecord(EntityMefRecord):
             **kwargs,
         )
 
-    def replace_refs(self):
-        """Replace $ref with real data."""
-        data = deepcopy(self)
-        data = super().replace_refs()
-        sources = [agent for agent in self.entities if data.get(agent)]
-        data["sources"] = sources
-        return data
-
-    def add_information(self, resolve=False, sources=False):
-        """Add information to record.
-
-        Sources will be also added if resolve is True.
-        :param resolve: resolve $refs
-        :param sources: Add sources information to record
-        :returns: record
-        """
-        replace_refs_data = AgentMefRecord(deepcopy(self).replace_refs())
-        data = replace_refs_data if resolve else deepcopy(self)
-        my_sources = []
-        for agent in self.entities:
-            if agent_data := data.get(agent):
-                # we got a error status in data
-                if agent_data.get("status"):
-                    data.pop(agent)
-                    current_app.logger.error(
-                        f"MEF replace refs {data.get('pid')} {agent}"
-                        f" status: {agent_data.get('status')}"
-                        f" {agent_data.get('message')}"
-                    )
-                else:
-                    my_sources.append(agent)
-                for agent in self.entities:
-                    if agent_data := replace_refs_data.get(agent):
-                        if metadata := replace_refs_data[agent].get("metadata"):
-                            data[agent] = metadata
-        if my_sources and (resolve or sources):
-            data["sources"] = my_sources
-        return data
-
     @classmethod
     def get_all_missing_viaf_pids(cls, verbose=False):
         """Get VIAF pids missing from MEF and MEF records with non-existing VIAF pids.
@@ -128,39 +86,6 @@ class AgentMefRecord(EntityMefRecord):
         """
         return get_all_missing_viaf_pids(verbose=verbose)
 
-    @classmethod
-    def get_latest(cls, pid_type, pid, _visited=None):
-        """Get latest Mef record for pid_type and pid.
-
-        :param pid_type: pid type to use.
-        :param pid: pid to use.
-        :param _visited: set of already-seen pids used to break redirect cycles.
-        :returns: latest record.
-        """
-        visited = _visited or set()
-        if pid in visited:
-            return {}
-        visited.add(pid)
-        search = AgentMefSearch().filter({"term": {f"{pid_type}.pid": pid}})
-        if search.count() > 0:
-            data = next(search.scan()).to_dict()
-            new_pid = None
-            if relation_pid := data.get(pid_type, {}).get("relation_pid"):
-                if relation_pid["type"] == "redirect_to":
-                    new_pid = relation_pid["value"]
-            elif pid_type == "idref":
-                # Find new pid from redirect_pid redirect_from
-                search = AgentMefSearch().filter("term", idref__relation_pid__value=pid)
-                if search.count() > 0:
-                    new_data = next(search.scan()).to_dict()
-                    new_pid = new_data.get("idref", {}).get("pid")
-            return (
-                cls.get_latest(pid_type=pid_type, pid=new_pid, _visited=visited)
-                if new_pid
-                else data
-            )
-        return {}
-
 
 class AgentMefIndexer(EntityIndexer):
     """Agent MEF indexer."""
@@ -6,8 +6,10 @@
 from invenio_db import db
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
 
-class AgentMefMetadata(db.Model, RecordMetadataBase):
+
+class AgentMefMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "mef_metadata"
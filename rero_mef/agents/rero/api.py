@@ -5,6 +5,7 @@
 
 from invenio_search.api import RecordsSearch
 
+from ...negative_cache import negative_cached
 from ..api import AgentIndexer, AgentRecord
 from .fetchers import rero_id_fetcher
 from .minters import rero_id_minter
@@ -39,6 +40,7 @@ class AgentReroRecord(AgentRecord):
     search = AgentReroSearch
 
     @classmethod
+    @negative_cached
     def get_online_record(cls, id_, debug=False):
         """Get online record.
 
@@ -7,6 +7,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class AgentReroIdentifier(RecordIdentifier):
     """Sequence generator for RERO agent identifiers."""
@@ -21,7 +23,7 @@ class AgentReroIdentifier(RecordIdentifier):
     )
 
 
-class AgentReroMetadata(db.Model, RecordMetadataBase):
+class AgentReroMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "agent_rero_metadata"
@@ -3,8 +3,6 @@
 
 """Record serialization."""
 
-import contextlib
-
 from flask import current_app
 from invenio_records_rest.links import default_links_factory_with_additional
 from invenio_records_rest.schemas import RecordSchemaJSONV1
@@ -14,28 +12,25 @@ from invenio_records_rest.serializers.response import (
     search_responsify,
 )
 
+from ..registry import current_entity_registry
 from .mef.api import AgentMefRecord
-from .viaf.api import AgentViafSearch
+from .viaf.api import AgentViafRecord
 
 
-def add_links(pid, record):
-    """Add MEF link to agents."""
+def build_links(pid, mef_pids, viaf_pids):
+    """Build the links of an agent.
+
+    :param pid: Persistent identifier instance.
+    :param mef_pids: MEF pids linking the agent, newest first.
+    :param viaf_pids: VIAF pids linking the agent, newest first.
+    :returns: Dictionary of links.
+    """
     links = {}
-    for idx, mef_pid in enumerate(
-        AgentMefRecord.get_mef(record.pid, record.name, pid_only=True)
-    ):
+    for idx, mef_pid in enumerate(mef_pids):
         number = f"-{idx}" if idx else ""
         links[f"mef{number}"] = "{scheme}://{host}/api/agents/mef/" + str(mef_pid)
-
-    with contextlib.suppress(Exception):
-        query = (
-            AgentViafSearch()
-            .filter({"term": {record.viaf_pid_name: pid.pid_value}})
-            .params(preserve_order=True)
-            .sort({"_updated": {"order": "desc"}})
-            .source("pid")
-        )
-        viaf_pid = next(query.scan()).pid
+    if viaf_pids:
+        viaf_pid = viaf_pids[0]
         links["viaf"] = "{scheme}://{host}/api/agents/viaf/" + str(viaf_pid)
         viaf_url = current_app.config.get("RERO_MEF_VIAF_BASE_URL")
         links["viaf.org"] = f"{viaf_url}/viaf/{viaf_pid!s}"
@@ -43,6 +38,45 @@ def add_links(pid, record):
     return link_factory(pid)
 
 
+def add_links(pid, record):
+    """Add MEF link to agents."""
+    return build_links(
+        pid,
+        AgentMefRecord.get_mef(record.pid, record.name, pid_only=True),
+        AgentViafRecord.get_viaf_pids(record.name, pid.pid_value),
+    )
+
+
+def search_links_factory(pids):
+    """Create a links factory for the hits of a search page.
+
+    The MEF and VIAF pids of all hits are fetched with one query per source
+    and link table instead of two queries per hit.
+
+    :param pids: Persistent identifiers of the hits.
+    :returns: Links factory.
+    """
+    pid_values = {}
+    for pid in pids:
+        pid_values.setdefault(pid.pid_type, []).append(pid.pid_value)
+    mef_pids = {}
+    viaf_pids = {}
+    for pid_type, values in pid_values.items():
+        name = current_entity_registry.get_class(pid_type, "record_class").name
+        mef_pids[pid_type] = AgentMefRecord.get_mef_pids_many(name, values)
+        viaf_pids[pid_type] = AgentViafRecord.get_viaf_pids_many(name, values)
+
+    def links_factory(pid, **kwargs):
+        """Build the links of a hit from the fetched pids."""
+        return build_links(
+            pid,
+            mef_pids[pid.pid_type].get(pid.pid_value, []),
+            viaf_pids[pid.pid_type].get(pid.pid_value, []),
+        )
+
+    return links_factory
+
+
 class ReroMefSerializer(JSONSerializer):
     """Mixin serializing records as JSON."""
 
@@ -57,6 +91,29 @@ class ReroMefSerializer(JSONSerializer):
             pid=pid, record=record, links_factory=add_links, **kwargs
         )
 
+    def serialize_search(
+        self, pid_fetcher, search_result, links=None, item_links_factory=None, **kwargs
+    ):
+        """Serialize a search result with the links of all hits.
+
+        :param pid_fetcher: Persistent identifier fetcher.
+        :param search_result: Elasticsearch search result.
+        :param links: Dictionary of links to add to response.
+        :param item_links_factory: Factory function for record links, replaced
+            by :func:`search_links_factory`.
+        """
+        pids = [
+            pid_fetcher(hit["_id"], hit["_source"])
+            for hit in search_result["hits"]["hits"]
+        ]
+        return super().serialize_search(
+            pid_fetcher,
+            search_result,
+            links=links,
+            item_links_factory=search_links_factory(pids),
+            **kwargs,
+        )
+
 
 json_ = ReroMefSerializer(RecordSchemaJSONV1)
 """JSON v1 serializer."""
@@ -11,7 +11,13 @@ from .viaf.api import AgentViafRecord
 
 @shared_task
 def task_create_mef_and_agents_from_viaf(
-    pid, dbcommit=True, reindex=True, online=None, verbose=False, online_verbose=False
+    pid,
+    dbcommit=True,
+    reindex=True,
+    online=None,
+    verbose=False,
+    online_verbose=False,
+    use_cache=True,
 ):
     """Create MEF and agents from VIAF task.
 
@@ -21,6 +27,7 @@ def task_create_mef_and_agents_from_viaf(
     :param online: get missing records from internet
     :param verbose: verbose or not
     :param online_verbose: online verbose or not
+    :param use_cache: consult the negative cache of the online lookups
     :returns: string with pid and actions
     """
     online = online or []
@@ -31,6 +38,7 @@ def task_create_mef_and_agents_from_viaf(
             online=online,
             verbose=verbose,
             online_verbose=online_verbose,
+            use_cache=use_cache,
         )
     click.secho(f"VIAF not found: {pid}", fg="red")
     return {}, {}
@@ -12,6 +12,7 @@ from uuid import uuid4
 import click
 from flask import current_app
 
+from ..pidset import PidSet
 from ..utils import (
     get_entity_class,
     metadata_csv_line,
@@ -45,7 +46,7 @@ def init_entity_pids(input_directory, verbose):
 
     :param input_directory: Input directory to look for agent pidstore files.
     :param verbose: Verbose.
-    :returns: Two dictionaries: one mapping agent names to associated PIDs, and one mapping VIAF agent PIDs to names.
+    :returns: Two dictionaries: one mapping agent names to their set of PIDs, and one mapping VIAF agent PIDs to names.
     """
     pids = {}
     viaf_entity_pid_names = {}
@@ -61,13 +62,10 @@ def init_entity_pids(input_directory, verbose):
                     if verbose:
                         click.echo(f"  Read pids from: {file_name}")
                     length = number_records_in_file(file_name, "csv")
-                    pids[name] = {}
                     progress = progressbar(
                         items=open(file_name), length=length, verbose=verbose
                     )
-                    for line in progress:
-                        pid = line.split("\t")[3]
-                        pids[name][pid] = 1
+                    pids[name] = PidSet(line.split("\t")[3] for line in progress)
         except Exception as err:
             click.secho(err, fg="red")
     return pids, viaf_entity_pid_names
@@ -94,6 +92,7 @@ def create_mef_files(
     if verbose:
         click.echo("Start ***")
     pids, viaf_entity_pid_names = init_entity_pids(input_directory, verbose)
+    used_pids = {name: PidSet() for name in pids}
 
     mef_pid = 1
     corresponding_data = {}
@@ -127,9 +126,13 @@ def create_mef_files(
                 corresponding_data["$schema"] = schema
             for viaf_pid_name, name in viaf_entity_pid_names.items():
                 entity_pid = viaf_data.get(viaf_pid_name)
-                if entity_pid and pids.get(name, {}).get(entity_pid):
+                if (
+                    entity_pid
+                    and entity_pid in pids.get(name, ())
+                    and entity_pid not in used_pids[name]
+                ):
                     corresponding_data["viaf_pid"] = viaf_pid
-                    pids[name].pop(entity_pid)
+                    used_pids[name].add(entity_pid)
                     corresponding_data[name] = {
                         "$ref": f"{base_url}/api/{name}/{entity_pid}"
                     }
@@ -144,6 +147,7 @@ def create_mef_files(
                 )
 
         # Create MEF without VIAF
+        pids = {name: pids[name] - used_pids[name] for name in pids}
         length = sum(len(p) for p in pids.values())
         if verbose:
             click.echo(f"  Create MEF without VIAF pid: {length}")
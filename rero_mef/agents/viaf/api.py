@@ -3,25 +3,40 @@
 
 """API for manipulating VIAF record."""
 
-import random
 import signal
 import threading
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from copy import deepcopy
+from itertools import islice
 from urllib.parse import quote
 
 import click
 import requests
+from elasticsearch.exceptions import TransportError
 from elasticsearch_dsl.query import Q
 from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
 from invenio_search.api import RecordsSearch
+from sqlalchemy import delete, except_, insert, literal, select, union_all
 
-from rero_mef.extensions import MD5Extension
+from rero_mef.extensions import LinksExtension, MD5Extension
 from rero_mef.filter import exists_filter
+from rero_mef.negative_cache import (
+    ERROR,
+    NOT_FOUND,
+    clear_miss,
+    is_cached_miss,
+    record_miss,
+)
+from rero_mef.pidset import PidSet
+from rero_mef.ratelimit import get_token_bucket
 from rero_mef.utils import (
+    get_duplicate_values,
     get_entity_class,
     progressbar,
     requests_retry_session,
+    scan_index,
 )
 from rero_mef.version import __version__
 
@@ -29,27 +44,29 @@ from .. import AgentGndRecord, AgentIdrefRecord, AgentMefRecord, AgentReroRecord
 from ..api import Action, EntityIndexer, EntityRecord
 from .fetchers import viaf_id_fetcher
 from .minters import viaf_id_minter
-from .models import ViafMetadata
+from .models import ViafLink, ViafMetadata
 from .providers import ViafProvider
+from .responses import (
+    conditional_headers,
+    get_validators,
+    store_validators,
+    update_validators,
+)
 
 _md5 = MD5Extension()
 
 
-def _sleep_with_countdown(wait_seconds):
-    """Sleep while showing a short progress countdown.
+def get_viaf_rate_limiter():
+    """Get the token bucket shared by all VIAF requests.
 
-    :param wait_seconds: Number of seconds to wait.
+    :returns: Token bucket.
     """
-    if wait_seconds <= 0:
-        return
-    hms = f"{wait_seconds // 3600:02d}:{(wait_seconds % 3600) // 60:02d}:{wait_seconds % 60:02d}"
-    with click.progressbar(
-        range(wait_seconds),
-        label=f"Retry-After={hms}",
-        length=wait_seconds,
-    ) as progress_items:
-        for _ in progress_items:
-            time.sleep(1)
+    return get_token_bucket(
+        url=current_app.config.get("RERO_MEF_VIAF_RATE_LIMIT_STORAGE_URI"),
+        key="rero_mef:viaf",
+        rate=current_app.config.get("RERO_MEF_VIAF_REQUESTS_PER_SECOND"),
+        burst=current_app.config.get("RERO_MEF_VIAF_REQUEST_BURST", 1),
+    )
 
 
 def _get_redirect_pid_from_msg(msg):
@@ -65,6 +82,15 @@ def _get_redirect_pid_from_msg(msg):
     return redirect_to_pid or None
 
 
+def _is_not_modified_msg(msg):
+    """Test if a VIAF fetch message reports an unchanged payload.
+
+    :param msg: VIAF fetch status message.
+    :returns: True for an unchanged payload.
+    """
+    return bool(msg) and msg.endswith("| NOT MODIFIED")
+
+
 class RetryableVIAFError(RuntimeError):
     """Transient VIAF fetch failure that callers should not treat as not-found."""
 
@@ -92,6 +118,7 @@ class AgentViafRecord(EntityRecord):
     name = "viaf"
     model_cls = ViafMetadata
     search = AgentViafSearch
+    _extensions = [*EntityRecord._extensions, LinksExtension()]
     # https://viaf.org/
     sources = {
         "SUDOC": {
@@ -205,6 +232,7 @@ class AgentViafRecord(EntityRecord):
         verbose=False,
         online_verbose=False,
         update_viaf=False,
+        use_cache=True,
     ):
         """Create MEF and agents records.
 
@@ -215,6 +243,7 @@ class AgentViafRecord(EntityRecord):
         :param online_verbose: Online verbose.
         :param update_viaf: When True, search VIAF online for each agent
             displaced from this cluster and create/update the new cluster.
+        :param use_cache: Consult the negative cache of the online lookups.
         :returns: Actions.
         """
 
@@ -229,7 +258,7 @@ class AgentViafRecord(EntityRecord):
             action = Action.NOT_ONLINE
             agent_record = None
             if agent_class.provider.pid_type in online:
-                data, msg = agent_class.get_online_record(id_=pid)
+                data, msg = agent_class.get_online_record(id_=pid, use_cache=use_cache)
                 if online_verbose:
                     click.echo(f"\n{msg}")
                 if data and not data.get("NO TRANSFORMATION"):
@@ -320,7 +349,9 @@ class AgentViafRecord(EntityRecord):
             if update_viaf and getattr(agent, "viaf_source_code", None):
                 try:
                     viaf_data, msg = AgentViafRecord.get_online_record(
-                        viaf_source_code=agent.viaf_source_code, pid=entity_pid
+                        viaf_source_code=agent.viaf_source_code,
+                        pid=entity_pid,
+                        use_cache=use_cache,
                     )
                     if verbose:
                         click.echo(msg)
@@ -361,14 +392,24 @@ class AgentViafRecord(EntityRecord):
         return result
 
     @classmethod
-    def get_online_record(cls, viaf_source_code, pid, rec_format=None):
+    def get_online_record(
+        cls, viaf_source_code, pid, rec_format=None, validators=None, use_cache=True
+    ):
         """Get VIAF record.
 
         Get's the VIAF record from: http://www.viaf.org/viaf/sourceID/{source_code}|{pid}
 
+        With ``validators`` a conditional request is sent and an unchanged
+        payload is not parsed, the message ends with ``| NOT MODIFIED``.
+        Source pid lookups consult the negative cache, a cached miss is
+        reported as ``| NO RECORD (cached)``.
+
         :param viaf_source_code: agent source code
         :param pid: pid for agent source code
         :param rec_format: raw = get the not transformed VIAF record link = get the VIAF link record
+        :param validators: stored validators of the VIAF record, updated in
+            place with the validators of the response
+        :param use_cache: consult the negative cache for source pids
         :returns: VIAF record as json
         """
         viaf_url = current_app.config.get("RERO_MEF_VIAF_BASE_URL")
@@ -377,8 +418,6 @@ class AgentViafRecord(EntityRecord):
         read_timeout = current_app.config.get("RERO_MEF_VIAF_READ_TIMEOUT")
         retries = current_app.config.get("RERO_MEF_VIAF_RETRIES")
         total_timeout = current_app.config.get("RERO_MEF_VIAF_TOTAL_TIMEOUT")
-        request_delay = current_app.config.get("RERO_MEF_VIAF_REQUEST_DELAY")
-        request_jitter = current_app.config.get("RERO_MEF_VIAF_REQUEST_JITTER", 0)
         retry_after_default = current_app.config.get(
             "RERO_MEF_VIAF_RETRY_AFTER_DEFAULT"
         )
@@ -393,6 +432,8 @@ class AgentViafRecord(EntityRecord):
             "Accept-Language": "en-US,en;q=0.9",
             "User-Agent": user_agent,
         }
+        if validators:
+            headers |= conditional_headers(validators)
 
         if viaf_source_code.upper() == "VIAF":
             url = f"{url}/{pid}"
@@ -400,9 +441,10 @@ class AgentViafRecord(EntityRecord):
             source_id = quote(str(viaf_source_code), safe="")
             source_pid = quote(str(pid), safe="")
             url = f"{url}/sourceID/{source_id}%7C{source_pid}"
+            if use_cache and is_cached_miss("viaf", viaf_source_code, pid):
+                return {}, f"VIAF get: {pid:<15} {url} | NO RECORD (cached)"
 
-        if request_delay:
-            time.sleep(float(request_delay) + random.uniform(0, float(request_jitter)))
+        rate_limiter = get_viaf_rate_limiter()
 
         # 429 is handled explicitly below so we can cap Retry-After sleeps.
         retry_statuses = (500, 502, 503, 504)
@@ -447,6 +489,7 @@ class AgentViafRecord(EntityRecord):
         max_attempts = 2
         response = None
         for attempt in range(1, max_attempts + 1):
+            rate_limiter.acquire()
             try:
                 # requests' connect/read timeouts are not always sufficient to bound
                 # total wall-clock time under some network/proxy conditions.
@@ -477,12 +520,20 @@ class AgentViafRecord(EntityRecord):
                     else ""
                 )
             )
+            # all workers and processes wait until Retry-After is over
+            rate_limiter.pause(capped_sleep)
             if attempt >= max_attempts:
                 raise RetryableVIAFError(wait_msg)
             click.echo(wait_msg)
-            _sleep_with_countdown(capped_sleep)
             continue
 
+        if (
+            validators is not None
+            and response.status_code in (requests.codes.ok, requests.codes.not_modified)
+            and update_validators(validators, response)
+        ):
+            return None, f"VIAF get: {pid:<15} {url} | NOT MODIFIED"
+
         result = {}
         msg = f"VIAF get: {pid:<15} {url} | HTTP {response.status_code}"
         if response.status_code == requests.codes.ok:
@@ -551,6 +602,8 @@ class AgentViafRecord(EntityRecord):
                 current_app.logger.exception(
                     f"Error parsing VIAF response for {pid}: {e}"
                 )
+                if viaf_source_code.upper() != "VIAF":
+                    record_miss("viaf", viaf_source_code, pid, ERROR)
                 return {}, f"VIAF get: {pid:<15} {url} | PARSE ERROR: {e}"
 
         # make sure we got a VIAF with the same pid for source
@@ -567,9 +620,74 @@ class AgentViafRecord(EntityRecord):
             result.get(f"{cls.sources.get(viaf_source_code, {}).get('name')}_pid")
             == pid
         ):
+            clear_miss("viaf", viaf_source_code, pid)
             return result, msg
+        else:
+            definitive = response.status_code in (
+                requests.codes.ok,
+                requests.codes.not_found,
+            )
+            record_miss(
+                "viaf", viaf_source_code, pid, NOT_FOUND if definitive else ERROR
+            )
         return {}, f"VIAF get: {pid:<15} {url} | NO RECORD"
 
+    @classmethod
+    def get_online_records(cls, keys, workers=None, conditional=False):
+        """Get VIAF records concurrently.
+
+        The requests run in a thread pool and share the VIAF rate limiter, so
+        up to ``workers`` requests are in flight while the request budget
+        allows it. The results are processed by the caller in its own thread.
+
+        With ``conditional``, VIAF clusters are requested with the validators
+        of the ``viaf_response`` table. The validators of a result are stored
+        in their own transaction when the caller asks for the next result, so
+        a result that failed to be processed is fetched again by the next
+        refresh and the caller's session is never committed.
+
+        :param keys: Iterable of ``(viaf_source_code, pid)`` tuples.
+        :param workers: Number of concurrent requests, default
+            ``RERO_MEF_VIAF_WORKERS``.
+        :param conditional: Send conditional requests for VIAF pids.
+        :yields: ``(viaf_source_code, pid, data, msg, error)`` tuples in
+            completion order, ``error`` is the ``RetryableVIAFError`` of a
+            failed request.
+        """
+        app = current_app._get_current_object()
+        workers = workers or app.config.get("RERO_MEF_VIAF_WORKERS", 1)
+
+        def get_online(viaf_source_code, pid, validators):
+            with app.app_context():
+                try:
+                    data, msg = cls.get_online_record(
+                        viaf_source_code=viaf_source_code,
+                        pid=pid,
+                        validators=validators,
+                    )
+                except RetryableVIAFError as err:
+                    return (viaf_source_code, pid, None, str(err), err), None
+                return (viaf_source_code, pid, data, msg, None), validators
+
+        def submit(viaf_source_code, pid):
+            validators = None
+            if conditional and viaf_source_code.upper() == "VIAF":
+                validators = get_validators(pid)
+            return executor.submit(get_online, viaf_source_code, pid, validators)
+
+        keys = iter(keys)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {submit(*key) for key in islice(keys, workers)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending |= {submit(*key) for key in islice(keys, len(done))}
+                for future in done:
+                    result, validators = future.result()
+                    yield result
+                    # redirects depend on the target record, never skip them
+                    if validators and not _get_redirect_pid_from_msg(result[3]):
+                        store_validators(result[1], validators)
+
     def update_online(self, dbcommit=False, reindex=False):
         """Update online.
 
@@ -689,22 +807,17 @@ class AgentViafRecord(EntityRecord):
     def get_viaf(cls, agent):
         """Get VIAF record by agent.
 
+        Agent source records are looked up in the ``viaf_link`` table.
+
         :param agent: Agency do get corresponding VIAF record.
         """
         if isinstance(agent, AgentMefRecord):
             return [cls.get_record_by_pid(agent.get("viaf_pid"))]
         if isinstance(agent, AgentViafRecord):
             return [cls.get_record_by_pid(agent.get("pid"))]
-        pid = agent.get("pid")
-        viaf_pid_name = agent.viaf_pid_name
-        query = (
-            AgentViafSearch()
-            .filter({"term": {viaf_pid_name: pid}})
-            .params(preserve_order=True)
-            .sort({"_updated": {"order": "desc"}})
-        )
         viaf_records = [
-            cls.get_record_by_pid(hit.pid) for hit in query.source("pid").scan()
+            cls(obj.data, model=obj)
+            for _, obj in cls._linked_records_query(agent.name, agent.get("pid"))
         ]
         if len(viaf_records) > 1:
             current_app.logger.error(
@@ -713,6 +826,148 @@ class AgentViafRecord(EntityRecord):
             )
         return viaf_records
 
+    @classmethod
+    def _linked_records_query(cls, source_name, source_pid):
+        """Build a query of the VIAF records linking a source pid.
+
+        :param source_name: Source name, e.g. ``gnd``.
+        :param source_pid: Source pid.
+        :returns: Query of ``(pid, metadata)`` rows, newest update first.
+        """
+        return (
+            cls._records_query()
+            .join(ViafLink, ViafLink.viaf_pid == PersistentIdentifier.pid_value)
+            .filter(
+                ViafLink.source_name == source_name,
+                ViafLink.source_pid == source_pid,
+            )
+            .order_by(cls.model_cls.updated.desc())
+        )
+
+    @classmethod
+    def get_viaf_pids(cls, source_name, source_pid):
+        """Get the pids of the VIAF records linking a source pid.
+
+        :param source_name: Source name, e.g. ``gnd``.
+        :param source_pid: Source pid.
+        :returns: List of VIAF pids, newest update first.
+        """
+        return [pid for pid, _ in cls._linked_records_query(source_name, source_pid)]
+
+    @classmethod
+    def get_viaf_pids_many(cls, source_name, source_pids):
+        """Get the pids of the VIAF records linking many source pids.
+
+        :param source_name: Source name, e.g. ``gnd``.
+        :param source_pids: Source pids.
+        :returns: Dictionary source pid -> list of VIAF pids, newest update
+            first. Source pids without VIAF record are missing.
+        """
+        viaf_pids = {}
+        if not (source_pids := list(source_pids)):
+            return viaf_pids
+        query = (
+            cls._records_query()
+            .join(ViafLink, ViafLink.viaf_pid == PersistentIdentifier.pid_value)
+            .filter(
+                ViafLink.source_name == source_name,
+                ViafLink.source_pid.in_(source_pids),
+            )
+            .order_by(cls.model_cls.updated.desc())
+            .with_entities(ViafLink.source_pid, PersistentIdentifier.pid_value)
+        )
+        for source_pid, viaf_pid in query:
+            viaf_pids.setdefault(source_pid, []).append(viaf_pid)
+        return viaf_pids
+
+    @property
+    def links(self):
+        """Get the agent source links of the record.
+
+        :returns: Set of ``(source_name, source_pid)`` tuples.
+        """
+        return {
+            (source, source_pid)
+            for source in self.sources_used
+            if (source_pid := self.get(f"{source}_pid"))
+        }
+
+    def sync_links(self):
+        """Write the agent source links of the record to the ``viaf_link`` table."""
+        if not self.pid:
+            return
+        stored = {
+            (link.source_name, link.source_pid): link
+            for link in ViafLink.query.filter_by(viaf_pid=self.pid)
+        }
+        links = self.links
+        for key in stored.keys() - links:
+            db.session.delete(stored[key])
+        db.session.add_all(
+            ViafLink(source_name=source_name, source_pid=source_pid, viaf_pid=self.pid)
+            for source_name, source_pid in links - stored.keys()
+        )
+
+    def delete_links(self):
+        """Remove the agent source links of the record from the ``viaf_link`` table."""
+        if self.pid:
+            ViafLink.query.filter_by(viaf_pid=self.pid).delete(
+                synchronize_session="fetch"
+            )
+
+    @classmethod
+    def _stored_links_query(cls):
+        """Build a query of the agent source links stored in the VIAF records.
+
+        :returns: Select of ``(source_name, source_pid, viaf_pid)``.
+        """
+        json = cls.model_cls.json
+        return union_all(
+            *[
+                select(
+                    literal(data["name"], db.String).label("source_name"),
+                    json[f"{data['name']}_pid"].as_string().label("source_pid"),
+                    json["pid"].as_string().label("viaf_pid"),
+                ).where(json[f"{data['name']}_pid"].isnot(None))
+                for data in cls.sources.values()
+                if data.get("record_class")
+            ]
+        )
+
+    @classmethod
+    def backfill_links(cls):
+        """Rebuild the ``viaf_link`` table from the VIAF records.
+
+        :returns: Number of links written.
+        """
+        db.session.execute(delete(ViafLink))
+        result = db.session.execute(
+            insert(ViafLink).from_select(
+                ["source_name", "source_pid", "viaf_pid"], cls._stored_links_query()
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @classmethod
+    def check_links(cls, fix=False):
+        """Compare the ``viaf_link`` rows with the links stored in the VIAF records.
+
+        :param fix: If True, add the missing and delete the stale links.
+        :returns: Tuple (missing, stale) of lists of
+            ``(source_name, source_pid, viaf_pid)`` rows.
+        """
+        stored = select(cls._stored_links_query().subquery())
+        links = select(ViafLink.source_name, ViafLink.source_pid, ViafLink.viaf_pid)
+        missing = db.session.execute(except_(stored, links)).all()
+        stale = db.session.execute(except_(links, stored)).all()
+        if fix:
+            db.session.add_all(ViafLink(**row._asdict()) for row in missing)
+            for row in stale:
+                ViafLink.query.filter_by(**row._asdict()).delete()
+            db.session.commit()
+        return missing, stale
+
     @classmethod
     def create_or_update(
         cls,
@@ -797,16 +1052,18 @@ class AgentViafRecord(EntityRecord):
 
     def get_entities_records(self, verbose=False):
         """Get agent records."""
-        agent_records = []
+        pids_by_class = {}
         for agent in self.get_entities_pids():
-            record_class = agent["record_class"]
-            if agent_record := record_class.get_record_by_pid(agent["pid"]):
-                agent_records.append(agent_record)
-            elif verbose:
-                current_app.logger.warning(
-                    f"Record not found VIAF: {self.pid} "
-                    f"{agent['record_class'].name}: {agent['pid']}"
-                )
+            pids_by_class.setdefault(agent["record_class"], []).append(agent["pid"])
+        agent_records = []
+        for record_class, pids in pids_by_class.items():
+            records, missing_pids = record_class.get_records_by_pids(pids)
+            agent_records.extend(records)
+            if verbose:
+                for pid in missing_pids:
+                    current_app.logger.warning(
+                        f"Record not found VIAF: {self.pid} {record_class.name}: {pid}"
+                    )
         return agent_records
 
     @classmethod
@@ -825,7 +1082,8 @@ class AgentViafRecord(EntityRecord):
                 length=record_class.count(),
                 verbose=verbose,
             )
-            pids_db = set(progress)
+            pids_db = PidSet(progress)
+            pids_found = PidSet()
 
             entity_pid_name = f"{record_class.name}_pid"
             if verbose:
@@ -834,7 +1092,7 @@ class AgentViafRecord(EntityRecord):
                 "bool", should=[Q("exists", field=entity_pid_name)]
             )
             progress = progressbar(
-                items=query.source(["pid", entity_pid_name]).scan(),
+                items=scan_index(query, fields=["pid", entity_pid_name]),
                 length=query.count(),
                 verbose=verbose,
             )
@@ -842,17 +1100,45 @@ class AgentViafRecord(EntityRecord):
             for hit in progress:
                 viaf_pid = hit.pid
                 entity_pid = hit.to_dict().get(entity_pid_name)
-                if entity_pid in pids_db:
-                    pids_db.discard(entity_pid)
+                if entity_pid in pids_db and entity_pid not in pids_found:
+                    pids_found.add(entity_pid)
                 else:
                     pids_viaf.append(viaf_pid)
-            return list(pids_db), pids_viaf
+            return list(pids_db - pids_found), pids_viaf
         click.secho(f"ERROR Record class not found for: {agent}", fg="red")
         return [], []
 
     @classmethod
     def get_pids_with_multiple_viaf(cls, verbose=False):
-        """Get agent pids with multiple MEF records.
+        """Get agent pids with multiple VIAF records.
+
+        Duplicates are found with composite aggregations. If the aggregations
+        fail, all VIAF documents are scanned.
+
+        :param verbose: Verbose.
+        :returns: pids.
+        """
+        multiple_pids = {}
+        try:
+            for source in AgentViafRecord(data={}).sources_used:
+                entity_pid_name = f"{source}_pid"
+                multiple_pids[entity_pid_name] = dict(
+                    get_duplicate_values(
+                        search=AgentViafSearch(),
+                        field=entity_pid_name,
+                        sort=[{"pid": {"order": "asc"}}],
+                    )
+                )
+        except TransportError as err:
+            current_app.logger.warning(
+                f"Multiple VIAF aggregation failed, scanning instead: {err}"
+            )
+            return cls._scan_pids_with_multiple_viaf(verbose=verbose)
+        return multiple_pids
+
+    @classmethod
+    def _scan_pids_with_multiple_viaf(cls, verbose=False):
+        """Get agent pids with multiple VIAF records by scanning all documents.
 
         :param verbose: Verbose.
         :returns: pids.
@@ -862,10 +1148,7 @@ class AgentViafRecord(EntityRecord):
         }
         cleaned_pids = deepcopy(multiple_pids)
         progress = progressbar(
-            items=AgentViafSearch()
-            .params(preserve_order=True)
-            .sort({"pid": {"order": "asc"}})
-            .scan(),
+            items=scan_index(AgentViafSearch(), fields=["pid", *multiple_pids]),
             length=AgentViafSearch().count(),
             verbose=verbose,
         )
@@ -879,7 +1162,7 @@ class AgentViafRecord(EntityRecord):
         for source, pids in multiple_pids.items():
             for pid, viaf_pids in pids.items():
                 if len(viaf_pids) > 1:
-                    cleaned_pids[source][pid] = viaf_pids
+                    cleaned_pids[source][pid] = sorted(viaf_pids)
         return cleaned_pids
 
 
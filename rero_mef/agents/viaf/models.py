@@ -6,6 +6,9 @@
 from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
+from sqlalchemy import func
+
+from rero_mef.models import MD5MetadataMixin
 
 
 class ViafIdentifier(RecordIdentifier):
@@ -21,7 +24,47 @@ class ViafIdentifier(RecordIdentifier):
     )
 
 
-class ViafMetadata(db.Model, RecordMetadataBase):
+class ViafMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "viaf_metadata"
+
+
+class ViafLink(db.Model):
+    """Link of an agent source record to the VIAF record clustering it.
+
+    Maintained on VIAF record create, commit and delete by ``LinksExtension``.
+    The primary key serves ``AgentViafRecord.get_viaf`` lookups by source pid.
+    """
+
+    __tablename__ = "viaf_link"
+
+    source_name = db.Column(db.String(16), primary_key=True)
+    source_pid = db.Column(db.String(255), primary_key=True)
+    viaf_pid = db.Column(db.String(255), primary_key=True)
+
+    __table_args__ = (db.Index("ix_viaf_link_viaf_pid", "viaf_pid"),)
+
+
+class ViafResponse(db.Model):
+    """Validators of the last VIAF response of a VIAF pid.
+
+    Conditional requests of the VIAF refresh use ``etag`` and
+    ``last_modified``. ``payload_hash`` detects unchanged payloads of servers
+    without validators. ``version`` is the RERO-MEF version that parsed the
+    payload. ``changed`` is the date of the last changed payload and
+    ``checked`` the date of the last response, see
+    :mod:`rero_mef.agents.viaf.responses`.
+    """
+
+    __tablename__ = "viaf_response"
+
+    pid = db.Column(db.String(255), primary_key=True)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    payload_hash = db.Column(db.String(32), nullable=True)
+    version = db.Column(db.String(32), nullable=True)
+    changed = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    checked = db.Column(db.DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (db.Index("ix_viaf_response_checked", "checked"),)
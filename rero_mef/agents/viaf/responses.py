@@ -0,0 +1,175 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Response cache of the VIAF refresh.
+
+The validators of the last VIAF response of a VIAF pid are stored in the
+``viaf_response`` table: ``ETag``, ``Last-Modified`` and a hash of the raw
+payload. The refresh sends conditional requests with them and skips the
+parsing and the record update when VIAF answers 304 or the payload hash did
+not change. The validators stored by another RERO-MEF version are ignored, so
+the payloads are parsed again after an upgrade of the transformations.
+"""
+
+import hashlib
+from datetime import timedelta
+
+import requests
+from flask import current_app
+from invenio_db import db
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+from rero_mef.version import __version__
+
+from .models import ViafResponse
+
+VALIDATORS = ("etag", "last_modified", "payload_hash")
+
+
+def payload_hash(content):
+    """Hash a raw VIAF payload.
+
+    :param content: Payload bytes.
+    :returns: Hexadecimal MD5 of the payload.
+    """
+    return hashlib.md5(content).hexdigest()
+
+
+def get_validators(pid):
+    """Get the stored validators of a VIAF pid.
+
+    :param pid: VIAF pid.
+    :returns: Dictionary of validators, empty for an unknown pid or validators
+        of another version.
+    """
+    query = ViafResponse.query.filter_by(pid=pid, version=__version__).with_entities(
+        *(getattr(ViafResponse, name) for name in VALIDATORS)
+    )
+    if row := query.first():
+        return row._asdict()
+    return {}
+
+
+def conditional_headers(validators):
+    """Get the conditional request headers of validators.
+
+    :param validators: Dictionary of validators.
+    :returns: Dictionary of headers.
+    """
+    headers = {}
+    if etag := validators.get("etag"):
+        headers["If-None-Match"] = etag
+    if last_modified := validators.get("last_modified"):
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def update_validators(validators, response):
+    """Update validators with a VIAF response.
+
+    :param validators: Dictionary of validators, updated in place.
+    :param response: 200 or 304 response of a conditional request.
+    :returns: True if the payload did not change.
+    """
+    if response.status_code == requests.codes.not_modified:
+        if etag := response.headers.get("ETag"):
+            validators["etag"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["last_modified"] = last_modified
+        return True
+    content_hash = payload_hash(response.content)
+    unchanged = content_hash == validators.get("payload_hash")
+    validators["etag"] = response.headers.get("ETag")
+    validators["last_modified"] = response.headers.get("Last-Modified")
+    validators["payload_hash"] = content_hash
+    return unchanged
+
+
+def store_validators(pid, validators):
+    """Store the validators of the last response of a VIAF pid.
+
+    The validators are written in their own transaction, the caller's session
+    is neither committed nor rolled back.
+
+    :param pid: VIAF pid.
+    :param validators: Dictionary of validators.
+    """
+    if not validators.get("payload_hash"):
+        return
+    values = {name: validators.get(name) for name in VALIDATORS}
+    query = postgresql.insert(ViafResponse).values(
+        pid=pid, version=__version__, **values
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[ViafResponse.pid],
+        set_={
+            **{name: query.excluded[name] for name in (*VALIDATORS, "version")},
+            "changed": case(
+                (
+                    ViafResponse.payload_hash.is_distinct_from(
+                        query.excluded.payload_hash
+                    ),
+                    func.now(),
+                ),
+                else_=ViafResponse.changed,
+            ),
+            "checked": func.now(),
+        },
+    )
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(query)
+    except SQLAlchemyError as err:
+        current_app.logger.warning(f"VIAF response store failed: {pid} {err}")
+
+
+def get_response(pid):
+    """Get the stored response of a VIAF pid.
+
+    :param pid: VIAF pid.
+    :returns: Dictionary of the stored columns or None.
+    """
+    if row := ViafResponse.query.filter_by(pid=pid).first():
+        return {
+            column.name: getattr(row, column.name)
+            for column in ViafResponse.__table__.columns
+        }
+    return None
+
+
+def get_stats():
+    """Get statistics of the stored responses.
+
+    :returns: Dictionary with the count and the oldest and newest dates.
+    """
+    count, oldest_checked, newest_checked, oldest_changed = db.session.execute(
+        select(
+            func.count(),
+            func.min(ViafResponse.checked),
+            func.max(ViafResponse.checked),
+            func.min(ViafResponse.changed),
+        ).select_from(ViafResponse)
+    ).one()
+    return {
+        "count": count,
+        "oldest_checked": oldest_checked,
+        "newest_checked": newest_checked,
+        "oldest_changed": oldest_changed,
+    }
+
+
+def prune_responses(days):
+    """Delete the responses not checked for some days.
+
+    :param days: Age in days of the responses to delete.
+    :returns: Number of deleted responses.
+    """
+    result = db.session.execute(
+        delete(ViafResponse).where(
+            ViafResponse.checked < func.now() - timedelta(days=days)
+        )
+    )
+    db.session.commit()
+    return result.rowcount
@@ -14,27 +14,58 @@ from invenio_records_rest.serializers.response import (
     search_responsify,
 )
 
-from ..mef.api import AgentMefSearch
+from ..mef.api import AgentMefRecord, AgentMefSearch
+
+
+def build_links(pid, viaf_pid, mef_pids):
+    """Build the links of a VIAF record.
+
+    :param pid: Persistent identifier instance.
+    :param viaf_pid: VIAF pid.
+    :param mef_pids: MEF pids linking the VIAF record.
+    :returns: Dictionary of links.
+    """
+    links = {}
+    for idx, mef_pid in enumerate(mef_pids):
+        url = "{scheme}://{host}/api/agents/mef/" + str(mef_pid)
+        if idx:
+            links[f"mef {idx}"] = url
+        else:
+            links["mef"] = url
+    viaf_url = current_app.config.get("RERO_MEF_VIAF_BASE_URL")
+    links["viaf.org"] = f"{viaf_url}/viaf/{viaf_pid!s}"
+    link_factory = default_links_factory_with_additional(links)
+    return link_factory(pid)
 
 
 def add_links(pid, record):
     """Add MEF link to VIAF."""
-    links = {}
     viaf_pid = record.get("pid")
+    mef_pids = []
     mef_pid_search = (
         AgentMefSearch().filter("term", viaf_pid=viaf_pid).source(["pid"]).scan()
     )
     with contextlib.suppress(Exception):
-        for idx, search in enumerate(mef_pid_search):
-            url = "{scheme}://{host}/api/agents/mef/" + str(search.pid)
-            if idx:
-                links[f"mef {idx}"] = url
-            else:
-                links["mef"] = url
-    viaf_url = current_app.config.get("RERO_MEF_VIAF_BASE_URL")
-    links["viaf.org"] = f"{viaf_url}/viaf/{viaf_pid!s}"
-    link_factory = default_links_factory_with_additional(links)
-    return link_factory(pid)
+        mef_pids = [search.pid for search in mef_pid_search]
+    return build_links(pid, viaf_pid, mef_pids)
+
+
+def search_links_factory(pids):
+    """Create a links factory for the hits of a search page.
+
+    The MEF pids of all hits are fetched from the ``mef_link`` table with one
+    query instead of one search per hit.
+
+    :param pids: Persistent identifiers of the hits.
+    :returns: Links factory.
+    """
+    mef_pids = AgentMefRecord.get_mef_pids_many("viaf", [pid.pid_value for pid in pids])
+
+    def links_factory(pid, **kwargs):
+        """Build the links of a hit from the fetched pids."""
+        return build_links(pid, pid.pid_value, mef_pids.get(pid.pid_value, []))
+
+    return links_factory
 
 
 # Nice to have direct working links in test server!
@@ -62,6 +93,29 @@ class ReroMefSerializer(JSONSerializer):
             pid=pid, record=record, links_factory=add_links, **kwargs
         )
 
+    def serialize_search(
+        self, pid_fetcher, search_result, links=None, item_links_factory=None, **kwargs
+    ):
+        """Serialize a search result with the links of all hits.
+
+        :param pid_fetcher: Persistent identifier fetcher.
+        :param search_result: Elasticsearch search result.
+        :param links: Dictionary of links to add to response.
+        :param item_links_factory: Factory function for record links, replaced
+            by :func:`search_links_factory`.
+        """
+        pids = [
+            pid_fetcher(hit["_id"], hit["_source"])
+            for hit in search_result["hits"]["hits"]
+        ]
+        return super().serialize_search(
+            pid_fetcher,
+            search_result,
+            links=links,
+            item_links_factory=search_links_factory(pids),
+            **kwargs,
+        )
+
 
 json_ = ReroMefSerializer(RecordSchemaJSONV1)
 """JSON v1 serializer."""
@@ -16,17 +16,47 @@ from sqlitedict import SqliteDict
 
 from ...api import Action
 from ...extensions import MD5Extension
-from ...utils import progressbar, set_timestamp
+from ...utils import progressbar, scan_index, set_timestamp
 from .api import (
     AgentViafRecord,
     AgentViafSearch,
     RetryableVIAFError,
     _get_redirect_pid_from_msg,
+    _is_not_modified_msg,
 )
 
 _md5 = MD5Extension()
 
 
+def _refresh_uptodate_viaf_record(
+    viaf_record, dbcommit=True, reindex=True, verbose=False, update_agents=False
+):
+    """Handle a VIAF record unchanged online.
+
+    :param viaf_record: Unchanged VIAF record.
+    :param dbcommit: Commit changes to DB.
+    :param reindex: Reindex record.
+    :param verbose: Print verbose messages.
+    :param update_agents: Update MEF and agent records (GND/IdRef).
+    """
+    if dbcommit:
+        # Touch _updated so this record moves to the back of the queue.
+        # Without this, unchanged records stay at the front and are re-fetched
+        # every cycle instead of cycling through all records.
+        viaf_record.commit()
+        viaf_record.dbcommit(reindex=reindex)
+
+    if update_agents:
+        # Force-sync agents even though VIAF data is unchanged — useful after
+        # a bug fix in agent processing without needing to modify VIAF records.
+        # update_viaf=True: also search VIAF online for displaced agents.
+        actions = viaf_record.create_mef_and_agents(
+            dbcommit=dbcommit, reindex=reindex, update_viaf=True
+        )
+        if verbose:
+            click.echo(f"  VIAF {viaf_record.pid}: agents force-updated {actions}")
+
+
 def _refresh_viaf_record(
     pid,
     dbcommit=True,
@@ -34,6 +64,7 @@ def _refresh_viaf_record(
     verbose=False,
     delete_if_not_found=False,
     update_agents=False,
+    online=None,
 ):
     """Fetch a VIAF record online and update if changed.
 
@@ -43,15 +74,37 @@ def _refresh_viaf_record(
     :param verbose: Print verbose messages.
     :param delete_if_not_found: Delete old record if redirect target not found.
     :param update_agents: Update MEF and agent records (GND/IdRef) after VIAF update.
+    :param online: Prefetched ``(data, msg, error)`` of the VIAF record, None to
+        fetch it. An unchanged payload only touches the local record.
     :returns: Action performed.
     """
-    try:
-        online_data, msg = AgentViafRecord.get_online_record(
-            viaf_source_code="VIAF", pid=pid
-        )
-    except RetryableVIAFError as err:
+    if online is not None and _is_not_modified_msg(online[1]):
+        if viaf_record := AgentViafRecord.get_record_by_pid(pid):
+            if verbose:
+                click.echo(online[1])
+                click.echo(f"  VIAF {pid}: {Action.UPTODATE.value}")
+            _refresh_uptodate_viaf_record(
+                viaf_record,
+                dbcommit=dbcommit,
+                reindex=reindex,
+                verbose=verbose,
+                update_agents=update_agents,
+            )
+            return Action.UPTODATE
+        # the local record is missing: fetch the whole cluster
+        online = None
+    if online is None:
+        try:
+            online_data, msg = AgentViafRecord.get_online_record(
+                viaf_source_code="VIAF", pid=pid
+            )
+            online = online_data, msg, None
+        except RetryableVIAFError as err:
+            online = None, str(err), err
+    online_data, msg, error = online
+    if error:
         if verbose:
-            click.echo(str(err))
+            click.echo(msg)
             click.echo(f"  VIAF {pid}: {Action.ERROR.value}")
         return Action.ERROR
     if verbose:
@@ -105,22 +158,14 @@ def _refresh_viaf_record(
     if action in (Action.CREATE, Action.UPDATE, Action.REPLACE):
         viaf_record.create_mef_and_agents(dbcommit=dbcommit, reindex=reindex)
 
-    if action == Action.UPTODATE and dbcommit:
-        # Touch _updated so this record moves to the back of the queue.
-        # Without this, unchanged records stay at the front and are re-fetched
-        # every cycle instead of cycling through all records.
-        viaf_record.commit()
-        viaf_record.dbcommit(reindex=reindex)
-
-    if update_agents and action == Action.UPTODATE:
-        # Force-sync agents even though VIAF data is unchanged — useful after
-        # a bug fix in agent processing without needing to modify VIAF records.
-        # update_viaf=True: also search VIAF online for displaced agents.
-        actions = viaf_record.create_mef_and_agents(
-            dbcommit=dbcommit, reindex=reindex, update_viaf=True
+    if action == Action.UPTODATE:
+        _refresh_uptodate_viaf_record(
+            viaf_record,
+            dbcommit=dbcommit,
+            reindex=reindex,
+            verbose=verbose,
+            update_agents=update_agents,
         )
-        if verbose:
-            click.echo(f"  VIAF {pid}: agents force-updated {actions}")
 
     return action
 
@@ -134,12 +179,13 @@ def process_viaf_refresh(
     progress=False,
     delete_if_not_found=False,
     update_agents=False,
+    workers=None,
 ):
     """Refresh of oldest VIAF records.
 
     Processes a batch of VIAF records ordered by _updated (oldest first).
-    Designed to be run daily to gradually refresh all records over a
-    configurable cycle (default ~6 months).
+    Designed to be run daily to gradually refresh all records. The length of
+    the cycle depends on ``RERO_MEF_VIAF_REQUESTS_PER_SECOND``.
 
     :param batch_size: Number of records per batch (None=get all).
     :param dbcommit: Commit changes to DB.
@@ -148,6 +194,8 @@ def process_viaf_refresh(
     :param progress: Display progress bar.
     :param delete_if_not_found: Delete old record if redirect target not found.
     :param update_agents: Update MEF and agent records (GND/IdRef) after VIAF update.
+    :param workers: Number of concurrent VIAF requests, default
+        ``RERO_MEF_VIAF_WORKERS``.
     :returns: Tuple (count, action_counts).
     """
     action_counts = {}
@@ -162,15 +210,17 @@ def process_viaf_refresh(
         with SqliteDict(db_path, autocommit=True) as pid_dict:
             if not pid_dict:
                 # Query oldest-updated VIAF records, fetch only PIDs
-                query = (
-                    AgentViafSearch().sort({"_updated": {"order": "asc"}}).source("pid")
+                query = scan_index(
+                    AgentViafSearch(),
+                    fields=["pid"],
+                    sort=[{"_updated": {"order": "asc"}}],
                 )
                 # Estimate total for progress bar (if possible)
                 total = AgentViafRecord.count()
                 if batch_size is not None:
                     total = min(batch_size, total)
                 progress_bar = progressbar(
-                    items=query.scan(),
+                    items=query,
                     length=total,
                     verbose=progress,
                     label="VIAF PID collect",
@@ -181,14 +231,19 @@ def process_viaf_refresh(
                     pid_dict[hit.pid] = 1
 
             # Process all PIDs in the dict (they are only the ones needed for this batch)
+            # The records are fetched concurrently and written in this thread.
             progress_bar = progressbar(
-                items=pid_dict,
+                items=AgentViafRecord.get_online_records(
+                    keys=(("VIAF", pid) for pid in pid_dict),
+                    workers=workers,
+                    conditional=True,
+                ),
                 length=len(pid_dict),
                 verbose=progress,
                 label="VIAF refresh",
             )
             count = 0
-            for pid in progress_bar:
+            for _, pid, *online in progress_bar:
                 action = _refresh_viaf_record(
                     pid=pid,
                     dbcommit=dbcommit,
@@ -196,6 +251,7 @@ def process_viaf_refresh(
                     verbose=verbose,
                     delete_if_not_found=delete_if_not_found,
                     update_agents=update_agents,
+                    online=online,
                 )
                 action_counts.setdefault(action, 0)
                 action_counts[action] += 1
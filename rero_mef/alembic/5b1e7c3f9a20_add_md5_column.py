@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add indexed md5 column to metadata tables."""
+
+import json
+from logging import getLogger
+
+import sqlalchemy as sa
+from alembic import op
+
+from rero_mef.extensions import MD5Extension
+
+# revision identifiers, used by Alembic.
+revision = "5b1e7c3f9a20"
+down_revision = "d8536341fc5e"
+branch_labels = ()
+depends_on = None
+
+LOGGER = getLogger("alembic")
+
+BATCH_SIZE = 10000
+
+tables = [
+    "agent_gnd_metadata",
+    "agent_idref_metadata",
+    "agent_rero_metadata",
+    "mef_metadata",
+    "viaf_metadata",
+    "concept_gnd_metadata",
+    "concept_idref_metadata",
+    "concept_rero_metadata",
+    "concept_mef_metadata",
+    "place_gnd_metadata",
+    "place_idref_metadata",
+    "place_mef_metadata",
+]
+
+
+def backfill_md5(connection, table):
+    """Add the md5 to records stored without it, in batches.
+
+    The version of the changed records is bumped like a record commit does.
+    The indexed documents of these records are older than the database and
+    must be reindexed, for example with ``invenio utils reindex``.
+
+    :param connection: Alembic database connection.
+    :param table: Metadata table name.
+    :returns: Number of changed records.
+    """
+    md5_extension = MD5Extension()
+    select = sa.text(
+        f"SELECT id, json FROM {table}"
+        " WHERE json IS NOT NULL AND json ->> 'md5' IS NULL"
+        " AND id > :last_id ORDER BY id LIMIT :limit"
+    )
+    update = sa.text(
+        f"UPDATE {table} SET json = CAST(:json AS jsonb),"
+        " version_id = version_id + 1 WHERE id = :id"
+    )
+    last_id = "00000000-0000-0000-0000-000000000000"
+    count = 0
+    while rows := connection.execute(
+        select, {"last_id": last_id, "limit": BATCH_SIZE}
+    ).fetchall():
+        connection.execute(
+            update,
+            [
+                {"id": id_, "json": json.dumps(md5_extension.add_md5(dict(data)))}
+                for id_, data in rows
+            ],
+        )
+        count += len(rows)
+        last_id = rows[-1][0]
+    LOGGER.info(f"Backfilled md5 {table}: {count}")
+    return count
+
+
+def upgrade():
+    """Upgrade database.
+
+    Backfill missing md5 values and expose them as a generated, indexed column.
+    Tables with backfilled records must be reindexed after the upgrade.
+    """
+    connection = op.get_bind()
+    for table in tables:
+        if backfill_md5(connection, table):
+            LOGGER.warning(f"Records of {table} changed: reindex them")
+        op.add_column(
+            table,
+            sa.Column(
+                "md5",
+                sa.String(32),
+                sa.Computed("json ->> 'md5'", persisted=True),
+                nullable=True,
+            ),
+        )
+        op.create_index(f"ix_{table}_id_md5", table, ["id", "md5"])
+        LOGGER.info(f"Added md5 column {table}")
+
+
+def downgrade():
+    """Downgrade database."""
+    for table in tables:
+        op.drop_index(f"ix_{table}_id_md5", table_name=table)
+        op.drop_column(table, "md5")
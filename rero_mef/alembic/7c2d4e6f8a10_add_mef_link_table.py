@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add source to MEF link table."""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c2d4e6f8a10"
+down_revision = "5b1e7c3f9a20"
+branch_labels = ()
+depends_on = None
+
+LOGGER = getLogger("alembic")
+
+mef_tables = {
+    "mef_metadata": ("AGENTS", ["idref", "gnd", "rero"]),
+    "concept_mef_metadata": ("CONCEPTS", ["idref", "rero", "gnd"]),
+    "place_mef_metadata": ("PLACES", ["idref", "gnd"]),
+}
+
+
+def backfill_links(connection, table, mef_type, sources):
+    """Insert the source links stored in the MEF records of a table.
+
+    :param connection: Alembic database connection.
+    :param table: MEF metadata table name.
+    :param mef_type: MEF type of the table records.
+    :param sources: Source names linked with ``$ref``.
+    """
+    selects = [
+        f"SELECT :mef_type, '{source}',"
+        f" regexp_replace(json #>> '{{{source},$ref}}', '^.*/', ''),"
+        f" json ->> 'pid' FROM {table} WHERE json #>> '{{{source},$ref}}' IS NOT NULL"
+        for source in sources
+    ]
+    selects.append(
+        f"SELECT :mef_type, 'viaf', json ->> 'viaf_pid', json ->> 'pid'"
+        f" FROM {table} WHERE json ->> 'viaf_pid' IS NOT NULL"
+    )
+    result = connection.execute(
+        sa.text(
+            "INSERT INTO mef_link (mef_type, source_name, source_pid, mef_pid) "
+            + " UNION ALL ".join(selects)
+        ),
+        {"mef_type": mef_type},
+    )
+    LOGGER.info(f"Backfilled mef_link {table}: {result.rowcount}")
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "mef_link",
+        sa.Column("mef_type", sa.String(16), primary_key=True),
+        sa.Column("source_name", sa.String(16), primary_key=True),
+        sa.Column("source_pid", sa.String(255), primary_key=True),
+        sa.Column("mef_pid", sa.String(255), primary_key=True),
+    )
+    op.create_index("ix_mef_link_mef_pid", "mef_link", ["mef_type", "mef_pid"])
+    connection = op.get_bind()
+    for table, (mef_type, sources) in mef_tables.items():
+        backfill_links(connection, table, mef_type, sources)
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_mef_link_mef_pid", table_name="mef_link")
+    op.drop_table("mef_link")
@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add source to VIAF link table."""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9e4a1b3c5d70"
+down_revision = "7c2d4e6f8a10"
+branch_labels = ()
+depends_on = None
+
+LOGGER = getLogger("alembic")
+
+sources = ["idref", "gnd", "rero"]
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "viaf_link",
+        sa.Column("source_name", sa.String(16), primary_key=True),
+        sa.Column("source_pid", sa.String(255), primary_key=True),
+        sa.Column("viaf_pid", sa.String(255), primary_key=True),
+    )
+    op.create_index("ix_viaf_link_viaf_pid", "viaf_link", ["viaf_pid"])
+    selects = [
+        f"SELECT '{source}', json ->> '{source}_pid', json ->> 'pid'"
+        f" FROM viaf_metadata WHERE json ->> '{source}_pid' IS NOT NULL"
+        for source in sources
+    ]
+    result = op.get_bind().execute(
+        sa.text(
+            "INSERT INTO viaf_link (source_name, source_pid, viaf_pid) "
+            + " UNION ALL ".join(selects)
+        )
+    )
+    LOGGER.info(f"Backfilled viaf_link: {result.rowcount}")
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_viaf_link_viaf_pid", table_name="viaf_link")
+    op.drop_table("viaf_link")
@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add negative lookup cache table."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a7d9f1b3c5e6"
+down_revision = "f6c8e0a2b4d5"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "negative_lookup",
+        sa.Column("service", sa.String(16), primary_key=True),
+        sa.Column("source_code", sa.String(16), primary_key=True),
+        sa.Column("pid", sa.String(255), primary_key=True),
+        sa.Column("result", sa.String(16), nullable=False),
+        sa.Column("failures", sa.Integer(), nullable=False),
+        sa.Column("checked", sa.DateTime(), nullable=False),
+        sa.Column("retry_after", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_negative_lookup_retry_after",
+        "negative_lookup",
+        ["service", "retry_after"],
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_negative_lookup_retry_after", table_name="negative_lookup")
+    op.drop_table("negative_lookup")
@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add resolved MEF document table."""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b3f5a7c9d1e2"
+down_revision = "9e4a1b3c5d70"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "mef_resolved",
+        sa.Column("mef_type", sa.String(16), primary_key=True),
+        sa.Column("mef_pid", sa.String(255), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column(
+            "json",
+            sa.JSON().with_variant(postgresql.JSONB(none_as_null=True), "postgresql"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table("mef_resolved")
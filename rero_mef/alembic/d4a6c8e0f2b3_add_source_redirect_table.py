@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add source redirect table."""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from alembic import op
+
+from rero_mef.redirects import record_edges, redirect_rows
+
+# revision identifiers, used by Alembic.
+revision = "d4a6c8e0f2b3"
+down_revision = "b3f5a7c9d1e2"
+branch_labels = ()
+depends_on = None
+
+LOGGER = getLogger("alembic")
+
+source_tables = {
+    "agent_gnd_metadata": "aggnd",
+    "agent_idref_metadata": "aidref",
+    "agent_rero_metadata": "agrero",
+    "concept_gnd_metadata": "cognd",
+    "concept_idref_metadata": "cidref",
+    "concept_rero_metadata": "corero",
+    "place_gnd_metadata": "plgnd",
+    "place_idref_metadata": "pidref",
+}
+
+
+def backfill_redirects(connection, table, pid_type):
+    """Insert the redirects stored in the source records of a table.
+
+    :param connection: Alembic database connection.
+    :param table: Source metadata table name.
+    :param pid_type: Pid type of the table records.
+    """
+    edges = set()
+    for pid, relation_pid in connection.execute(
+        sa.text(
+            f"SELECT json ->> 'pid', json -> 'relation_pid' FROM {table}"
+            " WHERE json -> 'relation_pid' IS NOT NULL"
+        )
+    ):
+        edges |= record_edges(pid, relation_pid)
+    if rows := redirect_rows(pid_type, edges):
+        connection.execute(
+            sa.text(
+                "INSERT INTO source_redirect"
+                " (pid_type, pid, relation_type, redirect_to, final_target)"
+                " VALUES (:pid_type, :pid, :relation_type, :redirect_to,"
+                " :final_target)"
+            ),
+            rows,
+        )
+    LOGGER.info(f"Backfilled source_redirect {table}: {len(rows)}")
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "source_redirect",
+        sa.Column("pid_type", sa.String(16), primary_key=True),
+        sa.Column("pid", sa.String(255), primary_key=True),
+        sa.Column("relation_type", sa.String(16), primary_key=True),
+        sa.Column("redirect_to", sa.String(255), primary_key=True),
+        sa.Column("final_target", sa.String(255), nullable=True),
+    )
+    op.create_index(
+        "ix_source_redirect_redirect_to",
+        "source_redirect",
+        ["pid_type", "redirect_to"],
+    )
+    connection = op.get_bind()
+    for table, pid_type in source_tables.items():
+        backfill_redirects(connection, table, pid_type)
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_source_redirect_redirect_to", table_name="source_redirect")
+    op.drop_table("source_redirect")
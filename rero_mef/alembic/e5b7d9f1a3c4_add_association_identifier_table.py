@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add concept and place association identifier table."""
+
+from logging import getLogger
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5b7d9f1a3c4"
+down_revision = "d4a6c8e0f2b3"
+branch_labels = ()
+depends_on = None
+
+LOGGER = getLogger("alembic")
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "association_identifier",
+        sa.Column("entity_group", sa.String(16), primary_key=True),
+        sa.Column("source_name", sa.String(16), primary_key=True),
+        sa.Column("association_identifier", sa.String(255), primary_key=True),
+        sa.Column("pid", sa.String(255), primary_key=True),
+        sa.Column("exact_match", sa.Boolean(), nullable=False),
+    )
+    op.create_index(
+        "ix_association_identifier_pid",
+        "association_identifier",
+        ["entity_group", "source_name", "pid"],
+    )
+    # the identifiers depend on the record classes and configuration,
+    # associations are looked up in the index until the table is filled
+    LOGGER.warning(
+        "Fill association_identifier with: invenio utils backfill_links"
+        " -t cidref -t cognd -t pidref -t plgnd"
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_association_identifier_pid", table_name="association_identifier")
+    op.drop_table("association_identifier")
@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Add VIAF response cache table."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f6c8e0a2b4d5"
+down_revision = "e5b7d9f1a3c4"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "viaf_response",
+        sa.Column("pid", sa.String(255), primary_key=True),
+        sa.Column("etag", sa.String(255), nullable=True),
+        sa.Column("last_modified", sa.String(64), nullable=True),
+        sa.Column("payload_hash", sa.String(32), nullable=True),
+        sa.Column("version", sa.String(32), nullable=True),
+        sa.Column(
+            "changed", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column(
+            "checked", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_index("ix_viaf_response_checked", "viaf_response", ["checked"])
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_index("ix_viaf_response_checked", table_name="viaf_response")
+    op.drop_table("viaf_response")
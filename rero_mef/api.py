@@ -2,8 +2,12 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 """API for manipulating records."""
 
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from enum import Enum
+from itertools import batched
 from time import sleep
 from uuid import uuid4
 
@@ -16,20 +20,28 @@ from invenio_indexer.api import RecordIndexer
 from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_records.api import Record
-from invenio_records_rest.utils import obj_or_import_string
-from invenio_search import current_search
 from invenio_search.engine import search
 from kombu.compat import Consumer
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm.exc import NoResultFound
 
 from rero_mef.extensions import (
     DeletedStateExtension,
+    LinksExtension,
     MD5Extension,
+    RedirectsExtension,
+    ResolvedStoreExtension,
     SchemaExtension,
 )
-from rero_mef.utils import build_ref_string, get_entity_class
+from rero_mef.identity_map import current_identity_map
+from rero_mef.models import AssociationIdentifier
+from rero_mef.refresh import current_refresh
+from rero_mef.utils import (
+    build_ref_string,
+    get_entity_class,
+    get_entity_indexer_class,
+)
 
 _md5 = MD5Extension()
 
@@ -117,20 +129,29 @@ class EntityRecord(Record):
     provider = None
     object_type = "rec"
     name = None
+    #: Fields kept from the stored record when missing in the incoming data.
+    copy_fields = [
+        "pid",
+        "$schema",
+        "identifiedBy",
+        "authorized_access_point",
+        "type",
+        "relation_pid",
+        "deleted",
+    ]
 
     _extensions = [
         SchemaExtension(),
         DeletedStateExtension(),
         MD5Extension(),
+        ResolvedStoreExtension(),
+        RedirectsExtension(),
     ]
 
     @classmethod
     def flush_indexes(cls):
-        """Update indexes."""
-        try:
-            current_search.flush_and_refresh(cls.search.Meta.index)
-        except Exception as err:
-            current_app.logger.error(f"ERROR flush and refresh: {err}")
+        """Request a refresh of the index from the refresh coordinator."""
+        current_refresh.refresh(cls.search.Meta.index)
 
     @classmethod
     def create(
@@ -194,16 +215,9 @@ class EntityRecord(Record):
         if agent_record := cls.get_record_by_pid(pid):
             # Preserve critical fields from the existing record if they're missing in new data
             # to prevent accidental data loss during updates
-            copy_fields = [
-                "pid",
-                "$schema",
-                "identifiedBy",
-                "authorized_access_point",
-                "type",
-                "relation_pid",
-                "deleted",
-            ]
-            original_data = {k: v for k, v in agent_record.items() if k in copy_fields}
+            original_data = {
+                k: v for k, v in agent_record.items() if k in cls.copy_fields
+            }
             data = original_data | data
             if test_md5:
                 incoming_md5 = _md5.create_md5(
@@ -239,6 +253,126 @@ class EntityRecord(Record):
             cls.flush_indexes()
         return return_record, action
 
+    @classmethod
+    def create_or_update_many(
+        cls, records, dbcommit=False, reindex=False, test_md5=False, batch_size=None
+    ):
+        """Create or update records in chunks with one transaction per chunk.
+
+        The stored MD5 and preserved fields of all PIDs of a chunk are fetched with
+        one query, so unchanged records are skipped without loading them. New
+        records are inserted and changed records replaced before a single commit.
+        Every record is written in a savepoint, so a failed record does not
+        abort its chunk.
+
+        :param records: Iterable of record data dictionaries with a 'pid' field.
+        :param dbcommit: If True, commit each chunk to the database.
+        :param reindex: If True and dbcommit is True, index the written records.
+        :param test_md5: If True, only update records whose MD5 checksum changed.
+        :param batch_size: Records per chunk, defaults to ``RERO_MEF_DB_WRITE_BATCH_SIZE``.
+        :returns: Dictionary pid -> (record, action) in input order. The record is
+            None for up to date and failed records, which are not loaded.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_WRITE_BATCH_SIZE", 500
+        )
+        results = {}
+        for chunk in batched(records, batch_size):
+            results |= cls._create_or_update_chunk(
+                chunk, dbcommit=dbcommit, reindex=reindex, test_md5=test_md5
+            )
+        if reindex:
+            cls.flush_indexes()
+        return results
+
+    @classmethod
+    def _get_stored_fields(cls, pids):
+        """Get the stored MD5 and preserved fields for PIDs with one query.
+
+        :param pids: List of PID values.
+        :returns: Dictionary pid -> dict of stored fields, None for deleted records.
+        """
+        fields = ["md5", *cls.copy_fields]
+        query = (
+            cls._records_query(with_deleted=True)
+            .with_entities(
+                PersistentIdentifier.pid_value,
+                cls.model_cls.json.isnot(None),
+                cls.model_cls.md5,
+                *[cls.model_cls.json[field] for field in cls.copy_fields],
+            )
+            .filter(PersistentIdentifier.pid_value.in_(pids))
+        )
+        return {
+            pid: dict(zip(fields, values, strict=True)) if exists else None
+            for pid, exists, *values in query
+        }
+
+    @classmethod
+    def _create_or_update_chunk(cls, chunk, dbcommit, reindex, test_md5):
+        """Create or update one chunk of records.
+
+        :param chunk: Sequence of record data dictionaries.
+        :param dbcommit: If True, commit the chunk to the database.
+        :param reindex: If True and dbcommit is True, index the written records.
+        :param test_md5: If True, only update records whose MD5 checksum changed.
+        :returns: Dictionary pid -> (record, action).
+        """
+        chunk = {data.get("pid"): data for data in chunk}
+        stored = cls._get_stored_fields(list(chunk))
+        results = {}
+        to_replace = {}
+        for pid, data in chunk.items():
+            if pid not in stored:
+                try:
+                    # a failed record only rolls back its savepoint
+                    with db.session.begin_nested():
+                        record = cls.create(data=data, delete_pid=False)
+                    results[pid] = (record, Action.CREATE)
+                except Exception:
+                    current_app.logger.exception(
+                        f"ERROR create_or_update {cls.name} {pid}"
+                    )
+                    results[pid] = (None, Action.ERROR)
+            elif (original := stored[pid]) is None:
+                current_app.logger.error(
+                    f"ERROR create_or_update {cls.name} {pid} record deleted"
+                )
+                results[pid] = (None, Action.ERROR)
+            else:
+                data = {
+                    k: v for k, v in original.items() if k != "md5" and v is not None
+                } | data
+                incoming_md5 = _md5.create_md5(
+                    {k: v for k, v in data.items() if k not in ("$schema", "md5")}
+                )
+                if test_md5 and incoming_md5 == original["md5"]:
+                    results[pid] = (None, Action.UPTODATE)
+                else:
+                    to_replace[pid] = data
+                    results[pid] = None
+        for pid, record in cls.iter_records_by_pids(list(to_replace)):
+            if record is None:
+                current_app.logger.error(
+                    f"ERROR create_or_update {cls.name} {pid} record not found"
+                )
+                results[pid] = (None, Action.ERROR)
+                continue
+            try:
+                with db.session.begin_nested():
+                    record = record.replace(data=to_replace[pid], commit=True)
+                results[pid] = (record, Action.REPLACE)
+            except Exception:
+                current_app.logger.exception(f"ERROR create_or_update {cls.name} {pid}")
+                results[pid] = (None, Action.ERROR)
+        if dbcommit:
+            db.session.commit()
+            if reindex:
+                for record, action in results.values():
+                    if action in (Action.CREATE, Action.REPLACE):
+                        record.reindex()
+        return results
+
     def delete(self, force=True, dbcommit=False, delindex=False):
         """Delete record and its persistent identifier.
 
@@ -247,6 +381,7 @@ class EntityRecord(Record):
         :param delindex: If True, remove the record from search index.
         :returns: The deleted record instance.
         """
+        self._invalidate_identity_map()
         persistent_identifier = self.get_persistent_identifier(self.id)
         persistent_identifier.delete()
         if force:
@@ -268,6 +403,7 @@ class EntityRecord(Record):
         :param reindex: reindex the record.
         :returns: the modified record
         """
+        self._invalidate_identity_map()
         super().update(data)
         if commit or dbcommit:
             self.commit()
@@ -275,6 +411,11 @@ class EntityRecord(Record):
             self.dbcommit(reindex)
         return self
 
+    def _invalidate_identity_map(self):
+        """Drop this record from the active identity map."""
+        if (record_map := current_identity_map()) is not None and self.provider:
+            record_map.invalidate(self.provider.pid_type, self.pid)
+
     def replace(self, data, commit=False, dbcommit=False, reindex=False):
         """Replace all record data with new data.
 
@@ -292,6 +433,7 @@ class EntityRecord(Record):
         pid = new_data.get("pid")
         if not pid:
             raise EntityRecordError.PidMissing(f"missing pid={self.pid}")
+        self._invalidate_identity_map()
         self.clear()
         return self.update(
             data=new_data, commit=commit, dbcommit=dbcommit, reindex=reindex
@@ -314,9 +456,10 @@ class EntityRecord(Record):
         :returns: Result of the indexing operation.
         """
         indexer = self.get_indexer_class()
+        arguments = current_refresh.index_arguments(self.search.Meta.index)
         if forceindex:
-            return indexer(version_type="external_gte").index(self)
-        return indexer().index(self)
+            return indexer(version_type="external_gte").index(self, arguments)
+        return indexer().index(self, arguments)
 
     @classmethod
     def get_record_by_pid(cls, pid, with_deleted=False):
@@ -329,14 +472,22 @@ class EntityRecord(Record):
         :returns: The record instance if found, None otherwise.
         """
         assert cls.provider
+        record_map = None if with_deleted else current_identity_map()
+        if record_map is not None:
+            record = record_map.get(cls.provider.pid_type, pid)
+            if record is not None:
+                return record
         for attempt in range(5):
             try:
                 persistent_identifier = PersistentIdentifier.get(
                     cls.provider.pid_type, pid
                 )
-                return super().get_record(
+                record = super().get_record(
                     persistent_identifier.object_uuid, with_deleted=with_deleted
                 )
+                if record_map is not None:
+                    record_map.add(cls.provider.pid_type, pid, record)
+                return record
             except PIDDoesNotExistError:
                 return None
             except NoResultFound:
@@ -350,6 +501,139 @@ class EntityRecord(Record):
         current_app.logger.error(f"Get record failed after 5 retries: {pid}")
         return None
 
+    @classmethod
+    def _records_query(cls, with_deleted=False):
+        """Build a query joining pidstore and metadata rows of this class.
+
+        :param with_deleted: If True, include deleted records.
+        :returns: SQLAlchemy query yielding ``(pid_value, metadata)`` rows.
+        """
+        query = (
+            db.session.query(PersistentIdentifier.pid_value, cls.model_cls)
+            .join(cls.model_cls, cls.model_cls.id == PersistentIdentifier.object_uuid)
+            .filter(
+                PersistentIdentifier.pid_type == cls.provider.pid_type,
+                PersistentIdentifier.object_type == cls.object_type,
+            )
+        )
+        if not with_deleted:
+            query = query.filter(cls.model_cls.json.isnot(None))
+        return query
+
+    @classmethod
+    def iter_records_by_pids(cls, pids, with_deleted=False, batch_size=None):
+        """Resolve a stream of PIDs to records with one SQL query per chunk.
+
+        :param pids: Iterable of PID values.
+        :param with_deleted: If True, include deleted records.
+        :param batch_size: PIDs resolved per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :yields: Tuples ``(pid, record)`` in input order, record is None if not found.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_BATCH_SIZE", 1000
+        )
+        for chunk in batched(pids, batch_size):
+            query = cls._records_query(with_deleted=with_deleted).filter(
+                PersistentIdentifier.pid_value.in_(set(chunk))
+            )
+            with db.session.no_autoflush:
+                records = {pid: cls(obj.data, model=obj) for pid, obj in query}
+            for pid in chunk:
+                yield pid, records.get(pid)
+
+    @classmethod
+    def get_records_by_pids(cls, pids, with_deleted=False, batch_size=None):
+        """Resolve a list of PIDs to records with one SQL query per chunk.
+
+        :param pids: Iterable of PID values.
+        :param with_deleted: If True, include deleted records.
+        :param batch_size: PIDs resolved per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :returns: Tuple (records, missing_pids), both in input order.
+        """
+        records = []
+        missing_pids = []
+        for pid, record in cls.iter_records_by_pids(
+            pids, with_deleted=with_deleted, batch_size=batch_size
+        ):
+            if record is None:
+                missing_pids.append(pid)
+            else:
+                records.append(record)
+        return records, missing_pids
+
+    @classmethod
+    def get_md5s(cls, pids, batch_size=None):
+        """Get the stored MD5 checksums of PIDs without loading the records.
+
+        Reads the indexed ``md5`` column of the metadata table.
+
+        :param pids: Iterable of PID values.
+        :param batch_size: PIDs resolved per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :returns: Dictionary pid -> md5 for the existing, not deleted, PIDs.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_BATCH_SIZE", 1000
+        )
+        md5s = {}
+        for chunk in batched(pids, batch_size):
+            query = (
+                cls._records_query()
+                .with_entities(PersistentIdentifier.pid_value, cls.model_cls.md5)
+                .filter(PersistentIdentifier.pid_value.in_(set(chunk)))
+            )
+            md5s |= dict(query)
+        return md5s
+
+    @classmethod
+    def get_deleted_states(cls, pids, batch_size=None):
+        """Get the ``deleted`` field of PIDs without loading the records.
+
+        :param pids: Iterable of PID values.
+        :param batch_size: PIDs resolved per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :returns: Dictionary pid -> deleted value for the existing, not deleted,
+            PIDs having a ``deleted`` field.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_BATCH_SIZE", 1000
+        )
+        deleted = cls.model_cls.json["deleted"]
+        deleted_states = {}
+        for chunk in batched(pids, batch_size):
+            query = (
+                cls._records_query()
+                .with_entities(PersistentIdentifier.pid_value, deleted)
+                .filter(
+                    PersistentIdentifier.pid_value.in_(set(chunk)),
+                    deleted.isnot(None),
+                )
+            )
+            deleted_states |= dict(query)
+        return deleted_states
+
+    @classmethod
+    def iter_records_by_ids(cls, ids, with_deleted=False, batch_size=None):
+        """Resolve a stream of record UUIDs with one SQL query per chunk.
+
+        :param ids: Iterable of record UUIDs.
+        :param with_deleted: If True, include deleted records.
+        :param batch_size: UUIDs resolved per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :yields: Records in input order, missing UUIDs are skipped.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_BATCH_SIZE", 1000
+        )
+        for chunk in batched(ids, batch_size):
+            query = cls.model_cls.query.filter(
+                cls.model_cls.id.in_({str(id_) for id_ in chunk})
+            )
+            if not with_deleted:
+                query = query.filter(cls.model_cls.json.isnot(None))
+            with db.session.no_autoflush:
+                records = {str(obj.id): cls(obj.data, model=obj) for obj in query}
+            for id_ in chunk:
+                if (record := records.get(str(id_))) is not None:
+                    yield record
+
     @classmethod
     def get_pid_by_id(cls, id_):
         """Get the PID value from a record UUID.
@@ -384,27 +668,51 @@ class EntityRecord(Record):
             query = query.filter_by(status=PIDStatus.REGISTERED)
         if date:
             query = query.filter(PersistentIdentifier.created < date)
-        # Stable ordering is required so that LIMIT/OFFSET pagination does not
-        # skip or repeat rows across batches when PostgreSQL changes its query plan.
-        return query.order_by(PersistentIdentifier.id)
+        return query
+
+    @classmethod
+    def _iter_keyset(cls, query, column, batch_size=None):
+        """Stream one column of a pidstore query using keyset pagination.
+
+        Every batch continues after the last seen ``pidstore_pid.id``
+        (``WHERE id > last_id ORDER BY id LIMIT n``) so that each page is an
+        index range scan and a full scan stays linear, unlike ``LIMIT/OFFSET``.
+
+        :param query: Query on ``PersistentIdentifier``.
+        :param column: Column of ``PersistentIdentifier`` to yield.
+        :param batch_size: Rows fetched per query, defaults to ``RERO_MEF_DB_BATCH_SIZE``.
+        :yields: Column values one at a time.
+        """
+        batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_BATCH_SIZE", 1000
+        )
+        query = query.with_entities(PersistentIdentifier.id, column).order_by(
+            PersistentIdentifier.id
+        )
+        last_id = 0
+        while batch := (
+            query.filter(PersistentIdentifier.id > last_id).limit(batch_size).all()
+        ):
+            last_id = batch[-1][0]
+            for _, value in batch:
+                yield value
 
     @classmethod
-    def get_all_pids(cls, with_deleted=False, batch_size=1000, date=None):
+    def get_all_pids(cls, with_deleted=False, batch_size=None, date=None):
         """Generate all record PIDs in batches.
 
         :param with_deleted: If True, include deleted records.
+        :param batch_size: Number of records to fetch per database query.
         :param date: If provided, only include records created before this date.
         :yields: PID values one at a time.
         """
         query = cls._get_all(with_deleted=with_deleted, date=date)
-        offset = 0
-        while batch := query.limit(batch_size).offset(offset).all():
-            for identifier in batch:
-                yield identifier.pid_value
-            offset += batch_size
+        yield from cls._iter_keyset(
+            query, PersistentIdentifier.pid_value, batch_size=batch_size
+        )
 
     @classmethod
-    def get_all_deleted_pids(cls, batch_size=1000, from_date=None):
+    def get_all_deleted_pids(cls, batch_size=None, from_date=None):
         """Generate PIDs of all deleted records in batches.
 
         :param batch_size: Number of records to fetch per database query.
@@ -416,15 +724,12 @@ class EntityRecord(Record):
         ).filter_by(status=PIDStatus.DELETED)
         if from_date:
             query = query.filter(func.DATE(PersistentIdentifier.updated) >= from_date)
-        query = query.order_by(PersistentIdentifier.id)
-        offset = 0
-        while batch := query.limit(batch_size).offset(offset).all():
-            for identifier in batch:
-                yield identifier.pid_value
-            offset += batch_size
+        yield from cls._iter_keyset(
+            query, PersistentIdentifier.pid_value, batch_size=batch_size
+        )
 
     @classmethod
-    def get_all_ids(cls, with_deleted=False, batch_size=1000, date=None):
+    def get_all_ids(cls, with_deleted=False, batch_size=None, date=None):
         """Generate all record UUIDs in batches.
 
         :param with_deleted: If True, include deleted records.
@@ -433,22 +738,23 @@ class EntityRecord(Record):
         :yields: Record UUIDs one at a time.
         """
         query = cls._get_all(with_deleted=with_deleted, date=date)
-        offset = 0
-        while batch := query.limit(batch_size).offset(offset).all():
-            for identifier in batch:
-                yield identifier.object_uuid
-            offset += batch_size
+        yield from cls._iter_keyset(
+            query, PersistentIdentifier.object_uuid, batch_size=batch_size
+        )
 
     @classmethod
-    def get_all_records(cls, with_deleted=False, batch_size=1000):
+    def get_all_records(cls, with_deleted=False, batch_size=None):
         """Generate all record instances in batches.
 
         :param with_deleted: If True, include deleted records.
         :param batch_size: Number of records to fetch per database query.
         :yields: Record instances one at a time.
         """
-        for id_ in cls.get_all_ids(with_deleted=with_deleted, batch_size=batch_size):
-            yield cls.get_record(id_)
+        yield from cls.iter_records_by_ids(
+            cls.get_all_ids(with_deleted=with_deleted, batch_size=batch_size),
+            with_deleted=with_deleted,
+            batch_size=batch_size,
+        )
 
     @classmethod
     def count(cls, with_deleted=False):
@@ -488,11 +794,8 @@ class EntityRecord(Record):
         :param ids: Iterable of record UUIDs to index.
         :returns: Number of records indexed.
         """
-        count = 0
-        for uuid in ids:
-            count += 1
-            RecordIndexer().index(cls.get_record(uuid))
-        return count
+        indexed, _ = cls.get_indexer_class()().direct_bulk_index(cls, ids)
+        return indexed
 
     @classmethod
     def get_indexer_class(cls):
@@ -502,17 +805,11 @@ class EntityRecord(Record):
 
         :returns: The indexer class to use for this record type.
         """
-        try:
-            indexer = obj_or_import_string(
-                current_app.config["RECORDS_REST_ENDPOINTS"][cls.provider.pid_type][
-                    "indexer_class"
-                ]
-            )
-        except Exception:
-            # provide default indexer if no indexer is defined in config.
-            indexer = EntityIndexer
-            current_app.logger.error(f"Get indexer class {cls.__name__}")
-        return indexer
+        if indexer := get_entity_indexer_class(cls.provider.pid_type):
+            return indexer
+        # provide default indexer if no indexer is defined in config.
+        current_app.logger.error(f"Get indexer class {cls.__name__}")
+        return EntityIndexer
 
     def delete_from_index(self):
         """Remove this record from the search engine index.
@@ -520,8 +817,9 @@ class EntityRecord(Record):
         Logs a warning if the record is not found in the index.
         """
         indexer = self.get_indexer_class()
+        arguments = current_refresh.index_arguments(self.search.Meta.index)
         try:
-            indexer().delete(self)
+            indexer().delete(self, **arguments)
         except NotFoundError:
             current_app.logger.warning(
                 f"Can not delete from index {self.__class__.__name__}: {self.pid}"
@@ -569,44 +867,195 @@ class ConceptPlaceRecord(EntityRecord):
     records. Handles linking of related records through association identifiers.
     """
 
-    def get_association_record(self, association_cls, association_search):
+    entity_group = None
+
+    _extensions = [*EntityRecord._extensions, LinksExtension()]
+
+    # Sources known to have rows in the ``association_identifier`` table.
+    _linked_sources = set()
+
+    @classmethod
+    def has_links(cls):
+        """Check if the source has rows in the ``association_identifier`` table.
+
+        :returns: True if the table has been filled for the source.
+        """
+        key = (cls.entity_group, cls.name)
+        if key not in ConceptPlaceRecord._linked_sources:
+            query = AssociationIdentifier.query.filter_by(
+                entity_group=cls.entity_group, source_name=cls.name
+            )
+            if not db.session.query(query.exists()).scalar():
+                return False
+            ConceptPlaceRecord._linked_sources.add(key)
+        return True
+
+    @classmethod
+    def search_association_pids(cls, association_identifier):
+        """Get the records with an association identifier from the index.
+
+        :param association_identifier: Association identifier.
+        :returns: List of ``(pid, exact_match)`` ordered by pid.
+        """
+        query = cls.search().filter(
+            "term", _association_identifier=association_identifier
+        )
+        return sorted(
+            (
+                hit.pid,
+                cls(hit.to_dict()).has_exact_match(association_identifier),
+            )
+            for hit in query.scan()
+        )
+
+    def get_association_pids(self, association_identifier, association_cls):
+        """Get the records sharing an association identifier.
+
+        One query on the ``association_identifier`` table returns the records of
+        this source and of the associated source. While the table has not been
+        filled for one of the sources (``utils backfill_links``), the index is
+        used instead.
+
+        :param association_identifier: Association identifier.
+        :param association_cls: The class of the associated record type.
+        :returns: Tuple (own, associated) of lists of ``(pid, exact_match)``.
+        """
+        if not (self.has_links() and association_cls.has_links()):
+            current_app.logger.warning(
+                f"ASSOCIATION TABLE EMPTY FOR: {self.name} {association_cls.name}"
+                " | run: invenio utils backfill_links"
+            )
+            return (
+                self.search_association_pids(association_identifier),
+                association_cls.search_association_pids(association_identifier),
+            )
+        query = AssociationIdentifier.query.filter(
+            AssociationIdentifier.entity_group == self.entity_group,
+            AssociationIdentifier.association_identifier == association_identifier,
+            AssociationIdentifier.source_name.in_([self.name, association_cls.name]),
+        ).with_entities(
+            AssociationIdentifier.source_name,
+            AssociationIdentifier.pid,
+            AssociationIdentifier.exact_match,
+        )
+        own = []
+        associated = []
+        for source_name, pid, exact_match in query.order_by(AssociationIdentifier.pid):
+            pids = own if source_name == self.name else associated
+            pids.append((pid, exact_match))
+        return own, associated
+
+    def get_association_record(self, association_cls):
         """Get the associated record linked via association identifier.
 
-        Searches for an associated record (concept or place) that shares the same association identifier. Validates
-        uniqueness and logs errors if multiple records are found.
+        Looks up the records sharing the same association identifier in the
+        ``association_identifier`` table. Validates uniqueness and logs errors if
+        multiple records are found.
 
         :param association_cls: The class of the associated record type.
-        :param association_search: The search class for finding associated records.
         :returns: The associated record if found and unique, None if not found or multiple found.
         """
         if association_identifier := self.association_identifier:
-            # Test if my identifier is unique
-            count = (
-                self.search()
-                .filter("term", _association_identifier=association_identifier)
-                .count()
+            own, associated = self.get_association_pids(
+                association_identifier, association_cls
             )
-            if count > 1:
+            # Test if my identifier is unique
+            if len(own) > 1:
                 current_app.logger.error(
                     f"MULTIPLE IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
                     f"| {association_identifier}"
                 )
                 return None
             # Get associated record
-            query = association_search().filter(
-                "term", _association_identifier=association_identifier
-            )
-            associated_count = query.count()
-            if associated_count > 1:
+            if len(associated) > 1:
                 current_app.logger.error(
                     f"MULTIPLE ASSOCIATIONS IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
                     f"| {association_identifier}"
                 )
-            elif associated_count == 1:
-                hit = next(query.source("pid").scan())
-                return association_cls.get_record_by_pid(hit.pid)
+            elif len(associated) == 1:
+                return association_cls.get_record_by_pid(associated[0][0])
         return None
 
+    def has_exact_match(self, association_identifier):
+        """Check if the record has an exact match of an association identifier.
+
+        :param association_identifier: Association identifier.
+        :returns: False, overridden by the sources with exact matches.
+        """
+        return False
+
+    @property
+    def association_link(self):
+        """Get the ``association_identifier`` row of the record.
+
+        :returns: Dictionary of the row values or None.
+        """
+        if not self.pid or self.get("deleted"):
+            return None
+        if not (association_identifier := self.association_identifier):
+            return None
+        return {
+            "entity_group": self.entity_group,
+            "source_name": self.name,
+            "association_identifier": association_identifier,
+            "pid": self.pid,
+            "exact_match": self.has_exact_match(association_identifier),
+        }
+
+    def _stored_association_links(self):
+        """Query the ``association_identifier`` rows of the record."""
+        return AssociationIdentifier.query.filter_by(
+            entity_group=self.entity_group, source_name=self.name, pid=self.pid
+        )
+
+    def sync_links(self):
+        """Write the association identifier to the ``association_identifier`` table."""
+        if not self.pid:
+            return
+        link = self.association_link
+        stored = [
+            {
+                "entity_group": row.entity_group,
+                "source_name": row.source_name,
+                "association_identifier": row.association_identifier,
+                "pid": row.pid,
+                "exact_match": row.exact_match,
+            }
+            for row in self._stored_association_links()
+        ]
+        if stored == ([link] if link else []):
+            return
+        self._stored_association_links().delete(synchronize_session=False)
+        if link:
+            db.session.add(AssociationIdentifier(**link))
+
+    def delete_links(self):
+        """Delete the association identifier of the record."""
+        if self.pid:
+            self._stored_association_links().delete(synchronize_session=False)
+
+    @classmethod
+    def backfill_links(cls):
+        """Rebuild the ``association_identifier`` rows of the source.
+
+        :returns: Number of rows written.
+        """
+        AssociationIdentifier.query.filter_by(
+            entity_group=cls.entity_group, source_name=cls.name
+        ).delete(synchronize_session=False)
+        batch_size = current_app.config.get("RERO_MEF_DB_BATCH_SIZE", 1000)
+        count = 0
+        for chunk in batched(cls._records_query().yield_per(batch_size), batch_size):
+            if links := [
+                link
+                for _, model in chunk
+                if (link := cls(model.json, model=model).association_link)
+            ]:
+                db.session.execute(insert(AssociationIdentifier), links)
+                count += len(links)
+        db.session.commit()
+        return count
+
     @property
     def association_identifier(self):
         """Get the association identifier for this record.
@@ -848,37 +1297,61 @@ class EntityIndexer(RecordIndexer):
         Processes messages from the queue, converting them into search engine bulk action dictionaries. Handles
         acknowledgment and rejection of messages based on processing success.
 
+        Messages are processed in windows of ``RERO_MEF_INDEXER_WINDOW_SIZE``: the
+        records of a window are loaded with one query per doc_type.
+
         :param message_iterator: Iterator yielding messages from the indexing queue.
         :yields: Search engine bulk action specifications.
         """
-        for message in message_iterator:
-            payload = message.decode()
+        window_size = current_app.config.get("RERO_MEF_INDEXER_WINDOW_SIZE", 500)
+        for window in batched(message_iterator, window_size):
+            payloads = [message.decode() for message in window]
+            records = self._load_records(payloads)
+            for message, payload in zip(window, payloads, strict=True):
+                try:
+                    if payload["op"] == "delete":
+                        yield self._delete_action(payload=payload)
+                    else:
+                        record = records.get((payload.get("doc_type"), payload["id"]))
+                        if record is None:
+                            raise NoResultFound(payload["id"])
+                        yield self._record_action(record)
+                    message.ack()
+                except NoResultFound:
+                    message.reject()
+                except Exception:
+                    message.reject()
+                    uid = payload.get("id", "???")
+                    current_app.logger.exception(f"Failed to index record {uid}")
+
+    def _load_records(self, payloads):
+        """Load the records of index payloads with one query per doc_type.
+
+        :param payloads: Decoded message bodies.
+        :returns: Dictionary (doc_type, id) -> record for the existing records.
+        """
+        ids_by_doc_type = {}
+        for payload in payloads:
+            if payload.get("op") != "delete":
+                ids_by_doc_type.setdefault(payload.get("doc_type"), set()).add(
+                    payload["id"]
+                )
+        records = {}
+        for doc_type, ids in ids_by_doc_type.items():
+            record_cls = get_entity_class(doc_type) if doc_type else self.record_cls
             try:
-                if payload["op"] == "delete":
-                    yield self._delete_action(payload=payload)
-                else:
-                    yield self._index_action(payload=payload)
-                message.ack()
-            except NoResultFound:
-                message.reject()
+                for record in record_cls.get_records(list(ids)):
+                    records[doc_type, str(record.id)] = record
             except Exception:
-                message.reject()
-                uid = payload.get("id", "???")
-                current_app.logger.error(f"Failed to index record {uid}", exc_info=True)
+                current_app.logger.exception(f"Failed to load records {doc_type}")
+        return records
 
-    def _index_action(self, payload):
-        """Create a bulk index action from a message payload.
+    def _record_action(self, record):
+        """Create a bulk index action for a loaded record.
 
-        Retrieves the record, prepares its data for indexing, and constructs the search engine action dictionary.
-
-        :param payload: Decoded message body containing record ID and operation details.
-        :returns: Search engine bulk 'index' action specification including
-        _id, _index, _source, and version information.
+        :param record: Record to index.
+        :returns: Search engine bulk 'index' action specification.
         """
-        if doc_type := payload.get("doc_type"):
-            record = get_entity_class(doc_type).get_record(payload["id"])
-        else:
-            record = self.record_cls.get_record(payload["id"])
         index = self.record_to_index(record)
 
         arguments = {}
@@ -895,6 +1368,123 @@ class EntityIndexer(RecordIndexer):
         }
         return action | arguments
 
+    def direct_bulk_index(
+        self,
+        record_cls,
+        record_id_iterator,
+        workers=None,
+        chunk_size=None,
+        max_chunk_bytes=None,
+        batch_size=None,
+        expunge=False,
+    ):
+        """Index records with parallel bulk requests, bypassing the message queue.
+
+        Records are batch loaded from the database and turned into actions through
+        ``_prepare_record`` in the calling thread, so the ``before_record_index``
+        signal handlers still run. Only the bulk requests are sent by the workers.
+
+        :param record_cls: Record class of the UUIDs to index.
+        :param record_id_iterator: Iterator yielding record UUIDs to index.
+        :param workers: Number of parallel bulk requests.
+        :param chunk_size: Maximum number of documents per bulk request.
+        :param max_chunk_bytes: Maximum size in bytes of a bulk request.
+        :param batch_size: Records loaded from the database per query.
+        :param expunge: If True, expunge the database session after each batch to
+            bound memory usage on full reindexes.
+        :returns: Tuple (indexed count, error count).
+        """
+        config = current_app.config
+        workers = workers or config.get("RERO_MEF_DIRECT_INDEX_WORKERS", 4)
+        chunk_size = chunk_size or config.get("RERO_MEF_DIRECT_INDEX_CHUNK_SIZE", 500)
+        max_chunk_bytes = max_chunk_bytes or config.get(
+            "RERO_MEF_DIRECT_INDEX_MAX_CHUNK_BYTES", 50 * 1024 * 1024
+        )
+        batch_size = batch_size or config.get("RERO_MEF_DB_BATCH_SIZE", 1000)
+        req_timeout = config["INDEXER_BULK_REQUEST_TIMEOUT"]
+        app = current_app._get_current_object()
+
+        def send(actions):
+            with app.app_context():
+                return bulk(
+                    self.client,
+                    actions,
+                    stats_only=True,
+                    raise_on_error=False,
+                    chunk_size=len(actions),
+                    max_chunk_bytes=max_chunk_bytes,
+                    request_timeout=req_timeout,
+                    expand_action_callback=search.helpers.expand_action,
+                )
+
+        indexed = errors = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk in self._direct_chunks(
+                record_cls,
+                record_id_iterator,
+                chunk_size,
+                max_chunk_bytes,
+                batch_size,
+                expunge,
+            ):
+                pending.append(executor.submit(send, chunk))
+                # bound the number of chunks held in memory
+                while len(pending) > workers:
+                    success, failed = pending.popleft().result()
+                    indexed += success
+                    errors += failed
+            for future in pending:
+                success, failed = future.result()
+                indexed += success
+                errors += failed
+        return indexed, errors
+
+    def _direct_chunks(
+        self,
+        record_cls,
+        record_id_iterator,
+        chunk_size,
+        max_chunk_bytes,
+        batch_size,
+        expunge,
+    ):
+        """Group index actions of batch loaded records into bulk chunks.
+
+        :param record_cls: Record class of the UUIDs to index.
+        :param record_id_iterator: Iterator yielding record UUIDs to index.
+        :param chunk_size: Maximum number of documents per chunk.
+        :param max_chunk_bytes: Maximum estimated size in bytes of a chunk.
+        :param batch_size: Records loaded from the database per query.
+        :param expunge: If True, expunge the database session after each batch.
+        :yields: Lists of bulk actions.
+        """
+        chunk = []
+        chunk_bytes = 0
+        for ids in batched(record_id_iterator, batch_size):
+            for record in record_cls.iter_records_by_ids(ids, batch_size=batch_size):
+                try:
+                    action = self._record_action(record)
+                except Exception:
+                    current_app.logger.error(
+                        f"Failed to index record {record.id}", exc_info=True
+                    )
+                    continue
+                size = len(json.dumps(action["_source"], default=str))
+                if chunk and (
+                    len(chunk) >= chunk_size or chunk_bytes + size > max_chunk_bytes
+                ):
+                    yield chunk
+                    chunk = []
+                    chunk_bytes = 0
+                chunk.append(action)
+                chunk_bytes += size
+            if expunge:
+                # release the loaded records of this batch
+                db.session.expunge_all()
+        if chunk:
+            yield chunk
+
     def _bulk_op(self, record_id_iterator, op_type, index=None, doc_type=None):
         """Send bulk operation messages to the indexing queue.
 
@@ -3,14 +3,55 @@
 
 """API for manipulating MEF records."""
 
-from datetime import UTC, datetime
+from copy import deepcopy
+from datetime import UTC, datetime, timedelta
 
 from dateutil import parser
+from elasticsearch.exceptions import TransportError
 from elasticsearch_dsl import Q
 from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+from sqlalchemy import (
+    and_,
+    delete,
+    except_,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
 
 from .api import Action, EntityRecord
-from .utils import generate, get_entity_class, get_entity_search_class, progressbar
+from .extensions import LinksExtension
+from .models import MefLink, MefResolved
+from .redirects import get_final_target
+from .registry import current_entity_registry
+from .utils import (
+    generate,
+    get_duplicate_values,
+    get_entity_class,
+    get_entity_search_class,
+    progressbar,
+    scan_index,
+)
+
+
+def _has_ref(data):
+    """Check if JSON data contains a ``$ref``.
+
+    :param data: JSON data.
+    :returns: True if a ``$ref`` key is found.
+    """
+    if isinstance(data, dict):
+        return "$ref" in data or any(_has_ref(value) for value in data.values())
+    if isinstance(data, list):
+        return any(_has_ref(value) for value in data)
+    return False
 
 
 class EntityMefRecord(EntityRecord):
@@ -24,6 +65,8 @@ class EntityMefRecord(EntityRecord):
     search = None
     mef_type = ""
 
+    _extensions = [*EntityRecord._extensions, LinksExtension()]
+
     def update(self, data, commit=False, dbcommit=False, reindex=False):
         """Update data for record.
 
@@ -37,28 +80,227 @@ class EntityMefRecord(EntityRecord):
             data=data, commit=commit, dbcommit=dbcommit, reindex=reindex
         )
 
+    @classmethod
+    def resolve_sources(cls, records):
+        """Fetch the source records referenced by MEF records.
+
+        The ``$ref`` are grouped by source class and every class is fetched
+        with one query per batch.
+
+        :param records: MEF records.
+        :returns: Dictionary ``$ref`` -> source record, None for the missing
+            source records.
+        """
+        refs_by_class = {}
+        for record in records:
+            for entity in cls.entities:
+                if not isinstance(value := record.get(entity), dict):
+                    continue
+                if (ref := value.get("$ref")) and (
+                    record_class := current_entity_registry.record_class_by_ref(ref)
+                ):
+                    pid = ref.rstrip("/").rsplit("/", 1)[-1]
+                    refs_by_class.setdefault(record_class, {}).setdefault(
+                        pid, []
+                    ).append(ref)
+        sources = {}
+        for record_class, refs in refs_by_class.items():
+            for pid, source in record_class.iter_records_by_pids(list(refs)):
+                for ref in refs[pid]:
+                    sources[ref] = source
+        return sources
+
+    @classmethod
+    def replace_refs_many(cls, records):
+        """Replace the ``$ref`` of many MEF records with the source data.
+
+        :param records: MEF records.
+        :returns: List of the resolved data in input order, see
+            :meth:`replace_refs`.
+        """
+        records = list(records)
+        sources = cls.resolve_sources(records)
+        resolved = []
+        for record in records:
+            data = deepcopy(dict(record))
+            for entity in cls.entities:
+                if not isinstance(value := data.get(entity), dict):
+                    continue
+                if (ref := value.get("$ref")) in sources:
+                    source = sources[ref]
+                    if source is not None and _has_ref(source):
+                        # nested $ref are left to the JSON resolver
+                        source = source.replace_refs()
+                    data[entity] = None if source is None else deepcopy(dict(source))
+            data["sources"] = [entity for entity in cls.entities if data.get(entity)]
+            resolved.append(data)
+        return resolved
+
+    @classmethod
+    def get_resolved_many(cls, records):
+        """Get the resolved data of MEF records from the resolved store.
+
+        Stored documents are used if they were resolved from the current
+        revision of the MEF record and are younger than
+        ``RERO_MEF_RESOLVED_STORE_MAX_AGE``. The other records are resolved
+        with :meth:`replace_refs_many` and stored in a separate transaction,
+        unless their row was invalidated in the meantime.
+
+        :param records: MEF records.
+        :returns: List of the resolved data in input order.
+        """
+        records = list(records)
+        config = current_app.config
+        if not config.get("RERO_MEF_RESOLVED_STORE", True):
+            return cls.replace_refs_many(records)
+        versions = {
+            record.pid: record.revision_id
+            for record in records
+            if record.pid and record.revision_id is not None
+        }
+        stored = {}
+        # generations are read before the resolution of the sources
+        generations = {}
+        if versions:
+            max_age = config.get("RERO_MEF_RESOLVED_STORE_MAX_AGE", timedelta(days=1))
+            query = MefResolved.query.filter(
+                MefResolved.mef_type == cls.mef_type,
+                MefResolved.mef_pid.in_(versions),
+            ).with_entities(
+                MefResolved.mef_pid,
+                MefResolved.version,
+                MefResolved.generation,
+                MefResolved.json,
+                MefResolved.created >= func.now() - max_age,
+            )
+            for pid, version, generation, data, fresh in query:
+                generations[pid] = generation
+                if data is not None and fresh and version == versions[pid]:
+                    stored[pid] = data
+        missing = [record for record in records if record.pid not in stored]
+        resolved = iter(cls.replace_refs_many(missing))
+        results = []
+        rows = {}
+        for record in records:
+            if record.pid in stored:
+                results.append(deepcopy(stored[record.pid]))
+                continue
+            results.append(data := next(resolved))
+            if record.pid in versions:
+                rows[record.pid] = {
+                    "mef_type": cls.mef_type,
+                    "mef_pid": record.pid,
+                    "version": versions[record.pid],
+                    "generation": generations.get(record.pid, 0),
+                    "json": data,
+                }
+        if rows:
+            query = postgresql.insert(MefResolved).values(list(rows.values()))
+            query = query.on_conflict_do_update(
+                index_elements=[MefResolved.mef_type, MefResolved.mef_pid],
+                set_={
+                    "version": query.excluded.version,
+                    "json": query.excluded.json,
+                    "created": func.now(),
+                },
+                # an invalidation since the read keeps the row cleared
+                where=MefResolved.generation == query.excluded.generation,
+            )
+            # own transaction: the caller's session is neither committed nor
+            # rolled back. The lock timeout avoids waiting for rows the
+            # caller's session changed.
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(text("SET LOCAL lock_timeout = '1s'"))
+                    connection.execute(query)
+            except SQLAlchemyError as err:
+                current_app.logger.warning(f"Resolved MEF store failed: {err}")
+        return results
+
+    def replace_refs(self):
+        """Replace $ref with real data.
+
+        :returns: Resolved data with the ``sources`` list.
+        """
+        return self.replace_refs_many([self])[0]
+
+    @classmethod
+    def add_information_many(cls, records, resolve=False, sources=False):
+        """Add information to many records.
+
+        Sources will be also added if resolve is True.
+
+        :param records: MEF records.
+        :param resolve: resolve $refs
+        :param sources: Add sources information to record
+        :returns: List of records in input order.
+        """
+        records = list(records)
+        if resolve:
+            records = [cls(data) for data in cls.get_resolved_many(records)]
+        else:
+            records = [cls(deepcopy(dict(record))) for record in records]
+        for data in records:
+            my_sources = []
+            for entity in cls.entities:
+                if entity_data := data.get(entity):
+                    # we got a error status in data
+                    if entity_data.get("status"):
+                        data.pop(entity)
+                        current_app.logger.error(
+                            f"MEF replace refs {data.get('pid')} {entity}"
+                            f" status: {entity_data.get('status')}"
+                            f" {entity_data.get('message')}"
+                        )
+                        continue
+                    my_sources.append(entity)
+                    if resolve and (metadata := entity_data.get("metadata")):
+                        data[entity] = metadata
+            if my_sources and (resolve or sources):
+                data["sources"] = my_sources
+        return records
+
+    def add_information(self, resolve=False, sources=False):
+        """Add information to record.
+
+        Sources will be also added if resolve is True.
+        :param resolve: resolve $refs
+        :param sources: Add sources information to record
+        :returns: record
+        """
+        return self.add_information_many([self], resolve=resolve, sources=sources)[0]
+
     @classmethod
     def get_mef(cls, entity_pid, entity_name, pid_only=False):
         """Get MEF record by entity pid value.
 
+        Looks up the ``mef_link`` table, which includes the uncommitted changes
+        of the current transaction.
+
         :param entity_pid: Entity pid.
         :param entity_name: Name of entity (pid_type).
         :param pid_only: return pid only or the complete record.
         :returns: pid or record
         """
-        key = f"{entity_name}.pid"
-        if entity_name == "viaf":
-            key = "viaf_pid"
         query = (
-            cls.search()
-            .filter("term", **{key: entity_pid})
-            .params(preserve_order=True)
-            .sort({"_updated": {"order": "desc"}})
+            cls._records_query()
+            .join(
+                MefLink,
+                and_(
+                    MefLink.mef_type == cls.mef_type,
+                    MefLink.mef_pid == PersistentIdentifier.pid_value,
+                ),
+            )
+            .filter(
+                MefLink.source_name == entity_name,
+                MefLink.source_pid == entity_pid,
+            )
+            .order_by(cls.model_cls.updated.desc())
         )
         if pid_only:
-            mef_records = [hit.pid for hit in (query.source(["pid"]).scan())]
+            mef_records = [pid for pid, _ in query]
         else:
-            mef_records = [cls.get_record(hit.meta.id) for hit in query.scan()]
+            mef_records = [cls(obj.data, model=obj) for _, obj in query]
         if len(mef_records) > 1:
             mef_pids = mef_records if pid_only else [mef.pid for mef in mef_records]
             current_app.logger.error(
@@ -67,6 +309,177 @@ class EntityMefRecord(EntityRecord):
             )
         return mef_records
 
+    @classmethod
+    def get_source_class(cls, source_name):
+        """Get the source record class of a source name.
+
+        :param source_name: Source name, e.g. ``gnd``.
+        :returns: Source record class or None.
+        """
+        return current_entity_registry.record_class_by_list_route(
+            f"/{cls.mef_type.lower()}/{source_name}/"
+        )
+
+    @classmethod
+    def get_latest(cls, pid_type, pid):
+        """Get latest Mef record for pid_type and pid.
+
+        The redirect chain of the pid is resolved with one lookup in the
+        ``source_redirect`` table.
+
+        :param pid_type: source name to use, e.g. ``gnd``.
+        :param pid: pid to use.
+        :returns: latest record or an empty dictionary.
+        """
+        if source_cls := cls.get_source_class(pid_type):
+            pid = get_final_target(source_cls.provider.pid_type, pid)
+        if pid is None:
+            return {}
+        search = cls.search().filter({"term": {f"{pid_type}.pid": pid}})[:1]
+        if hits := search.execute().hits:
+            return hits[0].to_dict()
+        return {}
+
+    @classmethod
+    def get_mef_pids_many(cls, entity_name, entity_pids):
+        """Get the MEF pids linking many entity pids with one query.
+
+        :param entity_name: Name of entity (pid_type).
+        :param entity_pids: Entity pids.
+        :returns: Dictionary entity pid -> list of MEF pids, newest update
+            first. Entity pids without MEF record are missing.
+        """
+        mef_pids = {}
+        if not (entity_pids := list(entity_pids)):
+            return mef_pids
+        query = (
+            cls._records_query()
+            .join(
+                MefLink,
+                and_(
+                    MefLink.mef_type == cls.mef_type,
+                    MefLink.mef_pid == PersistentIdentifier.pid_value,
+                ),
+            )
+            .filter(
+                MefLink.source_name == entity_name,
+                MefLink.source_pid.in_(entity_pids),
+            )
+            .order_by(cls.model_cls.updated.desc())
+            .with_entities(MefLink.source_pid, PersistentIdentifier.pid_value)
+        )
+        for entity_pid, mef_pid in query:
+            mef_pids.setdefault(entity_pid, []).append(mef_pid)
+        return mef_pids
+
+    @property
+    def links(self):
+        """Get the source links of the record.
+
+        :returns: Set of ``(source_name, source_pid)`` tuples.
+        """
+        links = set(self.ref_pids.items())
+        if viaf_pid := self.get("viaf_pid"):
+            links.add(("viaf", viaf_pid))
+        return links
+
+    def sync_links(self):
+        """Write the source links of the record to the ``mef_link`` table."""
+        if not self.pid:
+            return
+        stored = {
+            (link.source_name, link.source_pid): link
+            for link in MefLink.query.filter_by(
+                mef_type=self.mef_type, mef_pid=self.pid
+            )
+        }
+        links = self.links
+        for key in stored.keys() - links:
+            db.session.delete(stored[key])
+        db.session.add_all(
+            MefLink(
+                mef_type=self.mef_type,
+                source_name=source_name,
+                source_pid=source_pid,
+                mef_pid=self.pid,
+            )
+            for source_name, source_pid in links - stored.keys()
+        )
+
+    def delete_links(self):
+        """Remove the source links of the record from the ``mef_link`` table."""
+        if self.pid:
+            MefLink.query.filter_by(mef_type=self.mef_type, mef_pid=self.pid).delete(
+                synchronize_session="fetch"
+            )
+
+    @classmethod
+    def _stored_links_query(cls):
+        """Build a query of the source links stored in the MEF records.
+
+        :returns: Select of ``(mef_type, source_name, source_pid, mef_pid)``.
+        """
+        json = cls.model_cls.json
+        mef_type = literal(cls.mef_type, db.String).label("mef_type")
+        mef_pid = json["pid"].as_string().label("mef_pid")
+        selects = [
+            select(
+                mef_type,
+                literal(entity_name, db.String).label("source_name"),
+                func.regexp_replace(
+                    json[(entity_name, "$ref")].as_string(), "^.*/", ""
+                ).label("source_pid"),
+                mef_pid,
+            ).where(json[(entity_name, "$ref")].isnot(None))
+            for entity_name in cls.entities
+        ]
+        selects.append(
+            select(
+                mef_type,
+                literal("viaf", db.String).label("source_name"),
+                json["viaf_pid"].as_string().label("source_pid"),
+                mef_pid,
+            ).where(json["viaf_pid"].isnot(None))
+        )
+        return union_all(*selects)
+
+    @classmethod
+    def backfill_links(cls):
+        """Rebuild the ``mef_link`` rows of the MEF type from the MEF records.
+
+        :returns: Number of links written.
+        """
+        db.session.execute(delete(MefLink).where(MefLink.mef_type == cls.mef_type))
+        result = db.session.execute(
+            insert(MefLink).from_select(
+                ["mef_type", "source_name", "source_pid", "mef_pid"],
+                cls._stored_links_query(),
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @classmethod
+    def check_links(cls, fix=False):
+        """Compare the ``mef_link`` rows with the links stored in the MEF records.
+
+        :param fix: If True, add the missing and delete the stale links.
+        :returns: Tuple (missing, stale) of lists of
+            ``(mef_type, source_name, source_pid, mef_pid)`` rows.
+        """
+        stored = select(cls._stored_links_query().subquery())
+        links = select(
+            MefLink.mef_type, MefLink.source_name, MefLink.source_pid, MefLink.mef_pid
+        ).where(MefLink.mef_type == cls.mef_type)
+        missing = db.session.execute(except_(stored, links)).all()
+        stale = db.session.execute(except_(links, stored)).all()
+        if fix:
+            db.session.add_all(MefLink(**row._asdict()) for row in missing)
+            for row in stale:
+                MefLink.query.filter_by(**row._asdict()).delete()
+            db.session.commit()
+        return missing, stale
+
     @classmethod
     def get_all_pids_without_entities_and_viaf(cls):
         """Get all pids for records without entities and VIAF pids.
@@ -76,7 +489,7 @@ class EntityMefRecord(EntityRecord):
         must_not = [Q("exists", field="viaf_pid")]
         must_not.extend(Q("exists", field=entity) for entity in cls.entities)
         query = cls.search().filter("bool", must_not=must_not)
-        for hit in query.source("pid").scan():
+        for hit in scan_index(query, fields=["pid"]):
             yield hit.pid
 
     @classmethod
@@ -88,9 +501,43 @@ class EntityMefRecord(EntityRecord):
         query = cls.search().exclude("exists", field="viaf_pid")
         for pid_type in current_app.config.get(cls.mef_type, []):
             query = query.filter("bool", should=[Q("exists", field=pid_type)])
-        for hit in query.source("pid").scan():
+        for hit in scan_index(query, fields=["pid"]):
             yield hit.pid
 
+    @classmethod
+    def get_multiple_pids(cls, record_types=None, verbose=False):
+        """Get entity pids with multiple MEF records.
+
+        Duplicates are found with composite aggregations. If the aggregations
+        fail, :meth:`get_multiple_missing_pids` scans all documents instead.
+
+        :param record_types: Record types (pid_types).
+        :param verbose: Verbose.
+        :returns: Dictionary record type -> entity pid -> MEF pids, most
+            recently updated first.
+        """
+        multiple_pids = {}
+        try:
+            for record_type in record_types or []:
+                if not (entity_class := get_entity_class(record_type)):
+                    current_app.logger.error(f"Record type not found: {record_type}")
+                    continue
+                multiple_pids[record_type] = dict(
+                    get_duplicate_values(
+                        search=cls.search(),
+                        field=f"{entity_class.name}.pid",
+                        sort=[{"_updated": {"order": "desc"}}],
+                    )
+                )
+        except TransportError as err:
+            current_app.logger.warning(
+                f"Multiple MEF aggregation failed, scanning instead: {err}"
+            )
+            _, multiple_pids, _, _ = cls.get_multiple_missing_pids(
+                record_types=record_types, verbose=verbose
+            )
+        return multiple_pids
+
     @classmethod
     def get_multiple_missing_pids(cls, record_types=None, verbose=False):
         """Get entity pids with multiple MEF records.
@@ -124,11 +571,9 @@ class EntityMefRecord(EntityRecord):
         # Get all pids from MEF
         date = datetime.now(UTC)
         progress = progressbar(
-            items=cls.search()
-            .params(preserve_order=True)
-            .sort({"_updated": {"order": "desc"}})
-            .source(sources)
-            .scan(),
+            items=scan_index(
+                cls.search(), fields=sources, sort=[{"_updated": {"order": "desc"}}]
+            ),
             length=cls.search().count(),
             verbose=verbose,
         )
@@ -147,20 +592,17 @@ class EntityMefRecord(EntityRecord):
                         none_pids[record_type].append(mef_pid)
         # Get all entities pids and compare with MEF pids
         for record_type, info in entities.items():
+            query = info["search"].filter("range", _created={"lte": date})
             progress = progressbar(
-                items=info["search"]
-                .params(preserve_order=True)
-                .sort({"pid": {"order": "asc"}})
-                .filter("range", _created={"lte": date})
-                .source("pid")
-                .scan(),
-                length=info["search"].filter("range", _created={"lte": date}).count(),
+                items=scan_index(query, fields=["pid"]),
+                length=query.count(),
                 verbose=verbose,
             )
             for hit in progress:
                 pid = hit.pid
                 if not pids[record_type].pop(pid, None):
                     missing_pids[record_type].append(pid)
+            missing_pids[record_type].sort()
         return pids, multiple_pids, missing_pids, none_pids
 
     @classmethod
@@ -258,9 +700,11 @@ class EntityMefRecord(EntityRecord):
 
     def get_entities_records(self):
         """Get entities records."""
-        entities_records = []
+        pids_by_class = {}
         for entity in self.get_entities_pids():
-            record_class = entity["record_class"]
-            if entity_record := record_class.get_record_by_pid(entity["pid"]):
-                entities_records.append(entity_record)
+            pids_by_class.setdefault(entity["record_class"], []).append(entity["pid"])
+        entities_records = []
+        for record_class, pids in pids_by_class.items():
+            records, _ = record_class.get_records_by_pids(pids)
+            entities_records.extend(records)
         return entities_records
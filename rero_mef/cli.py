@@ -33,9 +33,14 @@ from .cli_logging import ensure_single_stream_handler
 from .concepts import ConceptMefRecord
 from .extensions import MD5Extension
 from .marctojson.records import RecordsCount
+from .models import MefResolved
 from .monitoring.api import Monitoring
+from .pidset import PidSet
 from .places import PlaceMefRecord
-from .tasks import create_or_update as task_create_or_update
+from .rebuild import MefRebuild
+from .redirects import backfill_redirects as run_backfill_redirects
+from .registry import current_entity_registry
+from .tasks import create_or_update_many as task_create_or_update_many
 from .tasks import delete as task_delete
 from .tasks import process_bulk_queue as task_process_bulk_queue
 from .utils import (
@@ -106,16 +111,25 @@ def celery():
     default=False,
     help="Enqueue record creation.",
 )
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=int,
+    default=100,
+    help="Records written per transaction (default: 100).",
+)
 @click.option("-v", "--verbose", "verbose", is_flag=True, default=False)
 @with_appcontext
-def create_or_update(entity, source, lazy, test_md5, enqueue, verbose):
+def create_or_update(entity, source, lazy, test_md5, enqueue, batch_size, verbose):
     """Create or update entity records.
 
     :param entity: entity to create or update.
     :param source: File with entities data in JSON format.
     :param lazy: lazy reads file
     :param test_md5: Compaire md5 to find out if we have to update.
-    :param online: Try to get VIAF online if not exist.
+    :param enqueue: Enqueue record creation.
+    :param batch_size: Records written per transaction.
     :param verbose: Verbose.
     """
     click.secho(f"Update records: {entity}", fg="green")
@@ -127,11 +141,12 @@ def create_or_update(entity, source, lazy, test_md5, enqueue, verbose):
         if isinstance(data, dict):
             data = [data]
 
-    for idx, record in enumerate(data, 1):
+    idx = 1
+    for records in itertools.batched(data, batch_size):
         if enqueue:
-            task_create_or_update.delay(
+            task_create_or_update_many.delay(
                 idx=idx,
-                record=record,
+                records=records,
                 entity=entity,
                 dbcommit=True,
                 reindex=True,
@@ -139,15 +154,16 @@ def create_or_update(entity, source, lazy, test_md5, enqueue, verbose):
                 verbose=verbose,
             )
         else:
-            task_create_or_update(
+            task_create_or_update_many(
                 idx=idx,
-                record=record,
+                records=records,
                 entity=entity,
                 dbcommit=True,
                 reindex=True,
                 test_md5=test_md5,
                 verbose=verbose,
             )
+        idx += len(records)
 
 
 @fixtures.command()
@@ -238,7 +254,7 @@ def marc_to_json(entity, marc_file, json_file, error_file, verbose):
     except Exception as err:
         click.secho(f"Marc file not found for {entity}:{err}", fg="red", err=True)
 
-    pids = {}
+    pids = PidSet()
     count_errors = 0
     for record, count in records:
         data = transformation[entity](
@@ -251,12 +267,12 @@ def marc_to_json(entity, marc_file, json_file, error_file, verbose):
                     click.secho(f"  {pid} NO TRANSFORMATION: {msg}", fg="yellow")
             else:
                 pid = json_data.get("pid")
-                if pids.get(pid):
+                if pid in pids:
                     click.secho(
                         f"  {count:8} Error duplicate pid in {entity}: {pid}", fg="red"
                     )
                 else:
-                    pids[pid] = 1
+                    pids.add(pid)
                     _md5.add_md5(json_data)
                     if json_data.get("deleted"):
                         count_deleted += 1
@@ -379,6 +395,18 @@ def load_csv(
     bulk_load_metadata(
         entity, metadata_file, bulk_count=bulk_count, verbose=verbose, reindex=reindex
     )
+    entity_class = get_entity_class(entity)
+    if hasattr(entity_class, "backfill_links"):
+        count = entity_class.backfill_links()
+        click.secho(f"  Number of links loaded: {count}.", fg="green", err=True)
+    # bulk loads bypass the record extensions invalidating the resolved MEF
+    if entity != "viaf":
+        count = MefResolved.query.delete()
+        db.session.commit()
+        click.secho(f"  Resolved MEF removed: {count}.", fg="green", err=True)
+    if entity in current_entity_registry.record_classes():
+        count = run_backfill_redirects(entity_class)
+        click.secho(f"  Number of redirects loaded: {count}.", fg="green", err=True)
     if ids_file:
         click.secho(
             "  Number of records in id to load: "
@@ -582,15 +610,14 @@ def csv_diff(
         length = entity_class.count()
         counts["compair"] = length
         progress_bar = progressbar(
-            items=entity_class.get_all_ids(),
+            items=entity_class.iter_records_by_ids(entity_class.get_all_ids()),
             length=length,
             label=f"Loading entity: {compair}",
             verbose=True,
         )
-        for id_ in progress_bar:
-            if record := entity_class.get_record(id_):
-                record.pop("md5", None)
-                compair_data[record.pid] = record
+        for record in progress_bar:
+            record.pop("md5", None)
+            compair_data[record.pid] = record
 
     db.session.close()
     with open(csv_metadata_file, buffering=1) as metadata_file:
@@ -952,8 +979,24 @@ def save(output_file_name, name, from_date, until_date, quiet, enqueue):
 @click.option("-v", "--verbose", "verbose", is_flag=True, default=False)
 @click.option("-I", "--indent", "indent", type=click.INT, default=2)
 @click.option("-s", "--schema", "schema", is_flag=True, default=False)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=click.INT,
+    default=None,
+    help="Number of pids read from the database per query.",
+)
+@click.option(
+    "-r",
+    "--resolve",
+    "resolve",
+    is_flag=True,
+    default=False,
+    help="Resolve the $refs of MEF records.",
+)
 @with_appcontext
-def export(output_path, pid_type, verbose, indent, schema):
+def export(output_path, pid_type, verbose, indent, schema, batch_size, resolve):
     """Export multiple records into JSON format.
 
     :param pid_type: record type
@@ -961,6 +1004,8 @@ def export(output_path, pid_type, verbose, indent, schema):
     :param pidfile: files with pids to extract
     :param indent: indent for output
     :param schema: do not delete $schema
+    :param batch_size: number of pids read from the database per query.
+    :param resolve: resolve the $refs of MEF records.
     """
     for p_type in pid_type:
         output_file_name = os.path.join(output_path, f"{p_type}.json")
@@ -971,12 +1016,13 @@ def export(output_path, pid_type, verbose, indent, schema):
             .get("record_class")
         )
         export_json_records(
-            pids=record_class.get_all_pids(),
+            pids=record_class.get_all_pids(batch_size=batch_size),
             pid_type=p_type,
             output_file_name=output_file_name,
             indent=indent,
             schema=schema,
             verbose=verbose,
+            resolve=resolve,
         )
 
 
@@ -1057,22 +1103,99 @@ def run(
 )
 @click.option("-t", "--pid_type", "pid_type", multiple=True, required=True)
 @click.option("-n", "--no-info", "no_info", is_flag=True, default=True)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=click.INT,
+    default=None,
+    help="Number of uuids read from the database per query.",
+)
 @with_appcontext
-def reindex(pid_type, no_info):
+def reindex(pid_type, no_info, batch_size):
     """Reindex all records.
 
     :param pid_type: Pid type Could be multiples pid types.
     :param no-info: No `runindex` information displayed after execution.
+    :param batch_size: Number of uuids read from the database per query.
     """
     for p_type in pid_type:
         click.secho(f"Sending {p_type} to indexing queue ...", fg="green")
         entity_class = get_entity_class(p_type)
         entity_indexer = get_entity_indexer_class(p_type)
-        entity_indexer().bulk_index(entity_class.get_all_ids())
+        entity_indexer().bulk_index(entity_class.get_all_ids(batch_size=batch_size))
     if no_info:
         click.secho('Execute "runindex" command to process the queue!', fg="yellow")
 
 
+@utils.command()
+@click.option(
+    "--yes-i-know",
+    is_flag=True,
+    callback=abort_if_false,
+    expose_value=False,
+    prompt="Do you really want to reindex all records?",
+)
+@click.option("-t", "--pid_type", "pid_type", multiple=True, required=True)
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    type=click.INT,
+    default=None,
+    help="Number of parallel bulk requests.",
+)
+@click.option(
+    "-c",
+    "--chunk-size",
+    "chunk_size",
+    type=click.INT,
+    default=None,
+    help="Maximum number of documents per bulk request.",
+)
+@click.option(
+    "-m",
+    "--max-chunk-bytes",
+    "max_chunk_bytes",
+    type=click.INT,
+    default=None,
+    help="Maximum size in bytes of a bulk request.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=click.INT,
+    default=None,
+    help="Number of records read from the database per query.",
+)
+@with_appcontext
+def reindex_direct(pid_type, workers, chunk_size, max_chunk_bytes, batch_size):
+    """Reindex all records with parallel bulk requests without the queue.
+
+    :param pid_type: Pid type Could be multiples pid types.
+    :param workers: Number of parallel bulk requests.
+    :param chunk_size: Maximum number of documents per bulk request.
+    :param max_chunk_bytes: Maximum size in bytes of a bulk request.
+    :param batch_size: Number of records read from the database per query.
+    """
+    for p_type in pid_type:
+        click.secho(f"Direct indexing {p_type} ...", fg="green")
+        entity_class = get_entity_class(p_type)
+        entity_indexer = get_entity_indexer_class(p_type)
+        indexed, error = entity_indexer().direct_bulk_index(
+            entity_class,
+            entity_class.get_all_ids(batch_size=batch_size),
+            workers=workers,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            batch_size=batch_size,
+            expunge=True,
+        )
+        entity_class.flush_indexes()
+        click.secho(f"{p_type} indexed: {indexed}, error: {error}", fg="yellow")
+
+
 def queue_count():
     """Count tasks in celery."""
     inspector = current_celery.control.inspect()
@@ -1378,7 +1501,7 @@ def clean_multiple_mef(record_types, dry_run, verbose):
             if selected_types
             else group_types
         ):
-            _, multiple_pids, _, _ = mef_cls.get_multiple_missing_pids(
+            multiple_pids = mef_cls.get_multiple_pids(
                 record_types=current_types, verbose=verbose
             )
             for pid_type, entity_map in multiple_pids.items():
@@ -1394,8 +1517,8 @@ def clean_multiple_mef(record_types, dry_run, verbose):
                     continue
 
                 entity_cls = get_entity_class(pid_type)
-                for entity_pid in entity_pids:
-                    if record := entity_cls.get_record_by_pid(entity_pid):
+                for entity_pid, record in entity_cls.iter_records_by_pids(entity_pids):
+                    if record is not None:
                         record.create_or_update_mef(dbcommit=True, reindex=True)
                         reconciled_count += 1
                         info["reconciled"] += 1
@@ -1414,11 +1537,11 @@ def clean_multiple_mef(record_types, dry_run, verbose):
             if dry_run:
                 continue
 
-            for orphan_pid in orphan_pids:
-                if record := mef_cls.get_record_by_pid(orphan_pid):
-                    record.delete(force=True, dbcommit=True, delindex=True)
-                    deleted_orphan_count += 1
-                    orphan_details[group_name]["deleted"] += 1
+            records, _ = mef_cls.get_records_by_pids(orphan_pids)
+            for record in records:
+                record.delete(force=True, dbcommit=True, delindex=True)
+                deleted_orphan_count += 1
+                orphan_details[group_name]["deleted"] += 1
 
     if not details and orphan_count == 0:
         click.secho("No duplicated or orphaned MEF mappings found.", fg="green")
@@ -1456,6 +1579,240 @@ def clean_multiple_mef(record_types, dry_run, verbose):
         )
 
 
+@utils.command()
+@click.option(
+    "-t",
+    "--pid_type",
+    "pid_types",
+    multiple=True,
+    type=click.Choice(
+        ["mef", "comef", "plmef", "viaf", "cidref", "cognd", "pidref", "plgnd"]
+    ),
+    default=["mef", "comef", "plmef", "viaf", "cidref", "cognd", "pidref", "plgnd"],
+    help="MEF, VIAF, concept or place pid types to backfill.",
+)
+@with_appcontext
+def backfill_links(pid_types):
+    """Rebuild the link and association identifier tables from the records.
+
+    :param pid_types: MEF, VIAF, concept or place pid types to backfill.
+    """
+    for pid_type in pid_types:
+        count = get_entity_class(pid_type).backfill_links()
+        click.secho(f"{pid_type}: links={count}", fg="green")
+
+
+@utils.command()
+@click.option(
+    "-t",
+    "--pid_type",
+    "pid_types",
+    multiple=True,
+    help="Source pid types to backfill, default all.",
+)
+@with_appcontext
+def backfill_redirects(pid_types):
+    """Rebuild the source redirect table from the source records.
+
+    :param pid_types: Source pid types to backfill.
+    """
+    record_classes = current_entity_registry.record_classes()
+    for pid_type in pid_types or record_classes:
+        if record_class := record_classes.get(pid_type):
+            count = run_backfill_redirects(record_class)
+            click.secho(f"{pid_type}: redirects={count}", fg="green")
+        else:
+            click.secho(f"{pid_type}: unknown source pid type", fg="red")
+
+
+@utils.command()
+@click.option(
+    "-t",
+    "--pid_type",
+    "pid_types",
+    multiple=True,
+    type=click.Choice(["mef", "comef", "plmef", "viaf"]),
+    default=["mef", "comef", "plmef", "viaf"],
+    help="MEF or VIAF pid types to check.",
+)
+@click.option("--fix", "fix", is_flag=True, default=False, help="Repair the links.")
+@click.option("-v", "--verbose", "verbose", is_flag=True, default=False)
+@with_appcontext
+def check_links(pid_types, fix, verbose):
+    """Check the source to MEF and VIAF link tables against the records.
+
+    :param pid_types: MEF or VIAF pid types to check.
+    :param fix: Add the missing and delete the stale links.
+    :param verbose: Verbose output.
+    """
+    for pid_type in pid_types:
+        missing, stale = get_entity_class(pid_type).check_links(fix=fix)
+        click.secho(
+            f"{pid_type}: missing={len(missing)} stale={len(stale)}",
+            fg="red" if missing or stale else "green",
+        )
+        if verbose:
+            for label, rows in (("missing", missing), ("stale", stale)):
+                for row in rows:
+                    click.echo(f"  {label}: {' '.join(row)}")
+
+
+def run_rebuild_mef(
+    mef_cls,
+    viaf_cls,
+    dry_run,
+    report_file,
+    reindex,
+    batch_size,
+    associations=False,
+    csv_directory=None,
+):
+    """Plan and apply a MEF cluster rebuild and echo a report.
+
+    :param mef_cls: MEF record class.
+    :param viaf_cls: VIAF record class used to group the sources or None.
+    :param dry_run: If True, only report the planned changes.
+    :param report_file: Open file receiving the planned changes as JSON lines.
+    :param reindex: Reindex the written records.
+    :param batch_size: Records written per transaction.
+    :param associations: Group the sources by association identifier.
+    :param csv_directory: Directory receiving load-ready CSV files instead of
+        applying the changes.
+    """
+    rebuild = MefRebuild(
+        mef_cls, viaf_cls=viaf_cls, associations=associations, batch_size=batch_size
+    )
+    if csv_directory:
+        pid_type = mef_cls.provider.pid_type
+        click.secho(f"Write {pid_type} CSV files to {csv_directory} ...", fg="green")
+        with (
+            open(
+                os.path.join(csv_directory, f"{pid_type}_pidstore.csv"),
+                "w",
+                encoding="utf-8",
+            ) as pidstore,
+            open(
+                os.path.join(csv_directory, f"{pid_type}_metadata.csv"),
+                "w",
+                encoding="utf-8",
+            ) as metadata,
+            open(
+                os.path.join(csv_directory, f"{pid_type}_ids.csv"),
+                "w",
+                encoding="utf-8",
+            ) as ids,
+        ):
+            count = rebuild.write_csv(pidstore, metadata, ids)
+        click.secho(f"  MEF records written: {count}", fg="green")
+        return
+    click.secho(f"Plan {mef_cls.mef_type.lower()} MEF rebuild ...", fg="green")
+    plan = rebuild.plan()
+    if report_file:
+        for cluster in plan["create"]:
+            report_file.write(json.dumps({"action": "create", "new": cluster}) + "\n")
+        for mef_pid, old, new in plan["update"]:
+            report_file.write(
+                json.dumps({"action": "update", "pid": mef_pid, "old": old, "new": new})
+                + "\n"
+            )
+        for mef_pid, old in plan["delete"]:
+            report_file.write(
+                json.dumps({"action": "delete", "pid": mef_pid, "old": old}) + "\n"
+            )
+    click.echo(
+        f"  unchanged: {plan['unchanged']} create: {len(plan['create'])} "
+        f"update: {len(plan['update'])} delete: {len(plan['delete'])}"
+    )
+    if dry_run:
+        return
+    counts = rebuild.apply(plan, reindex=reindex)
+    click.secho(
+        f"  created: {counts['create']} updated: {counts['update']} "
+        f"deleted: {counts['delete']}",
+        fg="green",
+    )
+
+
+@utils.command()
+@click.option(
+    "-t",
+    "--pid_type",
+    "pid_types",
+    multiple=True,
+    type=click.Choice(["mef", "comef", "plmef"]),
+    default=["comef", "plmef"],
+    help="MEF pid types to rebuild.",
+)
+@click.option("--dry-run", "dry_run", is_flag=True, default=False)
+@click.option(
+    "-o",
+    "--output",
+    "report_file",
+    type=click.File("w"),
+    default=None,
+    help="JSON lines file for the planned changes.",
+)
+@click.option(
+    "-r/-R",
+    "--reindex/--no-reindex",
+    "reindex",
+    default=True,
+    help="Reindex the written records, deleted records are always unindexed.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_size",
+    type=int,
+    default=None,
+    help="Records written per transaction.",
+)
+@click.option(
+    "-a",
+    "--associations",
+    "associations",
+    is_flag=True,
+    default=False,
+    help="Group concepts and places by association identifier.",
+)
+@click.option(
+    "--csv",
+    "csv_directory",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    help="Directory for load-ready CSV files instead of applying the changes.",
+)
+@with_appcontext
+def rebuild_mef(
+    pid_types, dry_run, report_file, reindex, batch_size, associations, csv_directory
+):
+    """Rebuild the MEF clusters from the source records.
+
+    Agent MEF records are grouped by VIAF cluster. Concept and place MEF records
+    keep their current grouping, or are relinked by association identifier.
+    Only the changed MEF records are written.
+
+    :param pid_types: MEF pid types to rebuild.
+    :param dry_run: Only report the planned changes.
+    :param report_file: File receiving the planned changes.
+    :param reindex: Reindex the written records.
+    :param batch_size: Records written per transaction.
+    :param associations: Group concepts and places by association identifier.
+    :param csv_directory: Directory receiving load-ready CSV files.
+    """
+    for pid_type in pid_types:
+        run_rebuild_mef(
+            mef_cls=get_entity_class(pid_type),
+            viaf_cls=get_entity_class("viaf") if pid_type == "mef" else None,
+            dry_run=dry_run,
+            report_file=report_file,
+            reindex=reindex,
+            batch_size=batch_size,
+            associations=associations and pid_type != "mef",
+            csv_directory=csv_directory,
+        )
+
+
 def create_personal(name, user_id, scopes=None, is_internal=False, access_token=None):
     """Create a personal access token.
 
@@ -9,6 +9,7 @@ class ConceptRecord(ConceptPlaceRecord):
     """Concept record class."""
 
     name = None
+    entity_group = "concepts"
 
     @classmethod
     def create(
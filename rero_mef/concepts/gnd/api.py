@@ -6,6 +6,7 @@
 from flask import current_app
 from invenio_search.api import RecordsSearch
 
+from ...negative_cache import negative_cached
 from ..api import ConceptIndexer, ConceptRecord
 from .fetchers import gnd_id_fetcher
 from .minters import gnd_id_minter
@@ -40,6 +41,7 @@ class ConceptGndRecord(ConceptRecord):
     search = ConceptGndSearch
 
     @classmethod
+    @negative_cached
     def get_online_record(cls, id_, debug=False):
         """Get online Record.
 
@@ -73,47 +75,47 @@ class ConceptGndRecord(ConceptRecord):
                 return match_value[:13]
         return None
 
-    def get_association_record(self, association_cls, association_search):
+    def has_exact_match(self, association_identifier):
+        """Check if the record has an exact BNF match of an association identifier.
+
+        :param association_identifier: Association identifier.
+        :returns: True if an ``exactMatch`` has the BNF identifier.
+        """
+        return any(
+            identified_by.get("source") == "BNF"
+            and identified_by.get("type") == "bf:Nbn"
+            and identified_by.get("value") == association_identifier
+            for exact_match in self.get("exactMatch", [])
+            for identified_by in exact_match.get("identifiedBy", [])
+        )
+
+    def get_association_record(self, association_cls):
         """Get associated record.
 
         :params association_cls: Association class
-        :params association_search: Association search class.
         :returns: Associated record.
         """
         if association_identifier := self.association_identifier:
-            # Test if my identifier is unique
-            exact_count = (
-                self.search()
-                .filter("term", exactMatch__identifiedBy__source="BNF")
-                .filter("term", exactMatch__identifiedBy__type="bf:Nbn")
-                .filter("term", exactMatch__identifiedBy__value=association_identifier)
-                .count()
+            own, associated = self.get_association_pids(
+                association_identifier, association_cls
             )
-            if exact_count != 1:
+            # Test if my identifier is unique
+            exact_count = len([pid for pid, exact_match in own if exact_match])
+            if exact_count != 1 and len(own) > 1:
                 # we have 0 or multiple exact matches
-                count = (
-                    self.search()
-                    .filter("term", _association_identifier=association_identifier)
-                    .count()
+                current_app.logger.error(
+                    f"MULTIPLE IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
+                    f"| {association_identifier}"
                 )
-                if count > 1:
-                    current_app.logger.error(
-                        f"MULTIPLE IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
-                        f"| {association_identifier}"
-                    )
-                    return None
+                return None
             # Get associated record
-            query = association_search().filter(
-                "term", _association_identifier=association_identifier
-            )
-            if query.count() > 1:
+            if len(associated) > 1:
                 current_app.logger.error(
                     f"MULTIPLE ASSOCIATIONS IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
                     f"| {association_identifier}"
                 )
-            elif query.count() == 1:
-                hit = next(query.source("pid").scan())
-                return association_cls.get_record_by_pid(hit.pid)
+            elif len(associated) == 1:
+                return association_cls.get_record_by_pid(associated[0][0])
         return None
 
     @property
@@ -125,13 +127,9 @@ class ConceptGndRecord(ConceptRecord):
             ConceptMefRecord,
         )
 
-        ConceptIdrefRecord.flush_indexes()
         return {
             "identifier": self.association_identifier,
-            "record": self.get_association_record(
-                association_cls=ConceptIdrefRecord,
-                association_search=ConceptIdrefSearch,
-            ),
+            "record": self.get_association_record(association_cls=ConceptIdrefRecord),
             "record_cls": ConceptIdrefRecord,
             "search_cls": ConceptIdrefSearch,
             "mef_cls": ConceptMefRecord,
@@ -6,6 +6,7 @@
 from flask import current_app
 from invenio_search.api import RecordsSearch
 
+from ...negative_cache import negative_cached
 from ..api import ConceptIndexer, ConceptRecord
 from .fetchers import idref_id_fetcher
 from .minters import idref_id_minter
@@ -40,6 +41,7 @@ class ConceptIdrefRecord(ConceptRecord):
     search = ConceptIdrefSearch
 
     @classmethod
+    @negative_cached
     def get_online_record(cls, id_, debug=False):
         """Get online Record.
 
@@ -51,54 +53,38 @@ class ConceptIdrefRecord(ConceptRecord):
 
         return idref_get_record(id_=id_, debug=debug)
 
-    def get_association_record(self, association_cls, association_search):
+    def get_association_record(self, association_cls):
         """Get associated record.
 
+        GND sometimes has multiple records sharing the same BNF identifier, they
+        are disambiguated by requiring exactly one GND record with an exact BNF
+        match.
+
         :params association_cls: Association class
-        :params association_search: Association search class.
         :returns: Associated record.
         """
         if association_identifier := self.association_identifier:
-            # Test if my identifier is unique
-            count = (
-                self.search()
-                .filter("term", _association_identifier=association_identifier)
-                .count()
+            own, associated = self.get_association_pids(
+                association_identifier, association_cls
             )
-            if count > 1:
+            # Test if my identifier is unique
+            if len(own) > 1:
                 current_app.logger.error(
                     f"MULTIPLE IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
                     f"| {association_identifier}"
                 )
                 return None
             # Get associated record
-            query = association_search().filter(
-                "term", _association_identifier=association_identifier
-            )
-            associated_count = query.count()
-            if associated_count > 1:
-                # GND sometimes has multiple records sharing the same BNF identifier.
-                # Disambiguate by requiring exactly one GND record with an exact BNF match.
-                exact_pids = list(
-                    dict.fromkeys(
-                        hit.pid
-                        for hit in query.source(["pid", "exactMatch"]).scan()
-                        for exact_match in hit.to_dict().get("exactMatch", [])
-                        for identified_by in exact_match.get("identifiedBy", [])
-                        if identified_by.get("source") == "BNF"
-                        and identified_by.get("type") == "bf:Nbn"
-                        and identified_by.get("value") == association_identifier
-                    )
-                )
+            if len(associated) > 1:
+                exact_pids = [pid for pid, exact_match in associated if exact_match]
                 if len(exact_pids) == 1:
                     return association_cls.get_record_by_pid(exact_pids[0])
                 current_app.logger.error(
                     f"MULTIPLE ASSOCIATIONS IDENTIFIERS FOUND FOR: {self.name} {self.pid} "
                     f"| {association_identifier}"
                 )
-            elif associated_count == 1:
-                hit = next(query.source("pid").scan())
-                return association_cls.get_record_by_pid(hit.pid)
+            elif len(associated) == 1:
+                return association_cls.get_record_by_pid(associated[0][0])
         return None
 
     @property
@@ -127,12 +113,9 @@ class ConceptIdrefRecord(ConceptRecord):
             ConceptMefRecord,
         )
 
-        ConceptGndRecord.flush_indexes()
         return {
             "identifier": self.association_identifier,
-            "record": self.get_association_record(
-                association_cls=ConceptGndRecord, association_search=ConceptGndSearch
-            ),
+            "record": self.get_association_record(association_cls=ConceptGndRecord),
             "record_cls": ConceptGndRecord,
             "search_cls": ConceptGndSearch,
             "mef_cls": ConceptMefRecord,
@@ -6,6 +6,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class ConceptIdrefIdentifier(RecordIdentifier):
     """Sequence generator for concepts Authority identifiers."""
@@ -20,7 +22,7 @@ class ConceptIdrefIdentifier(RecordIdentifier):
     )
 
 
-class ConceptIdrefMetadata(db.Model, RecordMetadataBase):
+class ConceptIdrefMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "concept_idref_metadata"
@@ -3,9 +3,6 @@
 
 """API for manipulating MEF records."""
 
-from copy import deepcopy
-
-from flask import current_app
 from invenio_search.api import RecordsSearch
 
 from rero_mef.api import EntityIndexer
@@ -102,78 +99,6 @@ class ConceptMefRecord(EntityMefRecord):
             **kwargs,
         )
 
-    def replace_refs(self):
-        """Replace $ref with real data."""
-        data = deepcopy(self)
-        data = super().replace_refs()
-        data["sources"] = [concept for concept in self.entities if data.get(concept)]
-        return data
-
-    def add_information(self, resolve=False, sources=False):
-        """Add information to record.
-
-        Sources will be also added if resolve is True.
-        :param resolve: resolve $refs
-        :param sources: Add sources information to record
-        :returns: record
-        """
-        replace_refs_data = ConceptMefRecord(deepcopy(self).replace_refs())
-        data = replace_refs_data if resolve else deepcopy(self)
-        my_sources = []
-        for concept in self.entities:
-            if concept_data := data.get(concept):
-                # we got a error status in data
-                if concept_data.get("status"):
-                    data.pop(concept)
-                    current_app.logger.error(
-                        f"MEF replace refs {data.get('pid')} {concept}"
-                        f" status: {concept_data.get('status')}"
-                        f" {concept_data.get('message')}"
-                    )
-                else:
-                    my_sources.append(concept)
-                for concept in self.entities:
-                    if metadata := replace_refs_data.get(concept, {}).get("metadata"):
-                        data[concept] = metadata
-        if my_sources and (resolve or sources):
-            data["sources"] = my_sources
-        return data
-
-    @classmethod
-    def get_latest(cls, pid_type, pid, _visited=None):
-        """Get latest Mef record for pid_type and pid.
-
-        :param pid_type: pid type to use.
-        :param pid: pid to use.
-        :param _visited: set of already-seen pids used to break redirect cycles.
-        :returns: latest record.
-        """
-        visited = _visited or set()
-        if pid in visited:
-            return {}
-        visited.add(pid)
-        search = ConceptMefSearch().filter({"term": {f"{pid_type}.pid": pid}})
-        if search.count() > 0:
-            data = next(search.scan()).to_dict()
-            new_pid = None
-            if relation_pid := data.get(pid_type, {}).get("relation_pid"):
-                if relation_pid["type"] == "redirect_to":
-                    new_pid = relation_pid["value"]
-            elif pid_type == "idref":
-                # Find new pid from redirect_pid redirect_from
-                search = ConceptMefSearch().filter(
-                    "term", idref__relation_pid__value=pid
-                )
-                if search.count() > 0:
-                    new_data = next(search.scan()).to_dict()
-                    new_pid = new_data.get("idref", {}).get("pid")
-            return (
-                cls.get_latest(pid_type=pid_type, pid=new_pid, _visited=visited)
-                if new_pid
-                else data
-            )
-        return {}
-
 
 class ConceptMefIndexer(EntityIndexer):
     """Concept MEF indexer."""
@@ -6,6 +6,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class ConceptReroIdentifier(RecordIdentifier):
     """Sequence generator for concepts Authority identifiers."""
@@ -20,7 +22,7 @@ class ConceptReroIdentifier(RecordIdentifier):
     )
 
 
-class ConceptReroMetadata(db.Model, RecordMetadataBase):
+class ConceptReroMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "concept_rero_metadata"
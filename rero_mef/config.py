@@ -246,6 +246,8 @@ OAISERVER_ID_PREFIX = "oai:mef.rero.ch:"
 RERO_MEF_OAI_LASTRUN_OVERLAP = 1  # days
 # How many times to retry the harvest request
 RERO_MEF_OAI_RETRIES = 10
+# How many harvested records are written per transaction
+RERO_MEF_OAI_BATCH_SIZE = 100
 
 # Debug
 # =====
@@ -258,6 +260,44 @@ DEBUG_TB_INTERCEPT_REDIRECTS = False
 
 # ========
 RERO_MEF_BULK_CHUNK_COUNT = 100000
+#: Rows fetched per keyset page when streaming PIDs/UUIDs from the database.
+RERO_MEF_DB_BATCH_SIZE = 10000
+#: Records written per transaction by ``EntityRecord.create_or_update_many``.
+RERO_MEF_DB_WRITE_BATCH_SIZE = 500
+#: Index refresh mode per index alias: immediate, wait_for or debounce.
+RERO_MEF_INDEX_REFRESH = {"default": "immediate"}
+#: Minimum seconds between two refreshes of an index in debounce mode.
+RERO_MEF_INDEX_REFRESH_DEBOUNCE = 1.0
+#: Queued index messages whose records are loaded together by the bulk indexer.
+RERO_MEF_INDEXER_WINDOW_SIZE = 500
+#: Buckets per request of the composite aggregations finding duplicate pids.
+RERO_MEF_COMPOSITE_SIZE = 1000
+#: Document pids returned per duplicate pid by the composite aggregations.
+RERO_MEF_DUPLICATE_HITS_SIZE = 100
+#: Parallel slices of the point in time scans.
+RERO_MEF_SCAN_SLICES = 4
+#: Documents per page of the point in time scans.
+RERO_MEF_SCAN_SIZE = 1000
+#: Keep alive of the point in time scans.
+RERO_MEF_SCAN_KEEP_ALIVE = "5m"
+#: Pids sorted together in one run of a :class:`rero_mef.pidset.PidSet`.
+RERO_MEF_PIDSET_CHUNK_SIZE = 1000000
+#: Directory of the memory mapped pid set files, None keeps them in memory.
+RERO_MEF_PIDSET_SPILL_DIR = None
+#: Serve the resolved MEF records from the ``mef_resolved`` table.
+RERO_MEF_RESOLVED_STORE = True
+#: Maximum age of a stored resolved MEF record.
+RERO_MEF_RESOLVED_STORE_MAX_AGE = timedelta(days=1)
+#: Parallel bulk requests used by ``utils reindex-direct``.
+RERO_MEF_DIRECT_INDEX_WORKERS = 4
+#: Maximum number of documents per direct bulk request.
+RERO_MEF_DIRECT_INDEX_CHUNK_SIZE = 500
+#: Maximum size in bytes of a direct bulk request.
+RERO_MEF_DIRECT_INDEX_MAX_CHUNK_BYTES = 50 * 1024 * 1024
+#: Share records fetched by pid for the duration of a Flask request.
+RERO_MEF_IDENTITY_MAP_REQUEST = False
+#: Share records fetched by pid for the duration of a Celery task.
+RERO_MEF_IDENTITY_MAP_CELERY = False
 
 TRANSFORMATION = {
     "aggnd": AgentGndTransformation,
@@ -289,10 +329,24 @@ RERO_MEF_VIAF_CONNECT_TIMEOUT = 2
 RERO_MEF_VIAF_READ_TIMEOUT = 4
 RERO_MEF_VIAF_TOTAL_TIMEOUT = 8
 RERO_MEF_VIAF_RETRIES = 0
-RERO_MEF_VIAF_REQUEST_DELAY = 5
-RERO_MEF_VIAF_REQUEST_JITTER = 2
+#: VIAF requests per second of all workers and processes, None for no limit.
+RERO_MEF_VIAF_REQUESTS_PER_SECOND = 0.2
+#: Number of VIAF requests allowed at once after an idle period.
+RERO_MEF_VIAF_REQUEST_BURST = 1
+#: Storage of the VIAF request budget, ``memory://`` for one process only.
+RERO_MEF_VIAF_RATE_LIMIT_STORAGE_URI = "redis://localhost:6379/3"
+#: Number of concurrent VIAF requests of the harvest jobs.
+RERO_MEF_VIAF_WORKERS = 4
 RERO_MEF_VIAF_RETRY_AFTER_DEFAULT = 5
 RERO_MEF_VIAF_RETRY_AFTER_MAX = 3600
+#: First re-check delay of online lookups without record by result, doubled
+#: after each consecutive miss. Results without delay are not cached.
+RERO_MEF_NEGATIVE_CACHE_TTL = {
+    "not_found": timedelta(days=7),
+    "error": timedelta(hours=1),
+}
+#: Maximum re-check delay of online lookups without record.
+RERO_MEF_NEGATIVE_CACHE_MAX_TTL = timedelta(days=180)
 RERO_MEF_AGENTS_RERO_GET_RECORD = "http://data.rero.ch/02-{id}/marcxml"
 RERO_MEF_AGENTS_GND_GET_RECORD = (
     "https://services.dnb.de/sru/authorities"
@@ -9,8 +9,11 @@ from invenio_indexer.signals import before_record_index
 from invenio_search import current_search_client
 
 from rero_mef.concepts.listener import enrich_concept_data
+from rero_mef.identity_map import init_identity_map
 from rero_mef.listener import enrich_mef_data
 from rero_mef.places.listener import enrich_place_data
+from rero_mef.refresh import init_refresh_coordinator
+from rero_mef.registry import init_entity_registry
 
 
 class REROMEFAPP:
@@ -36,7 +39,10 @@ class REROMEFAPP:
         :param app: Flask application instance.
         """
         app.extensions["rero-mef"] = self
+        self.entity_registry = init_entity_registry(app)
+        self.refresh_coordinator = init_refresh_coordinator(app)
         self.register_signals(app)
+        init_identity_map(app)
         self.ensure_all_mef_alias(app)
 
     def register_signals(self, app):
@@ -4,7 +4,17 @@
 """Invenio record extensions for RERO MEF."""
 
 from .deleted import DeletedStateExtension
+from .links import LinksExtension
 from .md5 import MD5Extension
+from .redirects import RedirectsExtension
+from .resolved import ResolvedStoreExtension
 from .schema import SchemaExtension
 
-__all__ = ["DeletedStateExtension", "MD5Extension", "SchemaExtension"]
+__all__ = [
+    "DeletedStateExtension",
+    "LinksExtension",
+    "MD5Extension",
+    "RedirectsExtension",
+    "ResolvedStoreExtension",
+    "SchemaExtension",
+]
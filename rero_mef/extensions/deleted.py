@@ -3,10 +3,10 @@
 
 """Deleted state propagation extension for MEF records."""
 
-from copy import deepcopy
-
 from invenio_records.extensions import RecordExtension
 
+from rero_mef.registry import current_entity_registry
+
 
 class DeletedStateExtension(RecordExtension):
     """Invenio record extension that propagates ``deleted`` state on MEF records.
@@ -19,24 +19,49 @@ class DeletedStateExtension(RecordExtension):
     Non-MEF records are passed through unchanged.
     """
 
+    def _sources_deleted(self, record):
+        """Get the ``deleted`` value of the source entities linked by *record*.
+
+        Only the ``deleted`` field of the referenced sources is read, with one
+        query per source record class, instead of resolving the full records.
+
+        :param record: A MEF record instance with ``entities``.
+        :returns: Dictionary entity name -> ``deleted`` value of the sources.
+        """
+        sources_deleted = {}
+        pids_by_class = {}
+        for entity_name in record.entities:
+            source = record.get(entity_name)
+            if not isinstance(source, dict):
+                continue
+            if ref := source.get("$ref"):
+                if record_class := current_entity_registry.record_class_by_ref(ref):
+                    pid = ref.rstrip("/").split("/")[-1]
+                    pids_by_class.setdefault(record_class, {})[pid] = entity_name
+            elif deleted := source.get("deleted"):
+                sources_deleted[entity_name] = deleted
+        for record_class, entity_names in pids_by_class.items():
+            for pid, deleted in record_class.get_deleted_states(entity_names).items():
+                sources_deleted[entity_names[pid]] = deleted
+        return sources_deleted
+
     def _propagate_deleted(self, record):
-        """Propagate ``deleted`` from resolved source entities to *record*.
+        """Propagate ``deleted`` from the linked source entities to *record*.
 
-        :param record: A MEF record instance with ``entities`` and ``replace_refs()``.
+        :param record: A MEF record instance with ``entities``.
         :returns: ``True`` if the record was modified, ``False`` otherwise.
         """
         changed = False
-        source_data = deepcopy(record).replace_refs()
+        sources_deleted = self._sources_deleted(record)
         # Iterate through all defined entity types (from the record's entities list)
-        if hasattr(record, "entities"):
-            for entity_name in record.entities:
-                if deleted := source_data.get(entity_name, {}).get("deleted"):
-                    record["deleted"] = deleted
-                    changed = True
-                    break
-            if not changed and record.get("deleted"):
-                record.pop("deleted")
+        for entity_name in record.entities:
+            if deleted := sources_deleted.get(entity_name):
+                record["deleted"] = deleted
                 changed = True
+                break
+        if not changed and record.get("deleted"):
+            record.pop("deleted")
+            changed = True
         return changed
 
     def _is_mef_record(self, record):
@@ -0,0 +1,28 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Link table maintenance extension for MEF and VIAF records."""
+
+from invenio_records.extensions import RecordExtension
+
+
+class LinksExtension(RecordExtension):
+    """Invenio record extension that keeps the link table of a record in sync.
+
+    The record class provides ``sync_links()`` and ``delete_links()``, e.g. MEF
+    records maintain ``mef_link`` and VIAF records ``viaf_link``. The links are
+    written in the same database transaction as the record itself, so lookups
+    see uncommitted changes.
+    """
+
+    def post_create(self, record, *args, **kwargs):
+        """Hook called after a new record is persisted."""
+        record.sync_links()
+
+    def post_commit(self, record, *args, **kwargs):
+        """Hook called after an existing record is committed."""
+        record.sync_links()
+
+    def post_delete(self, record, *args, **kwargs):
+        """Hook called after a record is deleted."""
+        record.delete_links()
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Redirect graph maintenance extension for source records."""
+
+from invenio_records.extensions import RecordExtension
+
+from rero_mef.redirects import sync_redirects
+
+
+class RedirectsExtension(RecordExtension):
+    """Invenio record extension that keeps ``source_redirect`` in sync.
+
+    The ``relation_pid`` of source records is written to the redirect graph in
+    the transaction of the record change. MEF and VIAF records are ignored.
+    """
+
+    def _sync(self, record, relation_pid):
+        """Write the redirect edges of *record*.
+
+        :param record: Changed record.
+        :param relation_pid: ``relation_pid`` to store, None to remove.
+        """
+        if not record.pid or not record.provider:
+            return
+        if record.provider.pid_type == "viaf":
+            return
+        if getattr(type(record), "mef_type", None):
+            return
+        sync_redirects(record.provider.pid_type, record.pid, relation_pid)
+
+    def post_create(self, record, *args, **kwargs):
+        """Hook called after a new record is persisted."""
+        self._sync(record, record.get("relation_pid"))
+
+    def post_commit(self, record, *args, **kwargs):
+        """Hook called after an existing record is committed."""
+        self._sync(record, record.get("relation_pid"))
+
+    def post_delete(self, record, *args, **kwargs):
+        """Hook called after a record is deleted."""
+        self._sync(record, None)
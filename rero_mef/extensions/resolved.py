@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Resolved MEF document invalidation extension."""
+
+from invenio_db import db
+from invenio_records.extensions import RecordExtension
+from sqlalchemy import literal, null, select
+from sqlalchemy.dialects import postgresql
+
+from rero_mef.models import MefLink, MefResolved
+
+
+class ResolvedStoreExtension(RecordExtension):
+    """Invenio record extension that invalidates the resolved MEF documents.
+
+    A change of a MEF record clears its resolved document. A change of a
+    source record clears the resolved documents of the MEF records linking it
+    in ``mef_link``. A cleared row keeps an incremented ``generation``, so a
+    document resolved from the data before the change is not stored again.
+    VIAF records are not part of the resolved documents and are ignored. The
+    rows are written in the transaction of the record change.
+    """
+
+    def _invalidate(self, record):
+        """Clear the resolved documents depending on *record*.
+
+        :param record: Changed record.
+        """
+        if not record.pid or not record.provider:
+            return
+        if record.provider.pid_type == "viaf":
+            return
+        if mef_type := getattr(type(record), "mef_type", None):
+            linked = select(literal(mef_type), literal(record.pid))
+        else:
+            linked = select(MefLink.mef_type, MefLink.mef_pid).where(
+                MefLink.source_name == record.name, MefLink.source_pid == record.pid
+            )
+        query = postgresql.insert(MefResolved).from_select(
+            ["mef_type", "mef_pid", "generation"], linked.add_columns(literal(1))
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[MefResolved.mef_type, MefResolved.mef_pid],
+            set_={"generation": MefResolved.generation + 1, "json": null()},
+        )
+        db.session.execute(query)
+
+    def post_create(self, record, *args, **kwargs):
+        """Hook called after a new record is persisted."""
+        self._invalidate(record)
+
+    def post_commit(self, record, *args, **kwargs):
+        """Hook called after an existing record is committed."""
+        self._invalidate(record)
+
+    def post_delete(self, record, *args, **kwargs):
+        """Hook called after a record is deleted."""
+        self._invalidate(record)
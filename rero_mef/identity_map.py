@@ -0,0 +1,186 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Unit-of-work scoped record identity map.
+
+While a map is active, ``EntityRecord.get_record_by_pid`` returns a copy of
+the already loaded record for a ``(pid_type, pid)`` pair instead of querying
+the database again. Changes of a returned record do not leak to the other
+readers. Entries are dropped on ``update``, ``replace`` and ``delete`` and all
+entries on a rollback of the database session.
+
+A map is activated explicitly with :func:`identity_map`, or per Flask request
+and per Celery task when ``RERO_MEF_IDENTITY_MAP_REQUEST`` respectively
+``RERO_MEF_IDENTITY_MAP_CELERY`` are enabled.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+
+from celery.signals import task_postrun, task_prerun
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_current_map = ContextVar("rero_mef_identity_map", default=None)
+
+
+class RecordIdentityMap:
+    """Cache of records keyed by ``(pid_type, pid)``."""
+
+    def __init__(self):
+        """Initialize an empty identity map."""
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _copy(record):
+        """Copy a record sharing its database model.
+
+        :param record: Record to copy.
+        :returns: New record instance with a deep copy of the data.
+        """
+        return record.__class__(deepcopy(dict(record)), model=record.model)
+
+    def get(self, pid_type, pid):
+        """Get a copy of a cached record and count the hit or miss.
+
+        :param pid_type: PID type of the record.
+        :param pid: PID value of the record.
+        :returns: A copy of the cached record or None.
+        """
+        record = self.records.get((pid_type, pid))
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._copy(record)
+
+    def add(self, pid_type, pid, record):
+        """Cache a copy of a record.
+
+        :param pid_type: PID type of the record.
+        :param pid: PID value of the record.
+        :param record: Record to cache.
+        """
+        self.records[(pid_type, pid)] = self._copy(record)
+
+    def invalidate(self, pid_type, pid):
+        """Drop a cached record.
+
+        :param pid_type: PID type of the record.
+        :param pid: PID value of the record.
+        """
+        self.records.pop((pid_type, pid), None)
+
+    def clear(self):
+        """Drop all cached records."""
+        self.records.clear()
+
+    @property
+    def stats(self):
+        """Get hit and miss counters.
+
+        :returns: Dictionary with hits, misses and cached record count.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.records)}
+
+
+def current_identity_map():
+    """Get the identity map of the current unit of work.
+
+    :returns: The active RecordIdentityMap or None.
+    """
+    return _current_map.get()
+
+
+@contextmanager
+def identity_map():
+    """Activate a record identity map for the enclosed block.
+
+    Nested blocks reuse the already active map.
+
+    :yields: The active RecordIdentityMap.
+    """
+    if (active_map := _current_map.get()) is not None:
+        yield active_map
+        return
+    token = _current_map.set(RecordIdentityMap())
+    try:
+        yield _current_map.get()
+    finally:
+        _close_identity_map(token)
+
+
+def _close_identity_map(token):
+    """Deactivate the identity map bound to a context token.
+
+    :param token: Token returned by setting the context variable.
+    """
+    active_map = _current_map.get()
+    if active_map is not None and has_app_context():
+        current_app.logger.debug(f"Record identity map: {active_map.stats}")
+    _current_map.reset(token)
+
+
+def _open_request_map():
+    """Activate an identity map for the current Flask request."""
+    g.rero_mef_identity_map_token = _current_map.set(RecordIdentityMap())
+
+
+def _close_request_map(exc=None):
+    """Deactivate the identity map of the current Flask request.
+
+    :param exc: Exception raised during the request, if any.
+    """
+    if (token := g.pop("rero_mef_identity_map_token", None)) is not None:
+        _close_identity_map(token)
+
+
+_task_tokens = {}
+
+
+def _open_task_map(task_id=None, **kwargs):
+    """Activate an identity map for a Celery task.
+
+    :param task_id: Id of the task being run.
+    """
+    _task_tokens[task_id] = _current_map.set(RecordIdentityMap())
+
+
+def _close_task_map(task_id=None, **kwargs):
+    """Deactivate the identity map of a Celery task.
+
+    :param task_id: Id of the task that has run.
+    """
+    if (token := _task_tokens.pop(task_id, None)) is not None:
+        _close_identity_map(token)
+
+
+def _clear_on_rollback(session, previous_transaction):
+    """Clear the active identity map when the database session rolls back.
+
+    :param session: Rolled back session.
+    :param previous_transaction: Transaction that was rolled back.
+    """
+    if (active_map := _current_map.get()) is not None:
+        active_map.clear()
+
+
+def init_identity_map(app):
+    """Register the request and task scoped identity maps if enabled.
+
+    The active map of any scope is cleared on session rollbacks.
+
+    :param app: Flask application instance.
+    """
+    if not event.contains(Session, "after_soft_rollback", _clear_on_rollback):
+        event.listen(Session, "after_soft_rollback", _clear_on_rollback)
+    if app.config.get("RERO_MEF_IDENTITY_MAP_REQUEST"):
+        app.before_request(_open_request_map)
+        app.teardown_request(_close_request_map)
+    if app.config.get("RERO_MEF_IDENTITY_MAP_CELERY"):
+        task_prerun.connect(_open_task_map, weak=False)
+        task_postrun.connect(_close_task_map, weak=False)
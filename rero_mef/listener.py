@@ -3,12 +3,10 @@
 
 """Signals connector for MEF records (agents, concepts, places)."""
 
-from flask import current_app
-
 from rero_mef.agents.mef.api import AgentMefSearch
 from rero_mef.concepts.mef.api import ConceptMefSearch
 from rero_mef.places.mef.api import PlaceMefSearch
-from rero_mef.utils import get_entity_class
+from rero_mef.registry import current_entity_registry
 
 _MEF_INDEX_TO_ENTITY = {
     AgentMefSearch.Meta.index: "agents",
@@ -30,16 +28,7 @@ def _get_entity_class_by_ref(ref_url):
     :param ref_url: The $ref URL string.
     :returns: Record class or None.
     """
-    parts = ref_url.rstrip("/").split("/")
-    if len(parts) < 3:
-        return None
-    # Reconstruct the list_route as "/<group>/<type>/"
-    route = f"/{parts[-3]}/{parts[-2]}/"
-    endpoints = current_app.config.get("RECORDS_REST_ENDPOINTS", {})
-    key = next(
-        (k for k, cfg in endpoints.items() if cfg.get("list_route") == route), None
-    )
-    return get_entity_class(key) if key else None
+    return current_entity_registry.record_class_by_ref(ref_url)
 
 
 def _find_source_type(entity_name, pid):
@@ -52,14 +41,7 @@ def _find_source_type(entity_name, pid):
     :param pid: PID to look up.
     :returns: bf:type string, or None if not found anywhere.
     """
-    endpoints = current_app.config.get("RECORDS_REST_ENDPOINTS", {})
-    suffix = f"/{entity_name}/"
-    for key, cfg in endpoints.items():
-        if not cfg.get("list_route", "").endswith(suffix):
-            continue
-        rec_class = get_entity_class(key)
-        if rec_class is None:
-            continue
+    for rec_class in current_entity_registry.record_classes_by_source(entity_name):
         rec = rec_class.get_record_by_pid(pid)
         if rec is not None:
             return rec.get("type")
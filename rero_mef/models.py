@@ -5,6 +5,9 @@
 
 from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
+from sqlalchemy import Computed, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declared_attr
 
 
 class MefIdentifier(RecordIdentifier):
@@ -18,3 +21,127 @@ class MefIdentifier(RecordIdentifier):
         primary_key=True,
         autoincrement=True,
     )
+
+
+class MD5MetadataMixin:
+    """Expose the record md5 as an indexed column of a metadata table.
+
+    The column is generated by PostgreSQL from ``json ->> 'md5'``, so it stays in
+    sync with bulk ``COPY`` loads. Together with the ``(id, md5)`` index it allows
+    change detection without reading the JSON documents.
+    """
+
+    md5 = db.Column(
+        db.String(32), Computed("json ->> 'md5'", persisted=True), nullable=True
+    )
+
+    @declared_attr
+    def __table_args__(cls):  # noqa: N805
+        """Index the md5 column together with the record id."""
+        return (db.Index(f"ix_{cls.__tablename__}_id_md5", "id", "md5"),)
+
+
+class MefLink(db.Model):
+    """Link of a source record to the MEF record clustering it.
+
+    Maintained on MEF record create, commit and delete by ``LinksExtension``.
+    The primary key serves ``EntityMefRecord.get_mef`` lookups by source pid;
+    a source linked by several MEF records has one row per MEF record.
+    """
+
+    __tablename__ = "mef_link"
+
+    mef_type = db.Column(db.String(16), primary_key=True)
+    source_name = db.Column(db.String(16), primary_key=True)
+    source_pid = db.Column(db.String(255), primary_key=True)
+    mef_pid = db.Column(db.String(255), primary_key=True)
+
+    __table_args__ = (db.Index("ix_mef_link_mef_pid", "mef_type", "mef_pid"),)
+
+
+class MefResolved(db.Model):
+    """Resolved JSON of a MEF record, see ``EntityMefRecord.get_resolved_many``.
+
+    ``version`` is the revision of the MEF record the JSON was resolved from.
+    ``ResolvedStoreExtension`` clears the JSON and increments ``generation``
+    when the MEF record or one of the source records linked in ``mef_link``
+    changes. A resolved JSON is only stored if the generation read before the
+    resolution is still current.
+    """
+
+    __tablename__ = "mef_resolved"
+
+    mef_type = db.Column(db.String(16), primary_key=True)
+    mef_pid = db.Column(db.String(255), primary_key=True)
+    version = db.Column(db.Integer, nullable=True)
+    generation = db.Column(db.Integer, nullable=False, server_default="0")
+    created = db.Column(db.DateTime, nullable=False, server_default=func.now())
+    json = db.Column(
+        db.JSON().with_variant(JSONB(none_as_null=True), "postgresql"),
+        nullable=True,
+    )
+
+
+class SourceRedirect(db.Model):
+    """Redirect of a source pid to a newer pid, see :mod:`rero_mef.redirects`.
+
+    ``redirect_to`` is the next pid of the chain and ``final_target`` its last
+    pid, None for a cycle. Rows are maintained by ``RedirectsExtension`` when
+    source records with ``relation_pid`` change.
+    """
+
+    __tablename__ = "source_redirect"
+
+    pid_type = db.Column(db.String(16), primary_key=True)
+    pid = db.Column(db.String(255), primary_key=True)
+    relation_type = db.Column(db.String(16), primary_key=True)
+    redirect_to = db.Column(db.String(255), primary_key=True)
+    final_target = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_source_redirect_redirect_to", "pid_type", "redirect_to"),
+    )
+
+
+class AssociationIdentifier(db.Model):
+    """Association identifier of a concept or place source record.
+
+    Maintained on source record create, commit and delete by
+    ``LinksExtension``. The primary key serves
+    ``ConceptPlaceRecord.get_association_record`` lookups by identifier;
+    ``exact_match`` flags GND records with an exact BNF match of it.
+    """
+
+    __tablename__ = "association_identifier"
+
+    entity_group = db.Column(db.String(16), primary_key=True)
+    source_name = db.Column(db.String(16), primary_key=True)
+    association_identifier = db.Column(db.String(255), primary_key=True)
+    pid = db.Column(db.String(255), primary_key=True)
+    exact_match = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index("ix_association_identifier_pid", "entity_group", "source_name", "pid"),
+    )
+
+
+class NegativeLookup(db.Model):
+    """Online lookup without record, see :mod:`rero_mef.negative_cache`.
+
+    ``result`` is ``not_found`` or ``error``, ``failures`` the number of
+    consecutive misses. The lookup is not sent again before ``retry_after``.
+    """
+
+    __tablename__ = "negative_lookup"
+
+    service = db.Column(db.String(16), primary_key=True)
+    source_code = db.Column(db.String(16), primary_key=True)
+    pid = db.Column(db.String(255), primary_key=True)
+    result = db.Column(db.String(16), nullable=False)
+    failures = db.Column(db.Integer, nullable=False, default=1)
+    checked = db.Column(db.DateTime, nullable=False)
+    retry_after = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_negative_lookup_retry_after", "service", "retry_after"),
+    )
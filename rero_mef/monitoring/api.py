@@ -11,7 +11,8 @@ from flask import current_app
 from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_search import RecordsSearch
 
-from ..utils import get_entity_class, get_mefs_endpoints, progressbar
+from ..pidset import PidSet
+from ..utils import get_entity_class, get_mefs_endpoints, progressbar, scan_index
 
 
 class Monitoring:
@@ -90,15 +91,17 @@ class Monitoring:
         pids_db = []
         if index:
             date = datetime.now(UTC) - timedelta(minutes=self.time_delta)
-            pids_es = {}
+            pids_es = PidSet()
             query = RecordsSearch(index=index).filter("range", _created={"lte": date})
             progress = progressbar(
-                items=query.source("pid").scan(), length=query.count(), verbose=verbose
+                items=scan_index(query, fields=["pid"], index=index),
+                length=query.count(),
+                verbose=verbose,
             )
             for hit in progress:
-                if pids_es.get(hit.pid):
+                if hit.pid in pids_es:
                     pids_es_double.append(hit.pid)
-                pids_es[hit.pid] = 1
+                pids_es.add(hit.pid)
             agent_class = get_entity_class(doc_type)
             pids_db = []
             progress = progressbar(
@@ -109,12 +112,13 @@ class Monitoring:
                 length=agent_class.count(with_deleted=with_deleted),
                 verbose=verbose,
             )
+            pids_found = PidSet()
             for pid in progress:
-                if pids_es.get(pid):
-                    pids_es.pop(pid)
+                if pid in pids_es:
+                    pids_found.add(pid)
                 else:
                     pids_db.append(pid)
-            pids_es = list(pids_es)
+            pids_es = list(pids_es - pids_found)
         return pids_es, pids_db, pids_es_double, index
 
     def info(self, with_deleted=False, difference_db_es=False):
@@ -0,0 +1,186 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Negative cache of the online lookups.
+
+Lookups of external services that returned no record are stored in the
+``negative_lookup`` table by ``(service, source_code, pid)``. They are not
+sent again before a re-check delay that starts at the TTL of the result in
+``RERO_MEF_NEGATIVE_CACHE_TTL`` and doubles after each consecutive miss, up to
+``RERO_MEF_NEGATIVE_CACHE_MAX_TTL``. A found record removes the entry.
+
+Rows are written in their own transaction: lookups run inside record
+transactions and in the worker threads of the VIAF harvest.
+"""
+
+import contextlib
+from datetime import UTC, datetime
+from functools import wraps
+
+from flask import current_app
+from invenio_db import db
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .models import NegativeLookup
+
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+
+def _now():
+    """Get the current naive UTC date of the table columns."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _key(service, source_code, pid):
+    """Get the primary key condition of a lookup."""
+    return (
+        NegativeLookup.service == service,
+        NegativeLookup.source_code == source_code,
+        NegativeLookup.pid == str(pid),
+    )
+
+
+class MissMessage(str):
+    """Message of an online getter for a lookup without record.
+
+    The message keeps the result of the lookup in ``result``: ``NOT_FOUND``
+    for a definitive answer, ``ERROR`` otherwise.
+    """
+
+    def __new__(cls, msg, result=ERROR):
+        """Create the message.
+
+        :param msg: Message.
+        :param result: ``NOT_FOUND`` or ``ERROR``.
+        """
+        message = super().__new__(cls, msg)
+        message.result = result
+        return message
+
+
+def miss_result(msg):
+    """Get the result of a lookup without record from its message.
+
+    :param msg: Message of the online getter.
+    :returns: ``NOT_FOUND`` for a definitive answer, ``ERROR`` otherwise.
+    """
+    return getattr(msg, "result", ERROR)
+
+
+def recheck_delay(result, failures):
+    """Get the delay before a lookup is sent again.
+
+    :param result: ``NOT_FOUND`` or ``ERROR``.
+    :param failures: Number of consecutive misses.
+    :returns: Delay or None if the result is not cached.
+    """
+    ttl = current_app.config.get("RERO_MEF_NEGATIVE_CACHE_TTL", {}).get(result)
+    if not ttl:
+        return None
+    max_ttl = current_app.config.get("RERO_MEF_NEGATIVE_CACHE_MAX_TTL", ttl)
+    # the exponent is bounded to stay in the range of timedelta
+    return min(ttl * 2 ** min(failures - 1, 16), max(ttl, max_ttl))
+
+
+def is_cached_miss(service, source_code, pid):
+    """Test if a lookup is a miss not due for a re-check.
+
+    :param service: Service name.
+    :param source_code: Source code of the pid.
+    :param pid: Looked up pid.
+    :returns: True if the lookup must not be sent.
+    """
+    query = select(NegativeLookup.retry_after).where(
+        *_key(service, source_code, pid), NegativeLookup.retry_after > _now()
+    )
+    with db.engine.connect() as connection:
+        return connection.execute(query).first() is not None
+
+
+def get_cached_misses(service):
+    """Get the misses of a service not due for a re-check.
+
+    :param service: Service name.
+    :returns: Set of ``(source_code, pid)`` tuples.
+    """
+    query = select(NegativeLookup.source_code, NegativeLookup.pid).where(
+        NegativeLookup.service == service, NegativeLookup.retry_after > _now()
+    )
+    with db.engine.connect() as connection:
+        return {tuple(row) for row in connection.execute(query)}
+
+
+def record_miss(service, source_code, pid, result):
+    """Record a lookup without record.
+
+    :param service: Service name.
+    :param source_code: Source code of the pid.
+    :param pid: Looked up pid.
+    :param result: ``NOT_FOUND`` or ``ERROR``.
+    """
+    key = _key(service, source_code, pid)
+    # a concurrent process recorded the same miss
+    with contextlib.suppress(IntegrityError), db.engine.begin() as connection:
+        row = connection.execute(
+            select(NegativeLookup.result, NegativeLookup.failures).where(*key)
+        ).first()
+        failures = row.failures + 1 if row and row.result == result else 1
+        if not (delay := recheck_delay(result, failures)):
+            return
+        now = _now()
+        values = {
+            "result": result,
+            "failures": failures,
+            "checked": now,
+            "retry_after": now + delay,
+        }
+        if row:
+            connection.execute(update(NegativeLookup).where(*key).values(values))
+        else:
+            connection.execute(
+                insert(NegativeLookup).values(
+                    service=service, source_code=source_code, pid=str(pid), **values
+                )
+            )
+
+
+def clear_miss(service, source_code, pid):
+    """Remove a lookup that found a record.
+
+    :param service: Service name.
+    :param source_code: Source code of the pid.
+    :param pid: Looked up pid.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(
+            delete(NegativeLookup).where(*_key(service, source_code, pid))
+        )
+
+
+def negative_cached(getter):
+    """Consult the negative cache in ``get_online_record`` of a source class.
+
+    The service is the pid type and the source code the name of the class.
+    The getter returns a ``MissMessage`` for a lookup without record. With
+    ``use_cache=False`` the cached misses are ignored, the result of the
+    lookup is still stored.
+
+    :param getter: ``get_online_record(cls, id_, debug=False)`` function.
+    :returns: Decorated function.
+    """
+
+    @wraps(getter)
+    def get_online_record(cls, id_, debug=False, use_cache=True):
+        service = cls.provider.pid_type
+        if use_cache and is_cached_miss(service, cls.name, id_):
+            return None, f"{service} get: {id_:<15} | NO RECORD (cached)"
+        data, msg = getter(cls, id_, debug=debug)
+        if data:
+            clear_miss(service, cls.name, id_)
+        else:
+            record_miss(service, cls.name, id_, miss_result(msg))
+        return data, msg
+
+    return get_online_record
@@ -0,0 +1,275 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Compact set of pids for the reconciliation jobs.
+
+Most pids are a number with an optional prefix and suffix (``12391664X``,
+``A023655346``). They are stored as 8 bytes integers in sorted arrays, one
+array per prefix, suffix and zero padded width. The other pids are kept in a
+plain set of strings. Sorted arrays can be spilled to memory mapped temporary
+files to keep very large sets out of the Python heap.
+"""
+
+import mmap
+import re
+import tempfile
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from itertools import batched
+
+from flask import current_app, has_app_context
+
+PID_REGEX = re.compile(r"([^0-9]*)([0-9]{1,19})([^0-9]*)")
+
+
+def _config(name, default):
+    """Get a configuration value, the default outside of an application.
+
+    :param name: Configuration name.
+    :param default: Default value.
+    :returns: Configuration value.
+    """
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _encode(pid):
+    """Split a pid in a key and an integer value.
+
+    :param pid: Pid to encode.
+    :returns: Tuple ``((prefix, width, suffix), value)`` or None if the pid
+        is not numeric.
+    """
+    pid = str(pid)
+    if match := PID_REGEX.fullmatch(pid):
+        prefix, digits, suffix = match.groups()
+        width = len(digits) if digits[0] == "0" and len(digits) > 1 else 0
+        return (prefix, width, suffix), int(digits)
+    return None
+
+
+def _decode(key, value):
+    """Build a pid back from its key and value.
+
+    :param key: Tuple ``(prefix, width, suffix)``.
+    :param value: Integer value.
+    :returns: Pid.
+    """
+    prefix, width, suffix = key
+    return f"{prefix}{value:0{width}d}{suffix}"
+
+
+def _unique(values):
+    """Remove consecutive duplicates from sorted values."""
+    previous = None
+    for value in values:
+        if value != previous:
+            yield value
+            previous = value
+
+
+def _difference(left, right):
+    """Sorted values of left not in right."""
+    right = iter(right)
+    current = next(right, None)
+    for value in left:
+        while current is not None and current < value:
+            current = next(right, None)
+        if current != value:
+            yield value
+
+
+def _intersection(left, right):
+    """Sorted values both in left and right."""
+    right = iter(right)
+    current = next(right, None)
+    for value in left:
+        while current is not None and current < value:
+            current = next(right, None)
+        if current is None:
+            return
+        if current == value:
+            yield value
+
+
+class _SortedInts:
+    """Sorted unique integers built from sorted runs."""
+
+    def __init__(self, chunk_size, spill_dir):
+        """Initialize the integers.
+
+        :param chunk_size: Pending values sorted together in one run.
+        :param spill_dir: Directory of the memory mapped runs, None to keep
+            the runs in memory.
+        """
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.pending = set()
+        self.runs = []
+
+    def add(self, value):
+        """Add a value."""
+        self.pending.add(value)
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Sort the pending values in a new run."""
+        if self.pending:
+            self.runs.append(self.store(sorted(self.pending)))
+            self.pending = set()
+
+    def store(self, values):
+        """Store sorted values in an array or a memory mapped file.
+
+        :param values: Iterable of sorted values.
+        :returns: Sequence of the values.
+        """
+        if not self.spill_dir:
+            return array("Q", values)
+        with tempfile.TemporaryFile(dir=self.spill_dir) as spill_file:
+            for chunk in batched(values, self.chunk_size):
+                array("Q", chunk).tofile(spill_file)
+            spill_file.flush()
+            if not spill_file.tell():
+                return array("Q")
+            spill_map = mmap.mmap(spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(spill_map).cast("Q")
+
+    def values(self):
+        """Get all values merged in one sorted run.
+
+        :returns: Sequence of the sorted unique values.
+        """
+        self.flush()
+        if len(self.runs) > 1:
+            self.runs = [self.store(_unique(merge(*self.runs)))]
+        return self.runs[0] if self.runs else array("Q")
+
+    def __contains__(self, value):
+        """Check the pending values and all runs."""
+        if value in self.pending:
+            return True
+        for run in self.runs:
+            idx = bisect_left(run, value)
+            if idx < len(run) and run[idx] == value:
+                return True
+        return False
+
+
+class PidSet:
+    """Memory efficient set of pids.
+
+    Numeric pids take 8 bytes each and other pids are kept as strings.
+    Membership can be tested while the set is built, the sorted runs are
+    merged on the first call to :func:`len`, iteration or a set operation.
+    """
+
+    def __init__(self, pids=None, chunk_size=None, spill_dir=None):
+        """Initialize the set.
+
+        :param pids: Iterable of pids to add.
+        :param chunk_size: Pids sorted together in one run, defaults to
+            ``RERO_MEF_PIDSET_CHUNK_SIZE``.
+        :param spill_dir: Directory of the memory mapped files, defaults to
+            ``RERO_MEF_PIDSET_SPILL_DIR``. None keeps the pids in memory.
+        """
+        self.chunk_size = chunk_size or _config("RERO_MEF_PIDSET_CHUNK_SIZE", 1000000)
+        self.spill_dir = spill_dir or _config("RERO_MEF_PIDSET_SPILL_DIR", None)
+        self._numbers = {}
+        self._strings = set()
+        if pids is not None:
+            self.update(pids)
+
+    def _new(self):
+        """Create an empty set with the same settings."""
+        return PidSet(chunk_size=self.chunk_size, spill_dir=self.spill_dir)
+
+    def _column(self, key):
+        """Get or create the integers of a key."""
+        if key not in self._numbers:
+            self._numbers[key] = _SortedInts(self.chunk_size, self.spill_dir)
+        return self._numbers[key]
+
+    def add(self, pid):
+        """Add a pid.
+
+        :param pid: Pid to add.
+        """
+        if encoded := _encode(pid):
+            key, value = encoded
+            self._column(key).add(value)
+        else:
+            self._strings.add(str(pid))
+
+    def update(self, pids):
+        """Add pids.
+
+        :param pids: Iterable of pids to add.
+        """
+        for pid in pids:
+            self.add(pid)
+
+    def __contains__(self, pid):
+        """Check if a pid is in the set."""
+        if encoded := _encode(pid):
+            key, value = encoded
+            return key in self._numbers and value in self._numbers[key]
+        return str(pid) in self._strings
+
+    def __len__(self):
+        """Number of pids in the set."""
+        return len(self._strings) + sum(
+            len(column.values()) for column in self._numbers.values()
+        )
+
+    def __iter__(self):
+        """Iterate over the pids, numeric pids are sorted by key."""
+        for key, column in self._numbers.items():
+            for value in column.values():
+                yield _decode(key, value)
+        yield from self._strings
+
+    def _combine(self, other, operation, keys):
+        """Combine the integers of two sets key by key.
+
+        :param other: Other set.
+        :param operation: Function merging two sorted sequences.
+        :param keys: Keys to combine.
+        :returns: New set.
+        """
+        result = self._new()
+        empty = array("Q")
+        for key in keys:
+            left = self._numbers[key].values()
+            right = other._numbers[key].values() if key in other._numbers else empty
+            column = result._column(key)
+            if run := column.store(operation(left, right)):
+                column.runs.append(run)
+        return result
+
+    def difference(self, other):
+        """Pids of this set not in the other set.
+
+        :param other: Other set.
+        :returns: New set.
+        """
+        result = self._combine(other, _difference, list(self._numbers))
+        result._strings = self._strings - other._strings
+        return result
+
+    def intersection(self, other):
+        """Pids both in this set and the other set.
+
+        :param other: Other set.
+        :returns: New set.
+        """
+        keys = [key for key in self._numbers if key in other._numbers]
+        result = self._combine(other, _intersection, keys)
+        result._strings = self._strings & other._strings
+        return result
+
+    __sub__ = difference
+    __and__ = intersection
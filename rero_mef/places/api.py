@@ -9,6 +9,7 @@ class PlaceRecord(ConceptPlaceRecord):
     """Place record class."""
 
     name = None
+    entity_group = "places"
 
     @classmethod
     def create(
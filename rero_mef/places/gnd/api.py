@@ -5,6 +5,7 @@
 
 from invenio_search.api import RecordsSearch
 
+from rero_mef.negative_cache import negative_cached
 from rero_mef.places.api import PlaceIndexer, PlaceRecord
 
 from .fetchers import gnd_id_fetcher
@@ -40,6 +41,7 @@ class PlaceGndRecord(PlaceRecord):
     search = PlaceGndSearch
 
     @classmethod
+    @negative_cached
     def get_online_record(cls, id_, debug=False):
         """Get online Record.
 
@@ -61,12 +63,9 @@ class PlaceGndRecord(PlaceRecord):
         """Get associated record."""
         from rero_mef.places import PlaceIdrefRecord, PlaceIdrefSearch, PlaceMefRecord
 
-        PlaceIdrefRecord.flush_indexes()
         return {
             "identifier": self.association_identifier,
-            "record": self.get_association_record(
-                association_cls=PlaceIdrefRecord, association_search=PlaceIdrefSearch
-            ),
+            "record": self.get_association_record(association_cls=PlaceIdrefRecord),
             "record_cls": PlaceIdrefRecord,
             "search_cls": PlaceIdrefSearch,
             "mef_cls": PlaceMefRecord,
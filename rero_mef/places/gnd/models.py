@@ -6,6 +6,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class PlaceGndIdentifier(RecordIdentifier):
     """Sequence generator for places Authority identifiers."""
@@ -20,7 +22,7 @@ class PlaceGndIdentifier(RecordIdentifier):
     )
 
 
-class PlaceGndMetadata(db.Model, RecordMetadataBase):
+class PlaceGndMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "place_gnd_metadata"
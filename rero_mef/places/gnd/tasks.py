@@ -10,6 +10,7 @@ from pymarc.marcxml import parse_xml_to_array
 from six import BytesIO
 
 from ...marctojson.do_gnd_places import Transformation
+from ...negative_cache import ERROR, NOT_FOUND, MissMessage
 from ...utils import (
     MyOAIItemIterator,
     SickleWithRetries,
@@ -108,11 +109,16 @@ def gnd_get_record(id_, debug=False):
                 trans_record = Transformation(records[0]).json
                 pid = trans_record.get("pid")
                 if id_ != pid:
-                    return None, f"{msg} | PID changed: {id_} -> {pid}"
+                    return None, MissMessage(
+                        f"{msg} | PID changed: {id_} -> {pid}", NOT_FOUND
+                    )
                 return trans_record, f"{msg} | OK"
-            return None, f"{msg} | No record"
-        return None, f"{msg} | HTTP Error: {status_code}"
+            return None, MissMessage(f"{msg} | No record", NOT_FOUND)
+        return None, MissMessage(
+            f"{msg} | HTTP Error: {status_code}",
+            NOT_FOUND if status_code == requests.codes.not_found else ERROR,
+        )
     except Exception as err:
         if debug:
             raise
-        return None, f"{msg} | Error: {err}"
+        return None, MissMessage(f"{msg} | Error: {err}", ERROR)
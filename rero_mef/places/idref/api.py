@@ -6,6 +6,7 @@
 from flask import current_app
 from invenio_search.api import RecordsSearch
 
+from rero_mef.negative_cache import negative_cached
 from rero_mef.places.api import PlaceIndexer, PlaceRecord
 
 from .fetchers import idref_id_fetcher
@@ -41,6 +42,7 @@ class PlaceIdrefRecord(PlaceRecord):
     search = PlaceIdrefSearch
 
     @classmethod
+    @negative_cached
     def get_online_record(cls, id_, debug=False):
         """Get online Record.
 
@@ -78,11 +80,8 @@ class PlaceIdrefRecord(PlaceRecord):
         """Get associated record."""
         from rero_mef.places import PlaceGndRecord, PlaceGndSearch, PlaceMefRecord
 
-        PlaceGndRecord.flush_indexes()
         return {
-            "record": self.get_association_record(
-                association_cls=PlaceGndRecord, association_search=PlaceGndSearch
-            ),
+            "record": self.get_association_record(association_cls=PlaceGndRecord),
             "record_cls": PlaceGndRecord,
             "search_cls": PlaceGndSearch,
             "mef_cls": PlaceMefRecord,
@@ -6,6 +6,8 @@ from invenio_db import db
 from invenio_pidstore.models import RecordIdentifier
 from invenio_records.models import RecordMetadataBase
 
+from rero_mef.models import MD5MetadataMixin
+
 
 class PlaceIdrefIdentifier(RecordIdentifier):
     """Sequence generator for places Authority identifiers."""
@@ -20,7 +22,7 @@ class PlaceIdrefIdentifier(RecordIdentifier):
     )
 
 
-class PlaceIdrefMetadata(db.Model, RecordMetadataBase):
+class PlaceIdrefMetadata(db.Model, RecordMetadataBase, MD5MetadataMixin):
     """Represent a record metadata."""
 
     __tablename__ = "place_idref_metadata"
@@ -3,9 +3,6 @@
 
 """API for manipulating MEF records."""
 
-from copy import deepcopy
-
-from flask import current_app
 from invenio_search.api import RecordsSearch
 
 from rero_mef.api import EntityIndexer
@@ -80,76 +77,6 @@ class PlaceMefRecord(EntityMefRecord):
             **kwargs,
         )
 
-    def replace_refs(self):
-        """Replace $ref with real data."""
-        data = deepcopy(self)
-        data = super().replace_refs()
-        data["sources"] = [place for place in self.entities if data.get(place)]
-        return data
-
-    def add_information(self, resolve=False, sources=False):
-        """Add information to record.
-
-        Sources will be also added if resolve is True.
-        :param resolve: resolve $refs
-        :param sources: Add sources information to record
-        :returns: record
-        """
-        replace_refs_data = PlaceMefRecord(deepcopy(self).replace_refs())
-        data = replace_refs_data if resolve else deepcopy(self)
-        my_sources = []
-        for place in self.entities:
-            if place_data := data.get(place):
-                # we got a error status in data
-                if place_data.get("status"):
-                    data.pop(place)
-                    current_app.logger.error(
-                        f"MEF replace refs {data.get('pid')} {place}"
-                        f" status: {place_data.get('status')}"
-                        f" {place_data.get('message')}"
-                    )
-                else:
-                    my_sources.append(place)
-                for place in self.entities:
-                    if metadata := replace_refs_data.get(place, {}).get("metadata"):
-                        data[place] = metadata
-        if my_sources and (resolve or sources):
-            data["sources"] = my_sources
-        return data
-
-    @classmethod
-    def get_latest(cls, pid_type, pid, _visited=None):
-        """Get latest Mef record for pid_type and pid.
-
-        :param pid_type: pid type to use.
-        :param pid: pid to use.
-        :param _visited: set of already-seen pids used to break redirect cycles.
-        :returns: latest record.
-        """
-        visited = _visited or set()
-        if pid in visited:
-            return {}
-        visited.add(pid)
-        search = PlaceMefSearch().filter({"term": {f"{pid_type}.pid": pid}})
-        if search.count() > 0:
-            data = next(search.scan()).to_dict()
-            new_pid = None
-            if relation_pid := data.get(pid_type, {}).get("relation_pid"):
-                if relation_pid["type"] == "redirect_to":
-                    new_pid = relation_pid["value"]
-            elif pid_type == "idref":
-                # Find new pid from redirect_pid redirect_from
-                search = PlaceMefSearch().filter("term", idref__relation_pid__value=pid)
-                if search.count() > 0:
-                    new_data = next(search.scan()).to_dict()
-                    new_pid = new_data.get("idref", {}).get("pid")
-            return (
-                cls.get_latest(pid_type=pid_type, pid=new_pid, _visited=visited)
-                if new_pid
-                else data
-            )
-        return {}
-
 
 class PlaceMefIndexer(EntityIndexer):
     """Place MEF indexer."""
@@ -11,22 +11,56 @@ from invenio_records_rest.serializers.response import (
     search_responsify,
 )
 
+from ..registry import current_entity_registry
 from .mef.api import PlaceMefRecord
 
 
-def add_links(pid, record):
-    """Add MEF link to places."""
+def build_links(pid, mef_pids):
+    """Build the links of a place.
+
+    :param pid: Persistent identifier instance.
+    :param mef_pids: MEF pids linking the place, newest first.
+    :returns: Dictionary of links.
+    """
     links = {}
-    for idx, mef_pid in enumerate(
-        PlaceMefRecord.get_mef(record.pid, record.name, pid_only=True)
-    ):
+    for idx, mef_pid in enumerate(mef_pids):
         number = f"-{idx}" if idx else ""
         links[f"mef{number}"] = "{scheme}://{host}/api/places/mef/" + str(mef_pid)
-
     link_factory = default_links_factory_with_additional(links)
     return link_factory(pid)
 
 
+def add_links(pid, record):
+    """Add MEF link to places."""
+    return build_links(
+        pid, PlaceMefRecord.get_mef(record.pid, record.name, pid_only=True)
+    )
+
+
+def search_links_factory(pids):
+    """Create a links factory for the hits of a search page.
+
+    The MEF pids of all hits are fetched with one query per source instead of
+    one query per hit.
+
+    :param pids: Persistent identifiers of the hits.
+    :returns: Links factory.
+    """
+    pid_values = {}
+    for pid in pids:
+        pid_values.setdefault(pid.pid_type, []).append(pid.pid_value)
+    mef_pids = {}
+    for pid_type, values in pid_values.items():
+        name = current_entity_registry.get_class(pid_type, "record_class").name
+        mef_pids[pid_type] = PlaceMefRecord.get_mef_pids_many(name, values)
+
+    def links_factory(pid, **kwargs):
+        """Build the links of a hit from the fetched pids."""
+        return build_links(pid, mef_pids[pid.pid_type].get(pid.pid_value, []))
+
+    return links_factory
+
+
 class ReroMefSerializer(JSONSerializer):
     """Mixin serializing records as JSON."""
 
@@ -41,6 +75,29 @@ class ReroMefSerializer(JSONSerializer):
             pid=pid, record=record, links_factory=add_links, **kwargs
         )
 
+    def serialize_search(
+        self, pid_fetcher, search_result, links=None, item_links_factory=None, **kwargs
+    ):
+        """Serialize a search result with the links of all hits.
+
+        :param pid_fetcher: Persistent identifier fetcher.
+        :param search_result: Elasticsearch search result.
+        :param links: Dictionary of links to add to response.
+        :param item_links_factory: Factory function for record links, replaced
+            by :func:`search_links_factory`.
+        """
+        pids = [
+            pid_fetcher(hit["_id"], hit["_source"])
+            for hit in search_result["hits"]["hits"]
+        ]
+        return super().serialize_search(
+            pid_fetcher,
+            search_result,
+            links=links,
+            item_links_factory=search_links_factory(pids),
+            **kwargs,
+        )
+
 
 json_ = ReroMefSerializer(RecordSchemaJSONV1)
 """JSON v1 serializer."""
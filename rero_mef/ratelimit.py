@@ -0,0 +1,194 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Token buckets shared by the workers calling a remote service.
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second. Every request takes one token. A pause stops all requests, for example
+until the ``Retry-After`` of a 429 response is over. The Redis bucket is shared
+by all processes using the same key, the memory bucket by the threads of one
+process. If Redis is not reachable, the Redis bucket falls back to a memory
+bucket.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import cache
+from logging import getLogger
+
+import redis
+
+LOGGER = getLogger(__name__)
+
+# KEYS: bucket, pause. ARGV: rate, burst.
+# Returns the milliseconds to wait before the next try, 0 if a token was taken.
+TAKE_SCRIPT = """
+local pause = redis.call('PTTL', KEYS[2])
+if pause > 0 then
+    return pause
+end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or burst)
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or now)
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return wait
+"""
+
+# KEYS: pause. ARGV: milliseconds. A shorter pause never cuts a longer one.
+PAUSE_SCRIPT = """
+if tonumber(ARGV[1]) > redis.call('PTTL', KEYS[1]) then
+    redis.call('SET', KEYS[1], '1', 'PX', ARGV[1])
+end
+return 0
+"""
+
+
+class TokenBucket(ABC):
+    """Token bucket interface."""
+
+    def __init__(self, rate=None, burst=1):
+        """Initialize the bucket.
+
+        :param rate: Tokens per second, None for no limit.
+        :param burst: Maximum number of tokens.
+        """
+        self.rate = float(rate) if rate else None
+        self.burst = max(1, int(burst or 1))
+
+    @abstractmethod
+    def try_acquire(self):
+        """Take a token if one is available.
+
+        :returns: Seconds to wait before the next try, 0 if a token was taken.
+        """
+
+    @abstractmethod
+    def pause(self, seconds):
+        """Stop all requests of the bucket.
+
+        :param seconds: Duration of the pause.
+        """
+
+    def acquire(self):
+        """Wait until a token is taken."""
+        while wait := self.try_acquire():
+            time.sleep(wait)
+
+
+class MemoryTokenBucket(TokenBucket):
+    """Token bucket shared by the threads of a process."""
+
+    def __init__(self, rate=None, burst=1, clock=time.monotonic):
+        """Initialize the bucket.
+
+        :param rate: Tokens per second, None for no limit.
+        :param burst: Maximum number of tokens.
+        :param clock: Function returning the current time in seconds.
+        """
+        super().__init__(rate=rate, burst=burst)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.paused_until = 0
+
+    def try_acquire(self):
+        """Take a token if one is available.
+
+        :returns: Seconds to wait before the next try, 0 if a token was taken.
+        """
+        with self.lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if not self.rate:
+                return 0
+            elapsed = max(0, now - self.updated)
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds):
+        """Stop all requests of the bucket.
+
+        :param seconds: Duration of the pause.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class RedisTokenBucket(TokenBucket):
+    """Token bucket shared by all processes using the same Redis key."""
+
+    def __init__(self, url, key, rate=None, burst=1):
+        """Initialize the bucket.
+
+        :param url: Redis URL.
+        :param key: Redis key prefix of the bucket.
+        :param rate: Tokens per second, None for no limit.
+        :param burst: Maximum number of tokens.
+        """
+        super().__init__(rate=rate, burst=burst)
+        self.redis = redis.StrictRedis.from_url(url)
+        self.keys = [f"{key}:bucket", f"{key}:pause"]
+        self.take = self.redis.register_script(TAKE_SCRIPT)
+        self.set_pause = self.redis.register_script(PAUSE_SCRIPT)
+        self.fallback = MemoryTokenBucket(rate=rate, burst=burst)
+
+    def try_acquire(self):
+        """Take a token if one is available.
+
+        :returns: Seconds to wait before the next try, 0 if a token was taken.
+        """
+        try:
+            if not self.rate:
+                pause = self.redis.pttl(self.keys[1])
+                return pause / 1000 if pause > 0 else 0
+            return self.take(keys=self.keys, args=[self.rate, self.burst]) / 1000
+        except redis.RedisError as err:
+            LOGGER.warning(f"Token bucket {self.keys[0]} in memory: {err}")
+            return self.fallback.try_acquire()
+
+    def pause(self, seconds):
+        """Stop all requests of the bucket.
+
+        :param seconds: Duration of the pause.
+        """
+        self.fallback.pause(seconds)
+        if (milliseconds := int(seconds * 1000)) > 0:
+            try:
+                self.set_pause(keys=self.keys[1:], args=[milliseconds])
+            except redis.RedisError as err:
+                LOGGER.warning(f"Token bucket {self.keys[1]} in memory: {err}")
+
+
+@cache
+def get_token_bucket(url, key, rate=None, burst=1):
+    """Get the token bucket of a storage.
+
+    Buckets are cached so all threads of a process share them.
+
+    :param url: Redis URL, ``memory://`` for a bucket of this process.
+    :param key: Name of the bucket.
+    :param rate: Tokens per second, None for no limit.
+    :param burst: Maximum number of tokens.
+    :returns: Token bucket.
+    """
+    if not url or url.startswith("memory://"):
+        return MemoryTokenBucket(rate=rate, burst=burst)
+    return RedisTokenBucket(url=url, key=key, rate=rate, burst=burst)
@@ -0,0 +1,370 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Offline rebuild of the MEF clusters.
+
+A cluster is a dictionary source name -> source pid, the VIAF pid is stored
+under the ``viaf`` key. :class:`MefRebuild` computes the ideal clusters from the
+database, diffs them against the current MEF records and applies only the
+needed creates, updates and deletes, or writes them as load-ready CSV files.
+"""
+
+import os
+from collections import Counter
+from datetime import UTC, datetime
+from itertools import batched, groupby
+from operator import itemgetter
+from urllib.parse import urljoin
+from uuid import uuid4
+
+from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+
+from .agents.viaf.models import ViafLink
+from .models import MefIdentifier, MefLink
+from .utils import (
+    build_ref_string,
+    get_entity_class,
+    metadata_csv_line,
+    pidstore_csv_line,
+)
+
+
+class MefRebuild:
+    """Rebuild the MEF clusters of a MEF record class.
+
+    With a VIAF class, the source records are grouped by VIAF cluster and the
+    source records without VIAF get their own MEF record. With associations,
+    concept and place source records are paired by association identifier.
+    Otherwise the current grouping is kept. In all cases every existing source
+    record ends in exactly one MEF record and links to missing source records
+    are dropped.
+    """
+
+    def __init__(self, mef_cls, viaf_cls=None, associations=False, batch_size=None):
+        """Initialize the rebuild.
+
+        :param mef_cls: MEF record class.
+        :param viaf_cls: VIAF record class used to group the sources.
+        :param associations: If True, group the sources by association
+            identifier.
+        :param batch_size: Records written per transaction, defaults to
+            ``RERO_MEF_DB_WRITE_BATCH_SIZE``.
+        """
+        self.mef_cls = mef_cls
+        self.viaf_cls = viaf_cls
+        self.associations = associations
+        self.types = {}
+        self.batch_size = batch_size or current_app.config.get(
+            "RERO_MEF_DB_WRITE_BATCH_SIZE", 500
+        )
+        self.source_classes = {}
+        for pid_type in current_app.config.get(f"RERO_{mef_cls.mef_type}", []):
+            if record_class := get_entity_class(pid_type):
+                self.source_classes[record_class.name] = record_class
+
+    def current_clusters(self):
+        """Read the current MEF clusters from the ``mef_link`` table.
+
+        :returns: Dictionary MEF pid -> cluster, MEF records without links
+            included.
+        """
+        clusters = {pid: {} for pid in self.mef_cls.get_all_pids()}
+        query = MefLink.query.filter_by(mef_type=self.mef_cls.mef_type).with_entities(
+            MefLink.mef_pid, MefLink.source_name, MefLink.source_pid
+        )
+        for mef_pid, source_name, source_pid in query.yield_per(self.batch_size):
+            if mef_pid in clusters:
+                clusters[mef_pid][source_name] = source_pid
+        return clusters
+
+    def source_records(self):
+        """Stream the source records once.
+
+        Keeps the type of every source record for :meth:`_set_cluster`.
+
+        :returns: Tuple (pids, links) with the dictionary source name -> set of
+            pids and the list of ``association_identifier`` rows.
+        """
+        pids = {}
+        links = []
+        for name, record_class in self.source_classes.items():
+            pids[name] = set()
+            for record in record_class.get_all_records(batch_size=self.batch_size):
+                pids[name].add(record.pid)
+                self.types[name, record.pid] = record.get("type")
+                if link := record.association_link:
+                    links.append(link)
+        return pids, links
+
+    @staticmethod
+    def association_clusters(links):
+        """Pair the source records sharing an association identifier.
+
+        Two records of different sources are paired when each one is the only
+        record of its source with the identifier. Several records of a source
+        are narrowed to the ones with an exact match, like
+        ``get_association_record`` does.
+
+        :param links: Iterable of ``association_identifier`` rows.
+        :returns: List of clusters.
+        """
+        groups = {}
+        for link in links:
+            groups.setdefault(link["association_identifier"], {}).setdefault(
+                link["source_name"], []
+            ).append(link)
+        clusters = []
+        for identifier in sorted(groups):
+            if len(sources := groups[identifier]) != 2:
+                continue
+            cluster = {}
+            for name, source_links in sources.items():
+                if len(source_links) > 1:
+                    source_links = [
+                        link for link in source_links if link["exact_match"]
+                    ]
+                if len(source_links) == 1:
+                    cluster[name] = source_links[0]["pid"]
+            if len(cluster) == 2:
+                clusters.append(cluster)
+        return clusters
+
+    def ideal_clusters(self, current):
+        """Compute the ideal MEF clusters.
+
+        :param current: Current clusters, see :meth:`current_clusters`.
+        :returns: List of clusters.
+        """
+        if self.associations:
+            unassigned, links = self.source_records()
+        else:
+            unassigned = {
+                name: set(record_class.get_all_pids())
+                for name, record_class in self.source_classes.items()
+            }
+
+        def take(members):
+            """Build a cluster of the members not yet in another cluster."""
+            cluster = {}
+            for name, pid in members:
+                if pid in unassigned.get(name, ()):
+                    unassigned[name].discard(pid)
+                    cluster[name] = pid
+            return cluster
+
+        clusters = []
+        if self.viaf_cls:
+            query = ViafLink.query.with_entities(
+                ViafLink.viaf_pid, ViafLink.source_name, ViafLink.source_pid
+            ).order_by(ViafLink.viaf_pid)
+            for viaf_pid, links in groupby(
+                query.yield_per(self.batch_size), key=itemgetter(0)
+            ):
+                if cluster := take((name, pid) for _, name, pid in links):
+                    cluster["viaf"] = viaf_pid
+                    clusters.append(cluster)
+        elif self.associations:
+            for association_cluster in self.association_clusters(links):
+                if cluster := take(association_cluster.items()):
+                    clusters.append(cluster)
+        else:
+            for current_cluster in current.values():
+                if cluster := take(current_cluster.items()):
+                    clusters.append(cluster)
+        clusters.extend(
+            {name: pid} for name, pids in unassigned.items() for pid in sorted(pids)
+        )
+        return clusters
+
+    @staticmethod
+    def match(current, ideal):
+        """Match the ideal clusters with the current MEF records.
+
+        Each ideal cluster reuses the unclaimed MEF record sharing the most
+        members with it.
+
+        :param current: Current clusters, see :meth:`current_clusters`.
+        :param ideal: Ideal clusters, see :meth:`ideal_clusters`.
+        :returns: List of ``(mef_pid, cluster)`` in the order of the ideal
+            clusters, the MEF pid is None for a new cluster.
+        """
+        members = {}
+        for mef_pid, cluster in current.items():
+            for member in cluster.items():
+                members.setdefault(member, []).append(mef_pid)
+        matches = []
+        claimed = set()
+        for cluster in ideal:
+            overlap = Counter(
+                mef_pid
+                for member in cluster.items()
+                for mef_pid in members.get(member, [])
+                if mef_pid not in claimed
+            )
+            mef_pid = None
+            if overlap:
+                mef_pid = min(overlap, key=lambda pid: (-overlap[pid], pid))
+                claimed.add(mef_pid)
+            matches.append((mef_pid, cluster))
+        return matches
+
+    def plan(self):
+        """Diff the ideal clusters against the current MEF records.
+
+        The clusters are matched with :meth:`match`. MEF records left unclaimed
+        are deleted.
+
+        :returns: Dictionary with the ``unchanged`` count, the ``create`` list of
+            clusters, the ``update`` list of ``(mef_pid, old, new)`` and the
+            ``delete`` list of ``(mef_pid, old)``.
+        """
+        current = self.current_clusters()
+        plan = {"unchanged": 0, "create": [], "update": [], "delete": []}
+        claimed = set()
+        for mef_pid, cluster in self.match(current, self.ideal_clusters(current)):
+            if mef_pid is None:
+                plan["create"].append(cluster)
+                continue
+            claimed.add(mef_pid)
+            if current[mef_pid] == cluster:
+                plan["unchanged"] += 1
+            else:
+                plan["update"].append((mef_pid, current[mef_pid], cluster))
+        plan["delete"] = [
+            (mef_pid, cluster)
+            for mef_pid, cluster in current.items()
+            if mef_pid not in claimed
+        ]
+        return plan
+
+    def load_types(self, clusters):
+        """Read the type of the cluster members missing from ``self.types``.
+
+        The types are read from the metadata tables without loading the
+        records.
+
+        :param clusters: Clusters.
+        """
+        pids = {}
+        for cluster in clusters:
+            for name, pid in cluster.items():
+                if name in self.source_classes and (name, pid) not in self.types:
+                    pids.setdefault(name, set()).add(pid)
+        for name, name_pids in pids.items():
+            record_class = self.source_classes[name]
+            record_type = record_class.model_cls.json["type"]
+            for chunk in batched(sorted(name_pids), self.batch_size):
+                query = (
+                    record_class._records_query()
+                    .with_entities(PersistentIdentifier.pid_value, record_type)
+                    .filter(PersistentIdentifier.pid_value.in_(chunk))
+                )
+                for pid, value in query:
+                    self.types[name, pid] = value
+
+    def _set_cluster(self, data, cluster):
+        """Replace the source links and the type of MEF data with a cluster.
+
+        The type is the one of the first source in the order of the MEF
+        entities, see :meth:`load_types`.
+
+        :param data: MEF record data.
+        :param cluster: Cluster to set.
+        :returns: The modified data.
+        """
+        for name in self.source_classes:
+            data.pop(name, None)
+        data.pop("viaf_pid", None)
+        entity_type = self.mef_cls.mef_type.lower()
+        for name, pid in cluster.items():
+            if name == "viaf":
+                data["viaf_pid"] = pid
+            else:
+                data[name] = {"$ref": build_ref_string(entity_type, name, pid)}
+        for name in self.mef_cls.entities:
+            if record_type := self.types.get((name, cluster.get(name))):
+                data["type"] = record_type
+                break
+        return data
+
+    def write_csv(self, pidstore, metadata, ids):
+        """Write the ideal clusters as MEF records in load-ready CSV files.
+
+        The clusters are matched with :meth:`match` and keep the pid of their
+        current MEF record. New clusters get pids following the highest MEF
+        identifier. MEF records left unclaimed are not written. The files
+        replace the content of the MEF tables with ``fixtures load_csv``.
+
+        :param pidstore: Pidstore output file.
+        :param metadata: Metadata output file.
+        :param ids: Ids output file.
+        :returns: Number of MEF records written.
+        """
+        current = self.current_clusters()
+        matches = self.match(current, self.ideal_clusters(current))
+        self.load_types(cluster for _, cluster in matches)
+        pid_type = self.mef_cls.provider.pid_type
+        base_url = current_app.config.get("RERO_MEF_APP_BASE_URL")
+        endpoint = current_app.config.get("JSONSCHEMAS_ENDPOINT", "")
+        schema_path = current_app.config.get("RECORDS_JSON_SCHEMA", {}).get(pid_type)
+        date = str(datetime.now(UTC))
+        next_pid = MefIdentifier.max() + 1
+        for mef_pid, cluster in matches:
+            if mef_pid is None:
+                mef_pid = str(next_pid)
+                next_pid += 1
+            data = self._set_cluster({"pid": mef_pid}, cluster)
+            if base_url and schema_path:
+                data["$schema"] = urljoin(base_url, f"{endpoint}{schema_path}")
+            record_uuid = str(uuid4())
+            pidstore.write(pidstore_csv_line(pid_type, mef_pid, record_uuid, date))
+            metadata.write(metadata_csv_line(data, record_uuid, date))
+            ids.write(mef_pid + os.linesep)
+        return len(matches)
+
+    def apply(self, plan, reindex=True):
+        """Apply a rebuild plan with one transaction per batch.
+
+        Unclaimed MEF records are deleted without removing their PIDs, so their
+        URLs answer as deleted records. They are always removed from the index.
+
+        :param plan: Plan computed by :meth:`plan`.
+        :param reindex: If True, reindex the created and updated records.
+        :returns: Dictionary action -> number of records written.
+        """
+        counts = {"create": 0, "update": 0, "delete": 0}
+        ids = []
+        self.load_types(cluster for _, _, cluster in plan["update"])
+        self.load_types(plan["create"])
+        for chunk in batched(plan["update"], self.batch_size):
+            clusters = {mef_pid: cluster for mef_pid, _, cluster in chunk}
+            records, _ = self.mef_cls.get_records_by_pids(clusters)
+            for record in records:
+                record.replace(
+                    data=self._set_cluster(record, clusters[record.pid]), commit=True
+                )
+                ids.append(record.id)
+                counts["update"] += 1
+            db.session.commit()
+        for chunk in batched(plan["create"], self.batch_size):
+            for cluster in chunk:
+                record = self.mef_cls.create(data=self._set_cluster({}, cluster))
+                ids.append(record.id)
+                counts["create"] += 1
+            db.session.commit()
+        for chunk in batched(plan["delete"], self.batch_size):
+            records, _ = self.mef_cls.get_records_by_pids(pid for pid, _ in chunk)
+            for record in records:
+                record.delete(force=False)
+                counts["delete"] += 1
+            db.session.commit()
+            for record in records:
+                record.delete_from_index()
+        if reindex:
+            indexer = self.mef_cls.get_indexer_class()()
+            indexer.direct_bulk_index(self.mef_cls, ids)
+        if counts["delete"] or reindex:
+            self.mef_cls.flush_indexes()
+        return counts
@@ -0,0 +1,230 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Redirect graph of the source records.
+
+Source records point to newer records with ``relation_pid``: GND records
+``redirect_to`` the newer pid, IdRef records ``redirect_from`` the older pid.
+Both are stored as an edge old pid -> new pid in the ``source_redirect`` table
+together with the final target of the chain, so the latest pid of a source
+pid is found with one indexed lookup.
+"""
+
+from itertools import batched
+
+from flask import current_app
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier
+from sqlalchemy import and_, delete, insert, or_, select
+
+from .models import SourceRedirect
+
+RELATION_TYPES = ("redirect_to", "redirect_from")
+
+
+def record_edges(pid, relation_pid):
+    """Get the redirect edges of a source record.
+
+    :param pid: Pid of the source record.
+    :param relation_pid: ``relation_pid`` of the source record.
+    :returns: Set of ``(pid, relation_type, redirect_to)`` tuples.
+    """
+    if not pid or not isinstance(relation_pid, dict):
+        return set()
+    relation_type = relation_pid.get("type")
+    value = relation_pid.get("value")
+    if not value or value == pid or relation_type not in RELATION_TYPES:
+        return set()
+    if relation_type == "redirect_to":
+        return {(pid, relation_type, value)}
+    return {(value, relation_type, pid)}
+
+
+def _sort_key(edge):
+    """Sort edges by pid, ``redirect_to`` before ``redirect_from``."""
+    pid, relation_type, redirect_to = edge
+    return pid, RELATION_TYPES.index(relation_type), redirect_to
+
+
+def follow(next_pid, pid):
+    """Follow a redirect chain to its end.
+
+    :param next_pid: Function returning the next pid of a pid or None.
+    :param pid: First pid of the chain.
+    :returns: Last pid of the chain, None for a cycle.
+    """
+    visited = {pid}
+    while (redirect_to := next_pid(pid)) is not None:
+        if redirect_to in visited:
+            return None
+        visited.add(redirect_to)
+        pid = redirect_to
+    return pid
+
+
+def redirect_rows(pid_type, edges):
+    """Build the ``source_redirect`` rows of a complete set of edges.
+
+    :param pid_type: Pid type of the source records.
+    :param edges: Iterable of ``(pid, relation_type, redirect_to)`` tuples.
+    :returns: List of row dictionaries.
+    """
+    edges = sorted(set(edges), key=_sort_key)
+    next_pids = {}
+    for pid, _, redirect_to in edges:
+        next_pids.setdefault(pid, redirect_to)
+    final_targets = {pid: follow(next_pids.get, pid) for pid in next_pids}
+    return [
+        {
+            "pid_type": pid_type,
+            "pid": pid,
+            "relation_type": relation_type,
+            "redirect_to": redirect_to,
+            "final_target": final_targets[pid],
+        }
+        for pid, relation_type, redirect_to in edges
+    ]
+
+
+def get_next_pid(pid_type, pid):
+    """Get the next pid of a redirect chain.
+
+    :param pid_type: Pid type of the source records.
+    :param pid: Source pid.
+    :returns: Next pid or None.
+    """
+    query = SourceRedirect.query.filter_by(pid_type=pid_type, pid=pid).with_entities(
+        SourceRedirect.relation_type, SourceRedirect.redirect_to
+    )
+    edges = [(pid, *row) for row in query]
+    return min(edges, key=_sort_key)[2] if edges else None
+
+
+def get_final_target(pid_type, pid):
+    """Get the last pid of the redirect chain of a source pid.
+
+    :param pid_type: Pid type of the source records.
+    :param pid: Source pid.
+    :returns: Last pid, the pid itself without redirect or None for a cycle.
+    """
+    query = (
+        SourceRedirect.query.filter_by(pid_type=pid_type, pid=pid)
+        .with_entities(SourceRedirect.final_target)
+        .limit(1)
+    )
+    if row := query.first():
+        return row.final_target
+    return pid
+
+
+def get_redirected_pids(pid_type, pid, relation_type="redirect_to"):
+    """Get the older pids redirected to a source pid.
+
+    :param pid_type: Pid type of the source records.
+    :param pid: Source pid.
+    :param relation_type: Relation type of the edges, None for all.
+    :returns: Sorted list of pids.
+    """
+    query = SourceRedirect.query.filter_by(pid_type=pid_type, redirect_to=pid)
+    if relation_type:
+        query = query.filter_by(relation_type=relation_type)
+    return sorted({pid for (pid,) in query.with_entities(SourceRedirect.pid)})
+
+
+def refresh_final_targets(pid_type, pids):
+    """Recompute the final targets of the chains going through pids.
+
+    :param pid_type: Pid type of the source records.
+    :param pids: Pids with changed edges.
+    """
+    upstream = set(pids)
+    frontier = set(pids)
+    while frontier:
+        query = select(SourceRedirect.pid).where(
+            SourceRedirect.pid_type == pid_type,
+            SourceRedirect.redirect_to.in_(frontier),
+        )
+        frontier = set(db.session.execute(query).scalars()) - upstream
+        upstream |= frontier
+    for pid in upstream:
+        final_target = follow(lambda value: get_next_pid(pid_type, value), pid)
+        SourceRedirect.query.filter_by(pid_type=pid_type, pid=pid).update(
+            {"final_target": final_target}, synchronize_session=False
+        )
+
+
+def sync_redirects(pid_type, pid, relation_pid):
+    """Write the redirect edges of a source record.
+
+    The edges are written in the transaction of the record change.
+
+    :param pid_type: Pid type of the source record.
+    :param pid: Pid of the source record.
+    :param relation_pid: ``relation_pid`` of the record, None for a deleted
+        record.
+    """
+    owned = and_(
+        SourceRedirect.pid_type == pid_type,
+        or_(
+            and_(
+                SourceRedirect.relation_type == "redirect_to",
+                SourceRedirect.pid == pid,
+            ),
+            and_(
+                SourceRedirect.relation_type == "redirect_from",
+                SourceRedirect.redirect_to == pid,
+            ),
+        ),
+    )
+    stored = {
+        (row.pid, row.relation_type, row.redirect_to)
+        for row in SourceRedirect.query.filter(owned)
+    }
+    edges = record_edges(pid, relation_pid)
+    if stored == edges:
+        return
+    for edge_pid, relation_type, redirect_to in stored - edges:
+        SourceRedirect.query.filter_by(
+            pid_type=pid_type,
+            pid=edge_pid,
+            relation_type=relation_type,
+            redirect_to=redirect_to,
+        ).delete(synchronize_session=False)
+    db.session.add_all(
+        SourceRedirect(
+            pid_type=pid_type,
+            pid=edge_pid,
+            relation_type=relation_type,
+            redirect_to=redirect_to,
+        )
+        for edge_pid, relation_type, redirect_to in edges - stored
+    )
+    db.session.flush()
+    refresh_final_targets(pid_type, {edge[0] for edge in stored ^ edges})
+
+
+def backfill_redirects(record_cls):
+    """Rebuild the ``source_redirect`` rows of a source record class.
+
+    :param record_cls: Source record class.
+    :returns: Number of rows written.
+    """
+    pid_type = record_cls.provider.pid_type
+    batch_size = current_app.config.get("RERO_MEF_DB_BATCH_SIZE", 1000)
+    relation_pid = record_cls.model_cls.json["relation_pid"]
+    query = (
+        record_cls._records_query()
+        .with_entities(PersistentIdentifier.pid_value, relation_pid)
+        .filter(relation_pid.isnot(None))
+    )
+    edges = set()
+    for pid, value in query.yield_per(batch_size):
+        edges |= record_edges(pid, value)
+    db.session.execute(
+        delete(SourceRedirect).where(SourceRedirect.pid_type == pid_type)
+    )
+    rows = redirect_rows(pid_type, edges)
+    for chunk in batched(rows, batch_size):
+        db.session.execute(insert(SourceRedirect), list(chunk))
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,160 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Coordinated search index refreshes.
+
+``EntityRecord.flush_indexes`` asks the coordinator for a refresh instead of
+refreshing the index directly. ``RERO_MEF_INDEX_REFRESH`` selects per index
+alias (``default`` for the others) one of the modes:
+
+- ``immediate``: refresh the index on every request (historic behaviour).
+- ``wait_for``: single record index calls use ``refresh=wait_for`` and explicit
+  refresh requests are dropped.
+- ``debounce``: issue at most one refresh per index and
+  ``RERO_MEF_INDEX_REFRESH_DEBOUNCE`` seconds. Dropped requests are kept
+  pending until the next refresh or :meth:`RefreshCoordinator.flush_pending`.
+"""
+
+from threading import Lock
+from time import monotonic
+
+from celery.signals import task_postrun
+from elasticsearch.exceptions import TransportError
+from flask import current_app
+from invenio_search import current_search
+from werkzeug.local import LocalProxy
+
+IMMEDIATE = "immediate"
+WAIT_FOR = "wait_for"
+DEBOUNCE = "debounce"
+
+
+class RefreshCoordinator:
+    """Coalesce index refresh requests according to the configured modes."""
+
+    def __init__(self, modes=None, debounce=1.0):
+        """Initialize the coordinator.
+
+        :param modes: Dictionary index alias -> refresh mode, ``default`` key
+            for the not listed indexes.
+        :param debounce: Debounce window in seconds.
+        """
+        self.modes = modes or {}
+        self.debounce = debounce
+        self.requested = {}
+        self.issued = {}
+        self.pending = set()
+        self._last_refresh = {}
+        self._lock = Lock()
+
+    def mode(self, index):
+        """Get the refresh mode of an index.
+
+        :param index: Index alias name.
+        :returns: Refresh mode.
+        """
+        return self.modes.get(index, self.modes.get("default", IMMEDIATE))
+
+    def index_arguments(self, index):
+        """Get the extra search engine arguments of a single record index call.
+
+        :param index: Index alias name.
+        :returns: Dictionary of arguments.
+        """
+        if self.mode(index) == WAIT_FOR:
+            return {"refresh": "wait_for"}
+        return {}
+
+    def refresh(self, index):
+        """Request a refresh of an index.
+
+        :param index: Index alias name.
+        :returns: True if a refresh was issued.
+        """
+        mode = self.mode(index)
+        with self._lock:
+            self.requested[index] = self.requested.get(index, 0) + 1
+            if mode == WAIT_FOR:
+                return False
+            if mode == DEBOUNCE:
+                last_refresh = self._last_refresh.get(index)
+                if last_refresh is not None and monotonic() - last_refresh < (
+                    self.debounce
+                ):
+                    self.pending.add(index)
+                    return False
+            self._last_refresh[index] = monotonic()
+            self.pending.discard(index)
+        return self._issue(index)
+
+    def flush_pending(self):
+        """Issue the refreshes dropped by the debounce window.
+
+        :returns: List of refreshed indexes.
+        """
+        with self._lock:
+            pending = sorted(self.pending)
+            self.pending.clear()
+            now = monotonic()
+            for index in pending:
+                self._last_refresh[index] = now
+        return [index for index in pending if self._issue(index)]
+
+    def _issue(self, index):
+        """Refresh an index in the search engine.
+
+        :param index: Index alias name.
+        :returns: True if the refresh succeeded.
+        """
+        try:
+            current_search.flush_and_refresh(index)
+        except TransportError as err:
+            current_app.logger.error(f"ERROR flush and refresh: {err}")
+            return False
+        with self._lock:
+            self.issued[index] = self.issued.get(index, 0) + 1
+        return True
+
+    @property
+    def stats(self):
+        """Get requested and issued refresh counters per index.
+
+        :returns: Dictionary index -> {requested, issued, pending}.
+        """
+        with self._lock:
+            return {
+                index: {
+                    "requested": self.requested.get(index, 0),
+                    "issued": self.issued.get(index, 0),
+                    "pending": index in self.pending,
+                }
+                for index in sorted(set(self.requested) | set(self.issued))
+            }
+
+
+def init_refresh_coordinator(app):
+    """Create the refresh coordinator of an application.
+
+    Pending debounced refreshes are issued at the end of every Celery task.
+
+    :param app: Flask application instance.
+    :returns: The refresh coordinator.
+    """
+    coordinator = RefreshCoordinator(
+        modes=app.config.get("RERO_MEF_INDEX_REFRESH", {}),
+        debounce=app.config.get("RERO_MEF_INDEX_REFRESH_DEBOUNCE", 1.0),
+    )
+
+    def flush_pending_after_task(**kwargs):
+        if coordinator.pending:
+            with app.app_context():
+                coordinator.flush_pending()
+
+    task_postrun.connect(flush_pending_after_task, weak=False)
+    return coordinator
+
+
+current_refresh = LocalProxy(
+    lambda: current_app.extensions["rero-mef"].refresh_coordinator
+)
+"""Refresh coordinator of the current application."""
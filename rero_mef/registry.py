@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Registry of the entity classes declared in ``RECORDS_REST_ENDPOINTS``."""
+
+from flask import current_app
+from invenio_records_rest.utils import obj_or_import_string
+from werkzeug.local import LocalProxy
+
+MEF_VIAF_PID_TYPES = ("mef", "viaf", "comef", "plmef")
+
+
+class EntityRegistry:
+    """Entity endpoints indexed by pid type, list route, source and group.
+
+    The indexes are built once from the endpoint configuration. Classes are
+    imported on first use and cached.
+    """
+
+    def __init__(self, endpoints):
+        """Initialize the registry.
+
+        :param endpoints: ``RECORDS_REST_ENDPOINTS`` configuration.
+        """
+        self.endpoints = dict(endpoints)
+        self.by_list_route = {}
+        self.by_source = {}
+        self.by_group = {}
+        for pid_type, endpoint in self.endpoints.items():
+            if list_route := endpoint.get("list_route"):
+                self.by_list_route[list_route] = pid_type
+                route_parts = list_route.strip("/").split("/")
+                self.by_group.setdefault(route_parts[0], []).append(pid_type)
+                self.by_source.setdefault(route_parts[-1], []).append(pid_type)
+        self._classes = {}
+
+    def get_class(self, pid_type, class_name):
+        """Get a class of an endpoint.
+
+        :param pid_type: Endpoint pid type.
+        :param class_name: Endpoint configuration key, e.g. ``record_class``.
+        :returns: The imported class or None.
+        """
+        if pid_type not in self.endpoints:
+            return None
+        key = (pid_type, class_name)
+        if key not in self._classes:
+            endpoint = self.endpoints[pid_type]
+            self._classes[key] = obj_or_import_string(endpoint.get(class_name))
+        return self._classes[key]
+
+    def record_classes(self, without_mef_viaf=True):
+        """Get the record classes of all endpoints.
+
+        :param without_mef_viaf: If True, skip the MEF and VIAF endpoints.
+        :returns: Dictionary pid type -> record class.
+        """
+        record_classes = {}
+        for pid_type in self.endpoints:
+            if without_mef_viaf and pid_type in MEF_VIAF_PID_TYPES:
+                continue
+            if record_class := self.get_class(pid_type, "record_class"):
+                record_classes[pid_type] = record_class
+        return record_classes
+
+    def record_class_by_list_route(self, list_route):
+        """Get the record class of a list route.
+
+        :param list_route: Endpoint list route, e.g. ``/agents/gnd/``.
+        :returns: The record class or None.
+        """
+        if pid_type := self.by_list_route.get(list_route):
+            return self.get_class(pid_type, "record_class")
+        return None
+
+    def record_class_by_ref(self, ref):
+        """Get the record class of a ``$ref`` URL.
+
+        The URL has the form ``https://<host>/api<list_route><pid>``, e.g.
+        ``https://mef.rero.ch/api/agents/idref/EXAI004``.
+
+        :param ref: The ``$ref`` URL.
+        :returns: The record class or None.
+        """
+        parts = ref.rstrip("/").split("/")
+        if len(parts) < 3:
+            return None
+        return self.record_class_by_list_route(f"/{parts[-3]}/{parts[-2]}/")
+
+    def record_classes_by_source(self, source):
+        """Get the record classes of a source in all entity groups.
+
+        :param source: Source name, e.g. ``gnd``.
+        :returns: List of record classes.
+        """
+        return [
+            record_class
+            for pid_type in self.by_source.get(source, [])
+            if (record_class := self.get_class(pid_type, "record_class"))
+        ]
+
+
+def init_entity_registry(app):
+    """Build the entity registry of an application.
+
+    :param app: Flask application instance.
+    :returns: The entity registry.
+    """
+    return EntityRegistry(app.config.get("RECORDS_REST_ENDPOINTS", {}))
+
+
+current_entity_registry = LocalProxy(
+    lambda: current_app.extensions["rero-mef"].entity_registry
+)
+"""Entity registry of the current application."""
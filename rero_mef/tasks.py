@@ -69,6 +69,46 @@ def create_or_update(
     return id_type, str(rec_id), agent_action
 
 
+@shared_task
+def create_or_update_many(
+    idx, records, entity, dbcommit=True, reindex=True, test_md5=False, verbose=False
+):
+    """Create or update a batch of records task.
+
+    :param idx: index of the first record
+    :param records: list of record data to use
+    :param entity: entity to use
+    :param dbcommit: db commit or not
+    :param reindex: reindex or not
+    :param test_md5: test md5 or not
+    :param verbose: verbose or not
+    :returns: dictionary pid -> action name
+    """
+    entity_class = get_entity_class(entity)
+    results = entity_class.create_or_update_many(
+        records=records, dbcommit=dbcommit, reindex=reindex, test_md5=test_md5
+    )
+    entities = current_app.config.get("RERO_ENTITIES", [])
+    actions = {}
+    for count, (pid, (record, agent_action)) in enumerate(results.items(), idx):
+        mef_actions = {}
+        if entity in entities and agent_action in (
+            Action.CREATE,
+            Action.UPDATE,
+            Action.REPLACE,
+        ):
+            _, mef_actions = record.create_or_update_mef(
+                dbcommit=dbcommit, reindex=reindex
+            )
+        if verbose:
+            msg = f"{count:<10} {entity:<6} pid:  {pid:<25} {agent_action.name}"
+            for mef_pid, mef_action in mef_actions.items():
+                msg = f"{msg} | mef: {mef_pid} {mef_action.name}"
+            click.echo(msg)
+        actions[pid] = agent_action.name
+    return actions
+
+
 @shared_task
 def delete(idx, pid, entity, dbcommit=True, delindex=True, verbose=False):
     """Delete record task.
@@ -20,6 +20,7 @@ from ..agents.mef.api import AgentMefRecord
 from ..concepts.mef.api import ConceptMefRecord
 from ..listener import _detect_type_conflict
 from ..places.mef.api import PlaceMefRecord
+from ..redirects import get_final_target, get_redirected_pids
 from ..version import __version__
 
 
@@ -299,7 +300,7 @@ def _compute_nav_urls(entity_type, record_cls, entities, resolved):
     Handles two redirect patterns:
     - ``redirect_to`` on source (GND): source is old; latest points to current.
     - ``redirect_from`` on source (IDREF): source is current; older points to old record.
-    - Reverse lookup: search for records whose source ``redirect_to`` points at this
+    - Reverse lookup: ``source_redirect`` rows whose ``redirect_to`` points at this
       record's source PID, covering the GND case on the current/newer record.
     """
     latest_url = None
@@ -320,21 +321,17 @@ def _compute_nav_urls(entity_type, record_cls, entities, resolved):
                         older_url = url_for(
                             _OLDER_ENDPOINT[entity_type], pid_type=src, pid=rel_value
                         )
-        if not older_url and (src_pid := src_data.get("pid")):
-            for hit in (
-                record_cls.search()
-                .filter("term", **{f"{src}__relation_pid__value": src_pid})
-                .scan()
-            ):
-                hit_src = hit.to_dict().get(src, {})
-                if hit_src.get("relation_pid", {}).get("type") == "redirect_to":
-                    if older_src_pid := hit_src.get("pid"):
-                        older_url = url_for(
-                            _OLDER_ENDPOINT[entity_type],
-                            pid_type=src,
-                            pid=older_src_pid,
-                        )
-                        break
+        if (
+            not older_url
+            and (src_pid := src_data.get("pid"))
+            and (source_cls := record_cls.get_source_class(src))
+            and (
+                older_pids := get_redirected_pids(source_cls.provider.pid_type, src_pid)
+            )
+        ):
+            older_url = url_for(
+                _OLDER_ENDPOINT[entity_type], pid_type=src, pid=older_pids[0]
+            )
         if latest_url and older_url:
             break
     return latest_url, older_url
@@ -458,12 +455,19 @@ def _render_entity_list(entity_name):
     )
 
 
-def _mef_redirect_by_source_pid(entity_type, pid_type, pid):
-    """Redirect to the MEF detail page for a given source PID."""
+def _mef_redirect_by_source_pid(entity_type, pid_type, pid, latest=False):
+    """Redirect to the MEF detail page for a given source PID.
+
+    With ``latest``, the source PID is first replaced by the final target of
+    its redirect chain.
+    """
     config = _ENTITY_DETAIL_CONFIG.get(entity_type)
     if not config:
         abort(404)
-    pids = config["record_cls"].get_mef(pid, pid_type, pid_only=True)
+    record_cls = config["record_cls"]
+    if latest and (source_cls := record_cls.get_source_class(pid_type)):
+        pid = get_final_target(source_cls.provider.pid_type, pid) or pid
+    pids = record_cls.get_mef(pid, pid_type, pid_only=True)
     if not pids:
         abort(404)
     return redirect(url_for(_DETAIL_ENDPOINT[entity_type], pid_value=pids[0]))
@@ -478,7 +482,7 @@ def agent_detail(pid_value):
 @blueprint.route("/agents/latest/<pid_type>:<pid>")
 def agent_latest(pid_type, pid):
     """Redirect to the latest agent MEF record for a given source PID."""
-    return _mef_redirect_by_source_pid("agents", pid_type, pid)
+    return _mef_redirect_by_source_pid("agents", pid_type, pid, latest=True)
 
 
 @blueprint.route("/agents/older/<pid_type>:<pid>")
@@ -496,7 +500,7 @@ def concept_detail(pid_value):
 @blueprint.route("/concepts/latest/<pid_type>:<pid>")
 def concept_latest(pid_type, pid):
     """Redirect to the latest concept MEF record for a given source PID."""
-    return _mef_redirect_by_source_pid("concepts", pid_type, pid)
+    return _mef_redirect_by_source_pid("concepts", pid_type, pid, latest=True)
 
 
 @blueprint.route("/concepts/older/<pid_type>:<pid>")
@@ -514,7 +518,7 @@ def place_detail(pid_value):
 @blueprint.route("/places/latest/<pid_type>:<pid>")
 def place_latest(pid_type, pid):
     """Redirect to the latest place MEF record for a given source PID."""
-    return _mef_redirect_by_source_pid("places", pid_type, pid)
+    return _mef_redirect_by_source_pid("places", pid_type, pid, latest=True)
 
 
 @blueprint.route("/places/older/<pid_type>:<pid>")
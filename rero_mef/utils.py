@@ -12,9 +12,11 @@ import gc
 import json
 import os
 import time
-from copy import deepcopy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from io import StringIO
+from itertools import batched
 from json import JSONDecodeError, JSONDecoder, dumps
 from time import sleep
 from uuid import uuid4
@@ -25,6 +27,7 @@ import psycopg2
 import requests
 import sqlalchemy
 from dateutil import parser
+from elasticsearch_dsl.response import Hit
 from flask import current_app
 from invenio_cache.proxies import current_cache
 from invenio_db import db
@@ -37,7 +40,8 @@ from invenio_oaiharvester.models import OAIHarvestConfig
 from invenio_oaiharvester.utils import get_oaiharvest_object
 from invenio_pidstore.errors import PIDDoesNotExistError
 from invenio_pidstore.models import PersistentIdentifier
-from invenio_records_rest.utils import obj_or_import_string
+from invenio_search import current_search_client
+from invenio_search.utils import build_alias_name
 from lxml.etree import XMLSyntaxError
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from pymarc.marcxml import parse_xml_to_array
@@ -49,6 +53,10 @@ from urllib3.util.retry import Retry
 
 from rero_mef.extensions import SchemaExtension
 from rero_mef.marctojson.helper import display_record
+from rero_mef.negative_cache import ERROR, NOT_FOUND, MissMessage
+from rero_mef.pidset import PidSet
+from rero_mef.refresh import current_refresh
+from rero_mef.registry import current_entity_registry
 
 _schema = SchemaExtension()
 
@@ -297,6 +305,69 @@ def oai_process_records_from_dates(
     count = 0
     action_count = {}
     mef_action_count = {}
+    batch_size = current_app.config.get("RERO_MEF_OAI_BATCH_SIZE", 100)
+
+    def process_batch(batch, spec):
+        """Create or update a batch of transformed records and their MEF records.
+
+        :param batch: List of (record data, updated date) tuples.
+        :param spec: OAI set spec of the batch.
+        :returns: Number of processed records.
+        """
+        if not batch:
+            return 0
+        updated_dates = {rec.get("pid"): updated for rec, updated in batch}
+        try:
+            results = record_class.create_or_update_many(
+                records=[rec for rec, _ in batch],
+                dbcommit=True,
+                reindex=True,
+                test_md5=test_md5,
+            )
+        except sqlalchemy.exc.SQLAlchemyError as err:
+            db.session.rollback()
+            current_app.logger.error(
+                f"Creating {name} batch {list(updated_dates)}: {err}",
+                exc_info=True,
+                stack_info=True,
+            )
+            action_count.setdefault(Action.ERROR, 0)
+            action_count[Action.ERROR] += len(batch)
+            return 0
+        for pid, (record, action) in results.items():
+            action_count.setdefault(action, 0)
+            action_count[action] += 1
+            m_actions = {}
+            m_record = {}
+            try:
+                # If record was created/updated, also update its MEF (aggregated) record
+                if action in [Action.CREATE, Action.UPDATE, Action.REPLACE]:
+                    m_record, m_actions = record.create_or_update_mef(
+                        dbcommit=True, reindex=True
+                    )
+                    # Track MEF-level actions separately from entity-level actions
+                    for m_action in m_actions.values():
+                        mef_action_count.setdefault(m_action, 0)
+                        mef_action_count[m_action] += 1
+                else:
+                    mef_action_count.setdefault(Action.UPTODATE, 0)
+                    mef_action_count[Action.UPTODATE] += 1
+            except Exception as err:
+                current_app.logger.error(
+                    f"Creating MEF {name} {pid}: {err}", exc_info=True, stack_info=True
+                )
+            if verbose:
+                msg = (
+                    f"OAI {name} spec({spec}): {pid}"
+                    f" updated: {updated_dates.get(pid)} {action.value}"
+                )
+                for mef_pid, m_action in m_actions.items():
+                    msg = f"{msg} | mef: {mef_pid} {m_action.value}"
+                if viaf_pid := m_record.get("viaf_pid"):
+                    msg = f"{msg} | viaf: {viaf_pid}"
+                click.echo(msg)
+        return len(results)
+
     for spec in setspecs:
         dates = dates_initial
         params = {"metadataPrefix": metadata_prefix, "ignore_deleted": ignore_deleted}
@@ -323,6 +394,7 @@ def oai_process_records_from_dates(
                     f"OAI {name} spec({spec}): {dates['from']} .. {dates['until']}",
                     fg="cyan",
                 )
+            batch = []
             try:
                 for idx, record in enumerate(request.ListRecords(**params), 1):
                     records = parse_xml_to_array(StringIO(record.raw))
@@ -346,47 +418,7 @@ def oai_process_records_from_dates(
                                         fg="yellow",
                                     )
                             else:
-                                pid = rec.get("pid")
-                                record, action = record_class.create_or_update(
-                                    data=rec,
-                                    dbcommit=True,
-                                    reindex=True,
-                                    test_md5=test_md5,
-                                )
-                                count += 1
-                                action_count.setdefault(action, 0)
-                                action_count[action] += 1
-                                m_actions = {}
-                                # If record was created/updated, also update its MEF (aggregated) record
-                                if action in [
-                                    Action.CREATE,
-                                    Action.UPDATE,
-                                    Action.REPLACE,
-                                ]:
-                                    m_record, m_actions = record.create_or_update_mef(
-                                        dbcommit=True, reindex=True
-                                    )
-                                    # Track MEF-level actions separately from entity-level actions
-                                    for m_action in m_actions.values():
-                                        mef_action_count.setdefault(m_action, 0)
-                                        mef_action_count[m_action] += 1
-
-                                else:
-                                    m_action = Action.UPTODATE
-                                    m_record = {}
-                                    mef_action_count.setdefault(m_action, 0)
-                                    mef_action_count[m_action] += 1
-
-                                if verbose:
-                                    msg = (
-                                        f"OAI {name} spec({spec}): {pid}"
-                                        f" updated: {updated} {action.value}"
-                                    )
-                                    for mef_pid, m_action in m_actions.items():
-                                        msg = f"{msg} | mef: {mef_pid} {m_action.value}"
-                                    if viaf_pid := m_record.get("viaf_pid"):
-                                        msg = f"{msg} | viaf: {viaf_pid}"
-                                    click.echo(msg)
+                                batch.append((rec, updated))
                         elif verbose:
                             click.secho(
                                 f"OAI {name} spec({spec}): {idx}"
@@ -399,15 +431,23 @@ def oai_process_records_from_dates(
                         if rec:
                             msg = f"{msg}\n{rec}"
                         current_app.logger.error(msg, exc_info=True, stack_info=True)
+                    if len(batch) >= batch_size:
+                        count += process_batch(batch, spec)
+                        batch = []
+                count += process_batch(batch, spec)
+                batch = []
             except NoRecordsMatch:
                 # get the next from to until dates
                 from_date = until_date
                 continue
             except Exception as err:
                 current_app.logger.error(err, exc_info=True, stack_info=True)
+                # the OAI request failed: keep the records harvested before
+                process_batch(batch, spec)
                 count = -1
             # get the next from to until dates
             from_date = until_date
+    current_refresh.flush_pending()
     if update_last_run:
         oai_set_last_run(name=name, date=dates_initial["until"], verbose=verbose)
     return count, action_count, mef_action_count
@@ -529,11 +569,13 @@ def oai_get_record(
     try:
         record = request.GetRecord(**params)
         msg = f"OAI-{name:<12} get: {id_:<15} {full_url} | OK"
-    except Exception:
+    except Exception as err:
         msg = f"OAI-{name:<12} get: {id_:<15} {full_url} | NO RECORD"
         if debug:
             raise
-        return None, msg
+        # only a missing identifier is a definitive answer
+        result = NOT_FOUND if isinstance(err, oaiexceptions.IdDoesNotExist) else ERROR
+        return None, MissMessage(msg, result)
     records = parse_xml_to_array(StringIO(record.raw))
     if debug:
         display_record(records[0])
@@ -578,7 +620,13 @@ def read_json_record(json_file, buf_size=1024, decoder=JSONDecoder()):
 
 
 def export_json_records(
-    pids, pid_type, output_file_name, indent=2, schema=True, verbose=False
+    pids,
+    pid_type,
+    output_file_name,
+    indent=2,
+    schema=True,
+    verbose=False,
+    resolve=False,
 ):
     """Writes records from record_class to file.
 
@@ -588,26 +636,41 @@ def export_json_records(
     :param indent: indent to use in output file
     :param schema: do not delete $schema
     :param verbose: verbose print
+    :param resolve: resolve the $refs of MEF records, one query per source
+        class and batch
     :returns: count of records written
     """
     record_class = get_entity_class(pid_type)
+    resolve = resolve and hasattr(record_class, "replace_refs_many")
+    batch_size = current_app.config.get("RERO_MEF_DB_BATCH_SIZE", 1000)
     count = 0
     outfile = JsonWriter(output_file_name, indent=indent)
-    for pid in pids:
-        try:
-            rec = record_class.get_record_by_pid(pid)
-            count += 1
-            if verbose:
-                click.echo(f"{count: <8} {pid_type} export {rec.pid}:{rec.id}")
-            if not schema:
-                rec.pop("$schema", None)
-                for source in ("idref", "gnd", "rero"):
-                    if source in rec and isinstance(source, dict):
-                        rec[source].pop("$schema", None)
-            outfile.write(rec)
-        except Exception as err:
-            click.echo(err)
-            click.echo(f"ERROR: Can not export pid:{pid}")
+    for chunk in batched(record_class.iter_records_by_pids(pids), batch_size):
+        if resolve:
+            resolved = iter(
+                record_class.replace_refs_many(
+                    rec for _, rec in chunk if rec is not None
+                )
+            )
+        for pid, rec in chunk:
+            if rec is None:
+                click.echo(f"ERROR: Can not export pid:{pid}")
+                continue
+            try:
+                count += 1
+                if verbose:
+                    click.echo(f"{count: <8} {pid_type} export {rec.pid}:{rec.id}")
+                if resolve:
+                    rec = next(resolved)
+                if not schema:
+                    rec.pop("$schema", None)
+                    for source in ("idref", "gnd", "rero"):
+                        if isinstance(rec.get(source), dict):
+                            rec[source].pop("$schema", None)
+                outfile.write(rec)
+            except Exception as err:
+                click.echo(err)
+                click.echo(f"ERROR: Can not export pid:{pid}")
 
 
 def number_records_in_file(json_file, file_type):
@@ -948,26 +1011,13 @@ def create_csv_file(input_file, entity, pidstore, metadata):
 
 
 def get_entity_classes(without_mef_viaf=True):
-    """Get entity classes from config."""
-    entities = {}
-    endpoints = deepcopy(current_app.config.get("RECORDS_REST_ENDPOINTS", {}))
-    if without_mef_viaf:
-        endpoints.pop("mef", None)
-        endpoints.pop("viaf", None)
-        endpoints.pop("comef", None)
-        endpoints.pop("plmef", None)
-    for entity in endpoints:
-        if record_class := obj_or_import_string(endpoints[entity].get("record_class")):
-            entities[entity] = record_class
-    return entities
+    """Get entity classes from the entity registry."""
+    return current_entity_registry.record_classes(without_mef_viaf=without_mef_viaf)
 
 
 def get_endpoint_class(entity, class_name):
-    """Get entity class from config."""
-    endpoints = current_app.config.get("RECORDS_REST_ENDPOINTS", {})
-    if endpoint := endpoints.get(entity, {}):
-        return obj_or_import_string(endpoint.get(class_name))
-    return None
+    """Get entity class from the entity registry."""
+    return current_entity_registry.get_class(entity, class_name)
 
 
 def get_entity_class(entity):
@@ -1142,23 +1192,26 @@ def mef_get_all_missing_entity_pids(mef_class, entity, verbose=False):
     progress = progressbar(
         items=record_class.get_all_pids(), length=record_class.count(), verbose=verbose
     )
-    missing_pids = dict.fromkeys(progress, 1)
+    entity_pids = PidSet(progress)
+    mef_entity_pids = PidSet()
     name = record_class.name
     if verbose:
         click.echo(f"Get pids for {name} from MEF and calculate missing ...")
     query = mef_class.search().filter("exists", field=name)
     progress = progressbar(
-        items=query.source(["pid", name]).scan(), length=query.count(), verbose=True
+        items=scan_index(query, fields=["pid", f"{name}.pid"]),
+        length=query.count(),
+        verbose=True,
     )
     for hit in progress:
         data = hit.to_dict()
         if entity_pid := data.get(name, {}).get("pid"):
-            res = missing_pids.pop(entity_pid, False)
-            if not res:
+            if entity_pid not in entity_pids or entity_pid in mef_entity_pids:
                 non_existing_pids[hit.pid] = entity_pid
+            mef_entity_pids.add(entity_pid)
         else:
             no_pids.append(hit.pid)
-    return list(missing_pids), non_existing_pids, no_pids
+    return list(entity_pids - mef_entity_pids), non_existing_pids, no_pids
 
 
 def get_mefs_endpoints():
@@ -1192,6 +1245,132 @@ def generate(search, deleted):
     yield "]"
 
 
+def get_duplicate_values(search, field, sort, size=None, hits_size=None):
+    """Find field values shared by several documents.
+
+    Pages a composite ``terms`` aggregation through ``after_key``. Only the
+    buckets with at least two documents are returned by a ``bucket_selector``,
+    as composite aggregations do not accept ``min_doc_count``.
+
+    :param search: Search to aggregate on.
+    :param field: Keyword field to look for duplicate values.
+    :param sort: Sort of the document pids of a duplicate value.
+    :param size: Buckets per request, defaults to ``RERO_MEF_COMPOSITE_SIZE``.
+    :param hits_size: Document pids returned per duplicate value, defaults to
+        ``RERO_MEF_DUPLICATE_HITS_SIZE``.
+    :yields: Tuples (value, list of document pids).
+    """
+    size = size or current_app.config.get("RERO_MEF_COMPOSITE_SIZE", 1000)
+    hits_size = hits_size or current_app.config.get("RERO_MEF_DUPLICATE_HITS_SIZE", 100)
+    after_key = None
+    while True:
+        query = search.extra(size=0)
+        composite = {"size": size, "sources": [{"value": {"terms": {"field": field}}}]}
+        if after_key:
+            composite["after"] = after_key
+        bucket = query.aggs.bucket("duplicates", "composite", **composite)
+        bucket.metric("pids", "top_hits", size=hits_size, sort=sort, _source=["pid"])
+        bucket.pipeline(
+            "min_doc_count",
+            "bucket_selector",
+            buckets_path={"count": "_count"},
+            script="params.count > 1",
+        )
+        duplicates = query.execute().aggregations.duplicates.to_dict()
+        for duplicate in duplicates.get("buckets", []):
+            yield (
+                duplicate["key"]["value"],
+                [hit["_source"]["pid"] for hit in duplicate["pids"]["hits"]["hits"]],
+            )
+        if not (after_key := duplicates.get("after_key")):
+            break
+
+
+def _scan_hit(hit, fields):
+    """Build a search hit from a raw scan hit.
+
+    :param hit: Raw hit.
+    :param fields: Doc value fields of the hit or None.
+    :returns: Hit with the source, or with the doc values nested like the
+        source. Fields with several values keep the sorted list of values.
+    """
+    if fields is None:
+        return Hit(hit)
+    data = {}
+    for field, values in hit.pop("fields", {}).items():
+        *parents, name = field.split(".")
+        parent = data
+        for key in parents:
+            parent = parent.setdefault(key, {})
+        parent[name] = values[0] if len(values) == 1 else values
+    return Hit(hit | {"_source": data})
+
+
+def scan_index(search, fields=None, sort=None, slices=None, size=None, index=None):
+    """Scan all documents of a search with a point in time.
+
+    Every slice of the point in time is paged with ``search_after`` and the
+    next page of a slice is requested while the current one is consumed.
+    Sorted scans use one slice to keep the order.
+
+    :param search: Records search to scan.
+    :param fields: Keyword fields read from the doc values instead of the
+        source.
+    :param sort: Sort of the documents.
+    :param slices: Number of parallel slices, defaults to
+        ``RERO_MEF_SCAN_SLICES``.
+    :param size: Documents per page, defaults to ``RERO_MEF_SCAN_SIZE``.
+    :param index: Index or alias to scan, defaults to the index of the
+        ``Meta`` of the search.
+    :yields: Search hits.
+    """
+    config = current_app.config
+    slices = 1 if sort else slices or config.get("RERO_MEF_SCAN_SLICES", 4)
+    size = size or config.get("RERO_MEF_SCAN_SIZE", 1000)
+    keep_alive = config.get("RERO_MEF_SCAN_KEEP_ALIVE", "5m")
+    # the proxy can not be resolved in the worker threads
+    client = current_search_client._get_current_object()
+    body = {
+        key: value
+        for key, value in search.to_dict().items()
+        if key not in ("from", "size", "sort", "aggs")
+    }
+    body |= {"size": size, "sort": [*(sort or []), {"_shard_doc": "asc"}]}
+    if fields is not None:
+        body |= {"_source": False, "docvalue_fields": fields}
+    pit_id = client.open_point_in_time(
+        index=build_alias_name(index or search.Meta.index), keep_alive=keep_alive
+    )["id"]
+
+    def fetch(slice_body):
+        return client.search(body=slice_body)
+
+    try:
+        with ThreadPoolExecutor(max_workers=slices) as executor:
+            pending = deque()
+            for slice_id in range(slices):
+                slice_body = body | {"pit": {"id": pit_id, "keep_alive": keep_alive}}
+                if slices > 1:
+                    slice_body["slice"] = {"id": slice_id, "max": slices}
+                pending.append((slice_body, executor.submit(fetch, slice_body)))
+            while pending:
+                slice_body, future = pending.popleft()
+                response = future.result()
+                # the point in time id can change between the responses
+                pit_id = response.get("pit_id", pit_id)
+                hits = response["hits"]["hits"]
+                if len(hits) == size:
+                    next_body = slice_body | {
+                        "pit": {"id": pit_id, "keep_alive": keep_alive},
+                        "search_after": hits[-1]["sort"],
+                    }
+                    pending.append((next_body, executor.submit(fetch, next_body)))
+                for hit in hits:
+                    yield _scan_hit(hit, fields)
+    finally:
+        client.close_point_in_time(body={"id": pit_id})
+
+
 def requests_retry_session(
     retries=5, backoff_factor=0.5, status_forcelist=(500, 502, 504), session=None
 ):
@@ -33,6 +33,24 @@ def test_concept_rero_list_serializer(client, concept_rero_record):
     assert body["hits"]["total"] >= 1
 
 
+def test_concept_rero_list_serializer_links(
+    client, concept_rero_record, concept_mef_rero_record
+):
+    """List endpoint builds the MEF links of the hits."""
+    url = url_for("invenio_records_rest.corero_list")
+    res = client.get(url)
+    assert res.status_code == 200
+    body = json.loads(res.get_data(as_text=True))
+    hit = next(
+        hit
+        for hit in body["hits"]["hits"]
+        if hit["id"] == concept_rero_record.get("pid")
+    )
+    assert hit["links"]["mef"].endswith(
+        f"/api/concepts/mef/{concept_mef_rero_record.pid}"
+    )
+
+
 def test_concept_idref_item_serializer(
     client, concept_idref_record, concept_mef_idref_record
 ):
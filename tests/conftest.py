@@ -54,6 +54,9 @@ def app_config(app_config):
     """Create temporary instance dir for each test."""
     app_config["CELERY_BROKER_URL"] = "memory://"
     app_config["RATELIMIT_STORAGE_URI"] = "memory://"
+    app_config["RERO_MEF_VIAF_RATE_LIMIT_STORAGE_URI"] = "memory://"
+    app_config["RERO_MEF_VIAF_REQUESTS_PER_SECOND"] = None
+    app_config["RERO_MEF_NEGATIVE_CACHE_TTL"] = {}
     app_config["CACHE_TYPE"] = "simple"
     app_config["ACCOUNTS_SESSION_REDIS_URL"] = "redis://localhost:6379/1"
     app_config["SEARCH_ELASTIC_HOSTS"] = None
@@ -307,6 +307,10 @@ def test_get_unlinked_agents_relink_uses_record_id(app):
         mock.patch(
             "rero_mef.agents.api.get_entity_class", return_value=fake_entity_class
         ),
+        mock.patch(
+            "rero_mef.agents.api.scan_index",
+            side_effect=lambda search, **_kwargs: search.scan(),
+        ),
         mock.patch(
             "rero_mef.agents.mef.api.AgentMefRecord.get_record",
             return_value=fake_record,
@@ -360,6 +364,10 @@ def test_get_unlinked_agents_yields_all_tasks(app):
         mock.patch(
             "rero_mef.agents.api.get_entity_class", return_value=fake_entity_class
         ),
+        mock.patch(
+            "rero_mef.agents.api.scan_index",
+            side_effect=lambda search, **_kwargs: search.scan(),
+        ),
     ):
         tasks = list(get_unlinked_agents(relink=False, dbcommit=False, reindex=False))
 
@@ -12,13 +12,17 @@ from unittest import mock
 import pytest
 from click.testing import CliRunner
 
+from rero_mef.agents import AgentMefRecord
 from rero_mef.agents.cli import (
     _clean_non_existing_viaf_links,
     create_csv_mef,
     create_csv_viaf,
     create_from_viaf,
     harvest_viaf,
+    rebuild_mef,
+    viaf_responses,
 )
+from rero_mef.cli import rebuild_mef as utils_rebuild_mef
 
 
 def test_create_csv_viaf_mef(script_info, tmpdir):
@@ -203,6 +207,15 @@ def test_create_from_viaf_with_viaf_file(app, script_info, tmpdir):
         assert "Create MEF and Agency from VIAF" in res.output
         # Should process records from file
         assert mock_task.call_count == 2
+        assert mock_task.call_args.kwargs["use_cache"] is True
+
+        res = runner.invoke(
+            create_from_viaf,
+            ["-f", str(viaf_file), "--no_cache"],
+            obj=script_info,
+            catch_exceptions=False,
+        )
+        assert mock_task.call_args.kwargs["use_cache"] is False
 
 
 def test_create_from_viaf_with_viaf_file_cleans_non_existing_pids(script_info, tmpdir):
@@ -449,3 +462,75 @@ def test_clean_non_existing_viaf_links_skips_changed_or_missing_records():
     assert cleaned == 0
     mef_record.pop.assert_not_called()
     mef_record.update.assert_not_called()
+
+
+def test_rebuild_mef(
+    app,
+    script_info,
+    tmpdir,
+    agent_viaf_record,
+    agent_mef_record,
+    agent_gnd_record,
+    agent_idref_record,
+    agent_rero_record,
+):
+    """Test offline agent MEF cluster rebuild."""
+    runner = CliRunner()
+    report_file = join(tmpdir, "rebuild.jsonl")
+    res = runner.invoke(rebuild_mef, ["--dry-run", "-o", report_file], obj=script_info)
+    assert res.exit_code == 0
+    outputs = res.output.strip().split("\n")
+    assert outputs[0] == "Plan agents MEF rebuild ..."
+    assert len(outputs) == 2
+    with open(report_file) as report:
+        actions = [json.loads(line) for line in report]
+    assert {action["action"] for action in actions} <= {"create", "update", "delete"}
+
+    # a MEF record without sources is unclaimed
+    empty = AgentMefRecord.create(data={}, dbcommit=True, reindex=True)
+    AgentMefRecord.flush_indexes()
+    res = runner.invoke(rebuild_mef, ["-r"], obj=script_info)
+    assert res.exit_code == 0
+    assert res.output.strip().split("\n")[-1].startswith("  created: ")
+    # deleted with a PID tombstone and removed from the index
+    assert AgentMefRecord.get_record_by_pid(empty.pid) is None
+    assert AgentMefRecord.get_record_by_pid(empty.pid, with_deleted=True) == {}
+    assert AgentMefRecord.search().filter("term", pid=empty.pid).count() == 0
+    mef_pids = AgentMefRecord.get_mef(agent_gnd_record.pid, "gnd", pid_only=True)
+    assert len(mef_pids) == 1
+    mef_record = AgentMefRecord.get_record_by_pid(mef_pids[0])
+    assert mef_record["viaf_pid"] == agent_viaf_record.pid
+
+    res = runner.invoke(rebuild_mef, ["--dry-run"], obj=script_info)
+    assert res.exit_code == 0
+    assert res.output.strip().split("\n")[-1].endswith("create: 0 update: 0 delete: 0")
+
+    # CSV files keep the current MEF pids and the types
+    res = runner.invoke(
+        utils_rebuild_mef, ["-t", "mef", "--csv", str(tmpdir)], obj=script_info
+    )
+    assert res.exit_code == 0
+    with open(join(tmpdir, "mef_ids.csv")) as ids:
+        assert mef_record.pid in ids.read().split()
+    with open(join(tmpdir, "mef_metadata.csv")) as metadata:
+        for line in metadata:
+            data = json.loads(line.split("\t")[3])
+            assert data["type"]
+            if data["pid"] == mef_record.pid:
+                assert data["gnd"] == mef_record["gnd"]
+
+
+def test_viaf_responses(script_info):
+    """Test viaf_responses CLI command."""
+    runner = CliRunner()
+    res = runner.invoke(
+        viaf_responses, ["--prune", "30"], obj=script_info, catch_exceptions=False
+    )
+    assert res.exit_code == 0
+    assert "Deleted VIAF responses: 0" in res.output
+    assert "count" in res.output
+
+    res = runner.invoke(
+        viaf_responses, ["--pid", "123"], obj=script_info, catch_exceptions=False
+    )
+    assert "No VIAF response for: 123" in res.output
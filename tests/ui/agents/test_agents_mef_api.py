@@ -3,7 +3,15 @@
 
 """Test agents MEF api."""
 
-from rero_mef.agents import AgentMefRecord
+from copy import deepcopy
+from unittest import mock
+
+from elasticsearch.exceptions import TransportError
+from invenio_db import db
+
+from rero_mef.agents import AgentGndRecord, AgentMefRecord
+from rero_mef.api_mef import EntityMefRecord
+from rero_mef.models import MefResolved
 
 from ...utils import create_record
 
@@ -39,3 +47,138 @@ def test_get_multiple_missing_pids(app, agent_mef_data, agent_viaf_record):
     }
     assert missing_pids == {"aggnd": [], "agrero": [], "aidref": []}
     assert none_pids == {"aggnd": [], "agrero": [], "aidref": []}
+    assert (
+        AgentMefRecord.get_multiple_pids(record_types=["aidref", "aggnd", "agrero"])
+        == multiple_pids
+    )
+    with mock.patch(
+        "rero_mef.api_mef.get_duplicate_values",
+        side_effect=TransportError(400, "search_phase_execution_exception"),
+    ):
+        assert (
+            AgentMefRecord.get_multiple_pids(record_types=["aidref", "aggnd", "agrero"])
+            == multiple_pids
+        )
+
+
+def test_get_mef_links(app, agent_mef_data):
+    """Test MEF lookup from the source to MEF link table."""
+    m_record = AgentMefRecord.create(data=deepcopy(agent_mef_data), delete_pid=True)
+    # uncommitted links are visible without index refresh
+    assert m_record.pid in AgentMefRecord.get_mef("069774331", "idref", pid_only=True)
+    assert m_record.pid in AgentMefRecord.get_mef("66739143", "viaf", pid_only=True)
+    assert m_record.links == {
+        ("gnd", "12391664X"),
+        ("rero", "A023655346"),
+        ("idref", "069774331"),
+        ("viaf", "66739143"),
+    }
+    mef_pids = AgentMefRecord.get_mef_pids_many("idref", ["069774331", "unknown"])
+    assert m_record.pid in mef_pids["069774331"]
+    assert "unknown" not in mef_pids
+
+    m_record.pop("idref")
+    m_record.update(data=m_record, dbcommit=True)
+    mef_pids = AgentMefRecord.get_mef("069774331", "idref", pid_only=True)
+    assert m_record.pid not in mef_pids
+    mef_records = AgentMefRecord.get_mef("12391664X", "gnd")
+    assert m_record.pid in [mef_record.pid for mef_record in mef_records]
+    assert AgentMefRecord.check_links() == ([], [])
+
+    m_record.delete(dbcommit=True)
+    assert m_record.pid not in AgentMefRecord.get_mef("12391664X", "gnd", pid_only=True)
+    assert AgentMefRecord.backfill_links() >= 0
+    assert AgentMefRecord.check_links() == ([], [])
+
+
+def test_replace_refs_many(app, agent_mef_record, agent_gnd_record, agent_idref_record):
+    """Test bulk resolution of the MEF $refs."""
+    with mock.patch.object(
+        AgentGndRecord,
+        "iter_records_by_pids",
+        wraps=AgentGndRecord.iter_records_by_pids,
+    ) as mock_iter:
+        resolved = AgentMefRecord.replace_refs_many([agent_mef_record] * 3)
+    mock_iter.assert_called_once()
+    assert resolved[0] == resolved[1] == resolved[2]
+    assert resolved[0] == agent_mef_record.replace_refs()
+    # same output as the JSON resolver
+    legacy = dict(super(EntityMefRecord, agent_mef_record).replace_refs())
+    legacy["sources"] = [
+        source for source in AgentMefRecord.entities if legacy.get(source)
+    ]
+    assert resolved[0] == legacy
+    assert {
+        key: value
+        for key, value in resolved[0].items()
+        if key not in AgentMefRecord.entities and key != "sources"
+    } == {
+        key: value
+        for key, value in agent_mef_record.items()
+        if key not in AgentMefRecord.entities
+    }
+    assert resolved[0]["gnd"] == agent_gnd_record
+    assert resolved[0]["idref"] == agent_idref_record
+    assert {"gnd", "idref"} <= set(resolved[0]["sources"])
+    assert agent_mef_record["gnd"] == {
+        "$ref": "https://mef.rero.ch/api/agents/gnd/12391664X"
+    }
+
+    records = AgentMefRecord.add_information_many([agent_mef_record] * 2, resolve=True)
+    assert records[0] == records[1] == agent_mef_record.add_information(resolve=True)
+    assert records[0]["gnd"] == agent_gnd_record
+    records = AgentMefRecord.add_information_many([agent_mef_record], sources=True)
+    assert records[0]["gnd"] == agent_mef_record["gnd"]
+    assert records[0]["sources"] == [
+        source for source in AgentMefRecord.entities if source in agent_mef_record
+    ]
+
+
+def test_resolved_store(app, agent_mef_record, agent_gnd_record):
+    """Test resolved MEF store and its invalidation."""
+    record = AgentMefRecord.get_record_by_pid(agent_mef_record.pid)
+    record.update(data=record, dbcommit=True)
+    # rows are written by other connections: always reload them
+    stored = MefResolved.query.filter_by(
+        mef_type="AGENTS", mef_pid=record.pid
+    ).populate_existing()
+    assert stored.one().json is None
+
+    # the caller's session is not committed
+    with mock.patch.object(db.session, "commit") as mock_commit:
+        resolved = AgentMefRecord.get_resolved_many([record])
+    mock_commit.assert_not_called()
+    assert resolved == [record.replace_refs()]
+    assert stored.one().version == record.revision_id
+    assert stored.one().json == resolved[0]
+    with mock.patch.object(
+        AgentMefRecord, "replace_refs_many", return_value=[]
+    ) as mock_replace:
+        assert AgentMefRecord.get_resolved_many([record, record]) == resolved * 2
+    mock_replace.assert_called_once_with([])
+    assert record.add_information(resolve=True)["gnd"] == agent_gnd_record
+
+    # a change of a linked source clears the stored document
+    generation = stored.one().generation
+    agent_gnd_record.update(data=agent_gnd_record, dbcommit=True)
+    assert stored.one().json is None
+    assert stored.one().generation == generation + 1
+    AgentMefRecord.get_resolved_many([record])
+    assert stored.one().json is not None
+    # a change of the MEF record too
+    record.update(data=record, dbcommit=True)
+    assert stored.one().json is None
+
+    # a document resolved before a source change is not stored
+    replace_refs_many = AgentMefRecord.replace_refs_many
+
+    def resolve_and_change_source(records):
+        data = replace_refs_many(records)
+        agent_gnd_record.update(data=agent_gnd_record, dbcommit=True)
+        return data
+
+    with mock.patch.object(
+        AgentMefRecord, "replace_refs_many", side_effect=resolve_and_change_source
+    ):
+        AgentMefRecord.get_resolved_many([record])
+    assert stored.one().json is None
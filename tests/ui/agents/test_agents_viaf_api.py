@@ -20,23 +20,17 @@ from rero_mef.agents import (
     AgentViafSearch,
 )
 from rero_mef.agents.viaf.api import RetryableVIAFError
+from rero_mef.agents.viaf.responses import (
+    get_response,
+    get_validators,
+    prune_responses,
+)
 from rero_mef.cli import init_oai_harvest_config
 from rero_mef.monitoring import Monitoring
 
 from ...utils import mock_response
 
 
-@pytest.fixture(autouse=True)
-def _disable_viaf_request_delay(app):
-    """Disable VIAF per-request sleep for fast and deterministic tests."""
-    old_delay = app.config.get("RERO_MEF_VIAF_REQUEST_DELAY")
-    app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = 0
-    try:
-        yield
-    finally:
-        app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = old_delay
-
-
 def test_get_pids_with_multiple_viaf(app, agent_viaf_record):
     """Test get pids with multiple MEF."""
     multiple_pids = AgentViafRecord.get_pids_with_multiple_viaf()
@@ -533,14 +527,12 @@ def test_get_online_other_source(mock_get, app, agent_viaf_online_response):
 
 @mock.patch("requests.Session.get")
 @mock.patch("rero_mef.agents.viaf.api.click.echo")
-@mock.patch("rero_mef.agents.viaf.api._sleep_with_countdown")
+@mock.patch("rero_mef.agents.viaf.api.get_viaf_rate_limiter")
 def test_get_online_rate_limit_retry_after_capped(
-    mock_wait, mock_echo, mock_get, app, agent_viaf_online_response
+    mock_limiter, mock_echo, mock_get, app, agent_viaf_online_response
 ):
     """Cap Retry-After to RERO_MEF_VIAF_RETRY_AFTER_MAX and retry successfully."""
-    old_delay = app.config.get("RERO_MEF_VIAF_REQUEST_DELAY")
     old_max = app.config.get("RERO_MEF_VIAF_RETRY_AFTER_MAX")
-    app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = 0
     app.config["RERO_MEF_VIAF_RETRY_AFTER_MAX"] = 60
 
     try:
@@ -556,22 +548,20 @@ def test_get_online_rate_limit_retry_after_capped(
         assert "OK" in msg
         echo_call = mock_echo.call_args[0][0]
         assert "capped to 60s" in echo_call
-        mock_wait.assert_called_once_with(60)
+        mock_limiter.return_value.pause.assert_called_once_with(60)
+        assert mock_limiter.return_value.acquire.call_count == 2
     finally:
-        app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = old_delay
         app.config["RERO_MEF_VIAF_RETRY_AFTER_MAX"] = old_max
 
 
 @mock.patch("requests.Session.get")
 @mock.patch("rero_mef.agents.viaf.api.click.echo")
-@mock.patch("rero_mef.agents.viaf.api._sleep_with_countdown")
+@mock.patch("rero_mef.agents.viaf.api.get_viaf_rate_limiter")
 def test_get_online_rate_limit_without_header_uses_default(
-    mock_wait, mock_echo, mock_get, app
+    mock_limiter, mock_echo, mock_get, app
 ):
     """Use the default wait and raise on repeated 429 responses."""
-    old_delay = app.config.get("RERO_MEF_VIAF_REQUEST_DELAY")
     old_default = app.config.get("RERO_MEF_VIAF_RETRY_AFTER_DEFAULT")
-    app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = 0
     app.config["RERO_MEF_VIAF_RETRY_AFTER_DEFAULT"] = 3
 
     try:
@@ -583,12 +573,41 @@ def test_get_online_rate_limit_without_header_uses_default(
             AgentViafRecord.get_online_record("SUDOC", "076515788")
 
         mock_echo.assert_called_once()
-        mock_wait.assert_called_once_with(3)
+        assert mock_limiter.return_value.pause.call_args_list == [
+            mock.call(3),
+            mock.call(3),
+        ]
     finally:
-        app.config["RERO_MEF_VIAF_REQUEST_DELAY"] = old_delay
         app.config["RERO_MEF_VIAF_RETRY_AFTER_DEFAULT"] = old_default
 
 
+def test_get_online_records(app):
+    """Test concurrent VIAF requests keep every result."""
+    keys = [("VIAF", str(pid)) for pid in range(10)]
+
+    def get_online_record(viaf_source_code, pid, validators=None):
+        if pid == "3":
+            raise RetryableVIAFError("temporary failure")
+        return {"pid": pid}, f"VIAF get: {pid} | OK"
+
+    with mock.patch.object(
+        AgentViafRecord, "get_online_record", side_effect=get_online_record
+    ):
+        results = {
+            pid: (data, msg, error)
+            for _, pid, data, msg, error in AgentViafRecord.get_online_records(
+                keys, workers=3
+            )
+        }
+
+    assert sorted(results) == sorted(pid for _, pid in keys)
+    assert results["1"] == ({"pid": "1"}, "VIAF get: 1 | OK", None)
+    data, msg, error = results["3"]
+    assert data is None
+    assert msg == "temporary failure"
+    assert isinstance(error, RetryableVIAFError)
+
+
 def test_handle_redirect_retryable_target_failure_does_not_delete_old_record(app):
     """Test transient target fetch failures do not delete the old VIAF record."""
     old_pid = "12345679"
@@ -657,3 +676,84 @@ def test_get_all_missing_viaf_pids(app, agent_viaf_record, agent_mef_record):
     # agent_mef_record has a viaf_pid that matches agent_viaf_record so neither list has it
     assert isinstance(missing, list)
     assert isinstance(non_existing, dict)
+
+
+def test_get_viaf_links(app, agent_viaf_data, agent_gnd_record):
+    """Test VIAF lookup from the source to VIAF link table."""
+    viaf_record = AgentViafRecord.create(
+        data={**agent_viaf_data, "pid": "LINK_1", "gnd_pid": "LINK_GND"}
+    )
+    # uncommitted links are visible without index refresh
+    assert AgentViafRecord.get_viaf_pids("gnd", "LINK_GND") == ["LINK_1"]
+    assert ("gnd", "LINK_GND") in viaf_record.links
+
+    viaf_record["gnd_pid"] = agent_gnd_record.pid
+    viaf_record.update(data=viaf_record, dbcommit=True)
+    assert AgentViafRecord.get_viaf_pids("gnd", "LINK_GND") == []
+    viaf_pids = [viaf.pid for viaf in AgentViafRecord.get_viaf(agent_gnd_record)]
+    assert "LINK_1" in viaf_pids
+    assert AgentViafRecord.check_links() == ([], [])
+
+    viaf_record.delete(dbcommit=True)
+    assert "LINK_1" not in AgentViafRecord.get_viaf_pids("gnd", agent_gnd_record.pid)
+    assert AgentViafRecord.check_links() == ([], [])
+
+
+@mock.patch("requests.Session.get")
+def test_get_online_conditional(mock_get, app, agent_viaf_online_response):
+    """Test conditional VIAF requests skip unchanged payloads."""
+    response = mock_response(content=b"{}", json_data=agent_viaf_online_response)
+    response.headers = {"ETag": '"v1"'}
+    mock_get.return_value = response
+    validators = {}
+    data, msg = AgentViafRecord.get_online_record(
+        "SUDOC", "076515788", validators=validators
+    )
+    assert data["pid"] == "124294761"
+    assert validators["etag"] == '"v1"'
+
+    not_modified = mock_response(status=304)
+    not_modified.headers = {}
+    mock_get.return_value = not_modified
+    data, msg = AgentViafRecord.get_online_record(
+        "SUDOC", "076515788", validators=validators
+    )
+    assert data is None
+    assert msg.endswith("| NOT MODIFIED")
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+
+    response.headers = {}
+    mock_get.return_value = response
+    data, msg = AgentViafRecord.get_online_record(
+        "SUDOC", "076515788", validators=validators
+    )
+    assert data is None
+    assert msg.endswith("| NOT MODIFIED")
+    assert validators["etag"] is None
+
+
+def test_get_online_records_conditional(app):
+    """Test validators are stored once the results are processed."""
+
+    def get_online_record(viaf_source_code, pid, validators=None):
+        validators.update(etag=None, last_modified=None, payload_hash=f"hash{pid}")
+        return {"pid": pid}, f"VIAF get: {pid} | OK"
+
+    with mock.patch.object(
+        AgentViafRecord, "get_online_record", side_effect=get_online_record
+    ):
+        results = list(
+            AgentViafRecord.get_online_records(
+                [("VIAF", "1"), ("VIAF", "2")], workers=2, conditional=True
+            )
+        )
+
+    assert len(results) == 2
+    assert get_response("1")["payload_hash"] == "hash1"
+    assert prune_responses(days=365) == 0
+    assert get_response("2")["payload_hash"] == "hash2"
+
+    # validators of another version are ignored to parse the payloads again
+    assert get_validators("1")["payload_hash"] == "hash1"
+    with mock.patch("rero_mef.agents.viaf.responses.__version__", "0.0.0"):
+        assert get_validators("1") == {}
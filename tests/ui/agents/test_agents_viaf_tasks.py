@@ -91,22 +91,16 @@ def test_process_viaf_refresh_default_batch(mock_refresh, app, agent_viaf_record
     """Test process_viaf_refresh with default batch size."""
     mock_refresh.return_value = Action.DISCARD
 
-    hit = mock.Mock()
-    hit.pid = agent_viaf_record.pid
-
-    class _FakeQuery:
-        def sort(self, *_args, **_kwargs):
-            return self
-
-        def source(self, *_args, **_kwargs):
-            return self
-
-        def scan(self):
-            yield hit
-
-    with mock.patch(
-        "rero_mef.agents.viaf.tasks.AgentViafSearch",
-        return_value=_FakeQuery(),
+    # the pids are scanned from the index with a point in time
+    AgentViafRecord.flush_indexes()
+
+    with (
+        mock.patch(
+            "rero_mef.agents.viaf.tasks.AgentViafRecord.get_online_records",
+            side_effect=lambda keys, **_kwargs: (
+                (*key, {}, "NO RECORD", None) for key in keys
+            ),
+        ) as mock_online,
     ):
         count, action_counts = process_viaf_refresh(
             batch_size=None,  # Use config default
@@ -117,6 +111,8 @@ def test_process_viaf_refresh_default_batch(mock_refresh, app, agent_viaf_record
 
     assert count >= 1
     assert Action.DISCARD.value in action_counts
+    mock_online.assert_called_once()
+    assert mock_refresh.call_args.kwargs["online"] == [{}, "NO RECORD", None]
 
 
 @mock.patch("requests.Session.get")
@@ -214,3 +210,16 @@ def test_refresh_viaf_record_uptodate_no_touch_when_no_dbcommit(
     assert action == Action.UPTODATE
     mock_record.commit.assert_not_called()
     mock_record.dbcommit.assert_not_called()
+
+
+def test_refresh_viaf_record_not_modified(app, agent_viaf_record):
+    """Test an unchanged VIAF payload only touches the local record."""
+    msg = f"VIAF get: {agent_viaf_record.pid} | NOT MODIFIED"
+    with mock.patch(
+        "rero_mef.agents.viaf.tasks.AgentViafRecord.get_online_record"
+    ) as mock_online:
+        action = _refresh_viaf_record(
+            pid=agent_viaf_record.pid, online=(None, msg, None)
+        )
+    assert action == Action.UPTODATE
+    mock_online.assert_not_called()
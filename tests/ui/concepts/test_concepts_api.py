@@ -5,6 +5,7 @@
 
 import os
 from copy import deepcopy
+from unittest import mock
 
 from rero_mef.api import Action
 from rero_mef.concepts import (
@@ -366,8 +367,22 @@ def test_create_concept_frbnf_record_exact(
     assert action == Action.CREATE
     assert gnd_record["pid"] == concept_gnd_frbnf_data_exact["pid"]
 
+    # Association identifiers are looked up in the database without refresh
+    own, associated = idref_record.get_association_pids(
+        "FRBNF11932111", ConceptGndRecord
+    )
+    assert own == [(idref_record.pid, False)]
+    assert associated == [(gnd_record.pid, True)]
+
+    # Without association table rows the index is used
     ConceptIdrefRecord.flush_indexes()
     ConceptGndRecord.flush_indexes()
+    with mock.patch.object(ConceptGndRecord, "has_links", return_value=False):
+        assert idref_record.get_association_pids("FRBNF11932111", ConceptGndRecord) == (
+            own,
+            associated,
+        )
+
     # Create or update MEF record.
     m_record, m_actions = idref_record.create_or_update_mef(dbcommit=True, reindex=True)
     assert m_actions == {m_record.pid: Action.CREATE}
@@ -3,6 +3,9 @@
 
 """Test api."""
 
+from unittest import mock
+from uuid import uuid4
+
 from rero_mef.agents import (
     AgentIdrefIndexer,
     AgentIdrefRecord,
@@ -49,3 +52,122 @@ def test_entityrecord_api(app, agent_idref_record):
     indexed, failed = process_bulk_queue(stats_only=True)
     assert indexed >= 1
     assert failed == 0
+
+
+def test_entityrecord_keyset_pagination(app, agent_idref_record):
+    """Test keyset paginated pid and uuid generators."""
+    AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "keyset_1"}, dbcommit=True
+    )
+    pids = list(AgentIdrefRecord.get_all_pids())
+    assert list(AgentIdrefRecord.get_all_pids(batch_size=1)) == pids
+    assert len(pids) == AgentIdrefRecord.count()
+    ids = list(AgentIdrefRecord.get_all_ids(batch_size=1))
+    assert [AgentIdrefRecord.get_pid_by_id(id_) for id_ in ids] == pids
+    AgentIdrefRecord.get_record_by_pid("keyset_1").delete(force=False, dbcommit=True)
+    assert "keyset_1" in AgentIdrefRecord.get_all_deleted_pids(batch_size=1)
+    assert "keyset_1" not in AgentIdrefRecord.get_all_pids(batch_size=1)
+
+
+def test_entityrecord_get_records_by_pids(app, agent_idref_record):
+    """Test batched record fetching by pids and uuids."""
+    AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "batch_1"}, dbcommit=True
+    )
+    AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "batch_2"}, dbcommit=True
+    )
+    records, missing = AgentIdrefRecord.get_records_by_pids(
+        ["batch_2", "unknown", "batch_1"], batch_size=2
+    )
+    assert [record.pid for record in records] == ["batch_2", "batch_1"]
+    assert missing == ["unknown"]
+    ids = [record.id for record in records]
+    assert [record.pid for record in AgentIdrefRecord.iter_records_by_ids(ids)] == [
+        "batch_2",
+        "batch_1",
+    ]
+
+
+def test_entityrecord_create_or_update_many(app, agent_idref_record):
+    """Test bulk create or update with md5 short-circuit."""
+    data = [
+        {**agent_idref_record, "pid": "many_1"},
+        {**agent_idref_record, "pid": "many_2"},
+    ]
+    results = AgentIdrefRecord.create_or_update_many(data, dbcommit=True)
+    assert [action for _, action in results.values()] == [Action.CREATE] * 2
+    assert AgentIdrefRecord.get_record_by_pid("many_2")
+
+    data[1] = {**data[1], "authorized_access_point": "changed"}
+    results = AgentIdrefRecord.create_or_update_many(
+        data, dbcommit=True, test_md5=True, batch_size=1
+    )
+    assert results["many_1"] == (None, Action.UPTODATE)
+    assert results["many_2"][1] == Action.REPLACE
+    record = AgentIdrefRecord.get_record_by_pid("many_2")
+    assert record["authorized_access_point"] == "changed"
+
+    # a failed record does not abort the other records of its chunk
+    data = [
+        {**agent_idref_record, "pid": "many_3", "authorized_access_point": 1},
+        {**agent_idref_record, "pid": "many_4"},
+    ]
+    results = AgentIdrefRecord.create_or_update_many(data, dbcommit=True)
+    assert results["many_3"] == (None, Action.ERROR)
+    assert results["many_4"][1] == Action.CREATE
+    assert not AgentIdrefRecord.get_record_by_pid("many_3")
+    assert AgentIdrefRecord.get_record_by_pid("many_4")
+
+
+def test_entityrecord_get_md5s(app, agent_idref_record):
+    """Test md5 lookup from the metadata md5 column."""
+    record = AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "md5_1"}, dbcommit=True
+    )
+    md5s = AgentIdrefRecord.get_md5s(["md5_1", "unknown"])
+    assert md5s == {"md5_1": record["md5"]}
+
+
+def test_entityrecord_get_deleted_states(app, agent_idref_record):
+    """Test deleted field lookup without loading the records."""
+    AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "deleted_1", "deleted": "2024-01-01"},
+        dbcommit=True,
+    )
+    AgentIdrefRecord.create(
+        data={**agent_idref_record, "pid": "deleted_2"}, dbcommit=True
+    )
+    deleted_states = AgentIdrefRecord.get_deleted_states(
+        ["deleted_1", "deleted_2", "unknown"]
+    )
+    assert deleted_states == {"deleted_1": "2024-01-01"}
+
+    mef_record = AgentMefRecord.create(
+        data={
+            "idref": {"$ref": "https://mef.rero.ch/api/agents/idref/deleted_1"},
+            "type": "bf:Person",
+        },
+        dbcommit=True,
+    )
+    assert mef_record["deleted"] == "2024-01-01"
+    mef_record["idref"] = {"$ref": "https://mef.rero.ch/api/agents/idref/deleted_2"}
+    mef_record = mef_record.update(data=mef_record, dbcommit=True)
+    assert "deleted" not in mef_record
+
+
+def test_entityindexer_actionsiter_window(app, agent_idref_record, monkeypatch):
+    """Test windowed record loading of queued index messages."""
+    record = AgentIdrefRecord.get_record_by_pid(agent_idref_record["pid"])
+    indexer = AgentIdrefIndexer()
+    indexer.process_bulk_queue()
+    indexer.bulk_index([record.id, uuid4(), record.id])
+    monkeypatch.setitem(app.config, "RERO_MEF_INDEXER_WINDOW_SIZE", 2)
+    with mock.patch.object(
+        AgentIdrefRecord, "get_records", wraps=AgentIdrefRecord.get_records
+    ) as mock_get_records:
+        indexed, failed = indexer.process_bulk_queue(stats_only=True)
+    # the missing record is rejected, one query per window
+    assert (indexed, failed) == (2, 0)
+    assert mock_get_records.call_count == 2
+    assert indexer.process_bulk_queue(stats_only=True) == (0, 0)
@@ -12,10 +12,13 @@ from click.testing import CliRunner
 
 from rero_mef.agents import AgentMefRecord
 from rero_mef.cli import (
+    backfill_links,
+    check_links,
     clean_multiple_mef,
     create_or_update,
     delete,
     rabbitmq_queue_count,
+    reindex_direct,
     tokens_create,
     wait_empty_tasks,
 )
@@ -68,6 +71,36 @@ def test_cli_create_or_update_delete(app, script_info):
     assert res == "DELETE NOT FOUND: aggnd test"
 
 
+def test_cli_reindex_direct(app, script_info, agent_idref_record):
+    """Test direct parallel bulk reindexing."""
+    runner = CliRunner()
+    res = runner.invoke(
+        reindex_direct,
+        ["-t", "aidref", "-w", "2", "-c", "1", "--yes-i-know"],
+        obj=script_info,
+    )
+    assert res.exit_code == 0
+    outputs = res.output.strip().split("\n")
+    assert outputs[0] == "Direct indexing aidref ..."
+    assert re.match(r"aidref indexed: [1-9]\d*, error: 0", outputs[1])
+
+
+def test_cli_links(app, script_info, agent_mef_record, agent_viaf_record):
+    """Test link tables backfill and consistency check."""
+    runner = CliRunner()
+    res = runner.invoke(backfill_links, ["-t", "mef", "-t", "viaf"], obj=script_info)
+    assert res.exit_code == 0
+    assert re.search(r"mef: links=[1-9]\d*", res.output)
+    assert re.search(r"viaf: links=[1-9]\d*", res.output)
+
+    res = runner.invoke(check_links, ["-t", "mef", "-t", "viaf"], obj=script_info)
+    assert res.exit_code == 0
+    assert res.output.strip().split("\n") == [
+        "mef: missing=0 stale=0",
+        "viaf: missing=0 stale=0",
+    ]
+
+
 def test_cli_clean_multiple_mef_reports_and_deletes_orphans(app, script_info):
     """Test clean_multiple_mef reports and removes orphaned MEF records."""
     assert app
@@ -145,13 +178,8 @@ def test_cli_clean_multiple_mef_flushes_before_orphan_scan(app, script_info):
 
     with (
         mock.patch(
-            "rero_mef.cli.AgentMefRecord.get_multiple_missing_pids",
-            return_value=(
-                None,
-                {"aidref": {"entity-1": ["mef-1", "mef-2"]}},
-                None,
-                None,
-            ),
+            "rero_mef.cli.AgentMefRecord.get_multiple_pids",
+            return_value={"aidref": {"entity-1": ["mef-1", "mef-2"]}},
         ),
         mock.patch(
             "rero_mef.cli.AgentMefRecord.flush_indexes", side_effect=_flush_indexes
@@ -165,16 +193,16 @@ def test_cli_clean_multiple_mef_flushes_before_orphan_scan(app, script_info):
             return_value=FakeEntityClass,
         ),
         mock.patch(
-            "rero_mef.cli.ConceptMefRecord.get_multiple_missing_pids",
-            return_value=(None, {}, None, None),
+            "rero_mef.cli.ConceptMefRecord.get_multiple_pids",
+            return_value={},
         ),
         mock.patch(
             "rero_mef.cli.ConceptMefRecord.get_all_pids_without_entities_and_viaf",
             return_value=iter([]),
         ),
         mock.patch(
-            "rero_mef.cli.PlaceMefRecord.get_multiple_missing_pids",
-            return_value=(None, {}, None, None),
+            "rero_mef.cli.PlaceMefRecord.get_multiple_pids",
+            return_value={},
         ),
         mock.patch(
             "rero_mef.cli.PlaceMefRecord.get_all_pids_without_entities_and_viaf",
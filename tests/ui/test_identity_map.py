@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Test record identity map."""
+
+from invenio_db import db
+
+from rero_mef.agents import AgentIdrefRecord
+from rero_mef.identity_map import current_identity_map, identity_map
+
+
+def test_identity_map(app, agent_idref_record):
+    """Test identity map caching and invalidation."""
+    AgentIdrefRecord.create(data={**agent_idref_record, "pid": "map_1"}, dbcommit=True)
+    assert current_identity_map() is None
+    with identity_map() as record_map:
+        record = AgentIdrefRecord.get_record_by_pid("map_1")
+        cached = AgentIdrefRecord.get_record_by_pid("map_1")
+        assert cached == record
+        assert cached is not record
+        assert record_map.stats == {"hits": 1, "misses": 1, "size": 1}
+        # changes of a returned record do not leak to the other readers
+        cached["authorized_access_point"] = "changed"
+        assert AgentIdrefRecord.get_record_by_pid("map_1") == record
+        # a rollback clears the map
+        db.session.rollback()
+        assert record_map.stats["size"] == 0
+        record = AgentIdrefRecord.get_record_by_pid("map_1")
+        with identity_map() as nested_map:
+            assert nested_map is record_map
+        record.replace(data={**record, "authorized_access_point": "x"}, dbcommit=True)
+        assert record_map.stats["size"] == 0
+        record = AgentIdrefRecord.get_record_by_pid("map_1")
+        assert record["authorized_access_point"] == "x"
+        assert record_map.stats["misses"] == 3
+        record.delete(dbcommit=True)
+        assert AgentIdrefRecord.get_record_by_pid("map_1") is None
+    assert current_identity_map() is None
@@ -6,6 +6,7 @@
 from rero_mef.agents import AgentGndRecord
 from rero_mef.api import Action
 from rero_mef.concepts import ConceptIdrefRecord
+from rero_mef.rebuild import MefRebuild
 
 
 def test_mef_minter(app, agent_gnd_data, concept_idref_data):
@@ -27,3 +28,35 @@ def test_mef_minter(app, agent_gnd_data, concept_idref_data):
     assert action == {"2": Action.CREATE}
     assert mef_cidref_rec.pid == "2"
     assert mef_cidref_rec.get("idref")
+
+
+def test_association_clusters():
+    """Test pairing of concept records by association identifier."""
+
+    def link(name, pid, identifier, exact_match=False):
+        return {
+            "source_name": name,
+            "pid": pid,
+            "association_identifier": identifier,
+            "exact_match": exact_match,
+        }
+
+    links = [
+        # unique on both sides
+        link("idref", "i1", "FRBNF1"),
+        link("gnd", "g1", "FRBNF1"),
+        # several GND records, one exact match
+        link("idref", "i2", "FRBNF2"),
+        link("gnd", "g2", "FRBNF2", exact_match=True),
+        link("gnd", "g3", "FRBNF2"),
+        # several IdRef records
+        link("idref", "i4", "FRBNF4"),
+        link("idref", "i5", "FRBNF4"),
+        link("gnd", "g4", "FRBNF4"),
+        # one source only
+        link("idref", "i6", "FRBNF6"),
+    ]
+    assert MefRebuild.association_clusters(links) == [
+        {"idref": "i1", "gnd": "g1"},
+        {"idref": "i2", "gnd": "g2"},
+    ]
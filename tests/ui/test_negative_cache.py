@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Negative lookup cache tests."""
+
+from datetime import timedelta
+from unittest import mock
+
+from rero_mef.agents import AgentGndRecord
+from rero_mef.negative_cache import (
+    ERROR,
+    NOT_FOUND,
+    MissMessage,
+    clear_miss,
+    get_cached_misses,
+    is_cached_miss,
+    miss_result,
+    recheck_delay,
+    record_miss,
+)
+
+
+def test_negative_cache(app):
+    """Test misses, exponential re-check delays and cached getters."""
+    old_ttl = app.config["RERO_MEF_NEGATIVE_CACHE_TTL"]
+    old_max_ttl = app.config["RERO_MEF_NEGATIVE_CACHE_MAX_TTL"]
+    app.config["RERO_MEF_NEGATIVE_CACHE_TTL"] = {
+        NOT_FOUND: timedelta(days=7),
+        ERROR: timedelta(hours=1),
+    }
+    app.config["RERO_MEF_NEGATIVE_CACHE_MAX_TTL"] = timedelta(days=180)
+    try:
+        msg = MissMessage("SRU-agents.gnd  get: 1 | No record", NOT_FOUND)
+        assert msg == "SRU-agents.gnd  get: 1 | No record"
+        assert miss_result(msg) == NOT_FOUND
+        assert miss_result(MissMessage("get: 1 | HTTP Error: 503")) == ERROR
+        assert miss_result("get: 1 | No record") == ERROR
+        assert recheck_delay(NOT_FOUND, 1) == timedelta(days=7)
+        assert recheck_delay(NOT_FOUND, 3) == timedelta(days=28)
+        assert recheck_delay(NOT_FOUND, 100) == timedelta(days=180)
+
+        record_miss("viaf", "DNB", "123", NOT_FOUND)
+        assert is_cached_miss("viaf", "DNB", "123")
+        assert not is_cached_miss("viaf", "SUDOC", "123")
+        assert get_cached_misses("viaf") == {("DNB", "123")}
+        clear_miss("viaf", "DNB", "123")
+        assert not is_cached_miss("viaf", "DNB", "123")
+
+        with mock.patch(
+            "rero_mef.agents.gnd.tasks.gnd_get_record",
+            return_value=(
+                None,
+                MissMessage("SRU-agents.gnd  get: 404 | No record", NOT_FOUND),
+            ),
+        ) as mock_get:
+            assert AgentGndRecord.get_online_record("404")[0] is None
+            data, msg = AgentGndRecord.get_online_record("404")
+            assert data is None
+            assert msg.endswith("NO RECORD (cached)")
+            mock_get.assert_called_once()
+            # interactive lookups bypass the cache
+            data, msg = AgentGndRecord.get_online_record("404", use_cache=False)
+            assert msg.endswith("| No record")
+            assert mock_get.call_count == 2
+        clear_miss("aggnd", "gnd", "404")
+    finally:
+        app.config["RERO_MEF_NEGATIVE_CACHE_TTL"] = old_ttl
+        app.config["RERO_MEF_NEGATIVE_CACHE_MAX_TTL"] = old_max_ttl
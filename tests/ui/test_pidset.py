@@ -0,0 +1,27 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Pid set tests."""
+
+from rero_mef.pidset import PidSet
+
+
+def test_pidset(tmpdir):
+    """Test pid set with memory and memory mapped runs."""
+    pids = ["12391664X", "069774331", "A023655346", "1", "001", "10", "VIAF-x"]
+    for spill_dir in (None, str(tmpdir)):
+        pid_set = PidSet(chunk_size=2, spill_dir=spill_dir)
+        for pid in pids:
+            assert pid not in pid_set
+            pid_set.add(pid)
+            assert pid in pid_set
+        pid_set.update(pids)
+        assert "01" not in pid_set
+        assert len(pid_set) == len(pids)
+        assert set(pid_set) == set(pids)
+
+        other = PidSet(["1", "069774331", "VIAF-x", "2"], spill_dir=spill_dir)
+        assert set(pid_set - other) == {"12391664X", "A023655346", "001", "10"}
+        assert set(pid_set & other) == {"1", "069774331", "VIAF-x"}
+        assert set(other - pid_set) == {"2"}
+        assert len(PidSet(spill_dir=spill_dir) - pid_set) == 0
@@ -0,0 +1,61 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Token bucket tests."""
+
+import pytest
+
+from rero_mef.ratelimit import (
+    MemoryTokenBucket,
+    RedisTokenBucket,
+    TokenBucket,
+    get_token_bucket,
+)
+
+
+def test_memory_token_bucket():
+    """Test token refill and pauses of the memory bucket."""
+    now = [0.0]
+    bucket = MemoryTokenBucket(rate=2, burst=2, clock=lambda: now[0])
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0.5
+    now[0] = 0.5
+    assert bucket.try_acquire() == 0
+    now[0] = 10
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0.5
+
+    bucket.pause(30)
+    bucket.pause(5)
+    assert bucket.try_acquire() == 30
+    now[0] = 40
+    assert bucket.try_acquire() == 0
+
+    unlimited = MemoryTokenBucket(clock=lambda: now[0])
+    assert all(unlimited.try_acquire() == 0 for _ in range(100))
+    unlimited.pause(1)
+    assert unlimited.try_acquire() == 1
+
+
+def test_get_token_bucket():
+    """Test buckets are shared by the threads of a process."""
+    bucket = get_token_bucket("memory://", "test", rate=1)
+    assert isinstance(bucket, MemoryTokenBucket)
+    assert get_token_bucket("memory://", "test", rate=1) is bucket
+
+
+def test_token_bucket_interface():
+    """Test the token bucket interface can not be used alone."""
+    with pytest.raises(TypeError):
+        TokenBucket(rate=1)
+
+
+def test_redis_token_bucket_unreachable():
+    """Test the Redis bucket falls back to memory without Redis."""
+    bucket = RedisTokenBucket("redis://localhost:1/0", "test", rate=1, burst=1)
+    assert bucket.try_acquire() == 0
+    assert 0 < bucket.try_acquire() <= 1
+    bucket.pause(30)
+    assert bucket.try_acquire() > 1
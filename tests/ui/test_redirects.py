@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Redirect graph tests."""
+
+from rero_mef.agents import AgentGndRecord
+from rero_mef.redirects import (
+    backfill_redirects,
+    get_final_target,
+    get_redirected_pids,
+    record_edges,
+    redirect_rows,
+)
+
+
+def test_redirect_rows():
+    """Test redirect edges and final targets."""
+    assert record_edges("A", {"type": "redirect_to", "value": "B"}) == {
+        ("A", "redirect_to", "B")
+    }
+    assert record_edges("C", {"type": "redirect_from", "value": "B"}) == {
+        ("B", "redirect_from", "C")
+    }
+    assert record_edges("A", {"type": "redirect_to", "value": "A"}) == set()
+    assert record_edges("A", None) == set()
+
+    edges = {
+        ("A", "redirect_to", "B"),
+        ("B", "redirect_from", "C"),
+        ("X", "redirect_to", "Y"),
+        ("Y", "redirect_to", "X"),
+    }
+    final_targets = {
+        row["pid"]: row["final_target"] for row in redirect_rows("aggnd", edges)
+    }
+    assert final_targets == {"A": "C", "B": "C", "X": None, "Y": None}
+
+
+def test_redirects(app, agent_gnd_record, agent_gnd_redirect_record):
+    """Test redirect table maintenance and lookups."""
+    pid_type = AgentGndRecord.provider.pid_type
+    redirect_pid = agent_gnd_redirect_record.pid
+    assert get_final_target(pid_type, redirect_pid) == agent_gnd_record.pid
+    assert get_final_target(pid_type, agent_gnd_record.pid) == agent_gnd_record.pid
+    assert get_redirected_pids(pid_type, agent_gnd_record.pid) == [redirect_pid]
+
+    assert backfill_redirects(AgentGndRecord) >= 1
+    assert get_final_target(pid_type, redirect_pid) == agent_gnd_record.pid
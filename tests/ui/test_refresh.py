@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Test index refresh coordinator."""
+
+from unittest import mock
+
+from rero_mef.refresh import RefreshCoordinator
+
+
+def test_refresh_coordinator(app):
+    """Test immediate, wait_for and debounce refresh modes."""
+    coordinator = RefreshCoordinator(
+        modes={"default": "immediate", "viaf": "wait_for", "mef": "debounce"},
+        debounce=60,
+    )
+    with mock.patch("rero_mef.refresh.current_search") as mock_search:
+        assert coordinator.refresh("agents_gnd")
+        assert not coordinator.refresh("viaf")
+        assert coordinator.refresh("mef")
+        assert not coordinator.refresh("mef")
+        assert not coordinator.refresh("mef")
+        assert coordinator.flush_pending() == ["mef"]
+        assert coordinator.flush_pending() == []
+    assert mock_search.flush_and_refresh.call_count == 3
+    assert coordinator.index_arguments("viaf") == {"refresh": "wait_for"}
+    assert coordinator.index_arguments("mef") == {}
+    assert coordinator.stats == {
+        "agents_gnd": {"requested": 1, "issued": 1, "pending": False},
+        "mef": {"requested": 3, "issued": 2, "pending": False},
+        "viaf": {"requested": 1, "issued": 0, "pending": False},
+    }
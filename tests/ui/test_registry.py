@@ -0,0 +1,31 @@
+# SPDX-FileCopyrightText: Fondation RERO+
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+"""Test entity class registry."""
+
+from rero_mef.agents import AgentGndIndexer, AgentGndRecord, AgentMefRecord
+from rero_mef.registry import current_entity_registry
+from rero_mef.utils import (
+    get_entity_class,
+    get_entity_classes,
+    get_entity_indexer_class,
+)
+
+
+def test_entity_registry(app):
+    """Test entity registry indexes."""
+    registry = current_entity_registry
+    assert registry.by_source["gnd"] == ["aggnd", "cognd", "plgnd"]
+    assert "aggnd" in registry.by_group["agents"]
+    assert registry.record_class_by_list_route("/agents/gnd/") == AgentGndRecord
+    assert registry.record_class_by_list_route("/agents/unknown/") is None
+    assert AgentGndRecord in registry.record_classes_by_source("gnd")
+    assert registry.get_class("unknown", "record_class") is None
+
+    entity_classes = get_entity_classes()
+    assert "mef" not in entity_classes
+    assert "viaf" not in entity_classes
+    assert entity_classes["aggnd"] == AgentGndRecord
+    assert get_entity_classes(without_mef_viaf=False)["mef"] == AgentMefRecord
+    assert get_entity_class("mef") == AgentMefRecord
+    assert get_entity_indexer_class("aggnd") == AgentGndIndexer
@@ -5,13 +5,14 @@
 
 import os
 
-from rero_mef.agents import AgentMefRecord
+from rero_mef.agents import AgentMefRecord, AgentMefSearch
 from rero_mef.concepts import ConceptMefRecord
 from rero_mef.utils import (
     JsonWriter,
     get_mefs_endpoints,
     number_records_in_file,
     read_json_record,
+    scan_index,
 )
 
 
@@ -31,3 +32,31 @@ def test_json_writer(tmpdir):
     assert number_records_in_file(temp_file_name, "json") == 2
     for idx, record in enumerate(read_json_record(open(temp_file_name)), 1):
         assert record.get("pid") == str(idx)
+
+
+def test_scan_index(app, agent_mef_record):
+    """Test point in time scan."""
+    AgentMefRecord.flush_indexes()
+    pids = sorted(hit.pid for hit in AgentMefSearch().source("pid").scan())
+    assert pids
+    hits = list(scan_index(AgentMefSearch(), size=1))
+    assert sorted(hit.pid for hit in hits) == pids
+    assert {hit.meta.id for hit in hits} == {
+        hit.meta.id for hit in AgentMefSearch().scan()
+    }
+    hits = scan_index(AgentMefSearch(), fields=["pid", "gnd.pid"], slices=2, size=1)
+    assert sorted(hit.pid for hit in hits) == pids
+    hits = scan_index(
+        AgentMefSearch(), fields=["pid"], sort=[{"pid": {"order": "asc"}}], size=1
+    )
+    assert [hit.pid for hit in hits] == pids
+    query = AgentMefSearch().filter("term", pid=agent_mef_record.pid)
+    assert [hit.to_dict() for hit in scan_index(query, fields=["pid"])] == [
+        {"pid": agent_mef_record.pid}
+    ]
+    # fields with several values keep all values
+    sources = sorted(next(iter(query.source("sources").scan())).to_dict()["sources"])
+    hits = list(scan_index(query, fields=["sources"]))
+    assert hits[0].to_dict()["sources"] == (
+        sources[0] if len(sources) == 1 else sources
+    )